@@ -2,7 +2,7 @@ from django.contrib import admin
 from .models import (
     User, Admin, CoinTransaction, AudiobookPurchase, CreatorEarning,
     Creator, CreatorApplicationLog, WithdrawalAccount, WithdrawalRequest,
-    Audiobook, Chapter, Review, Subscription, AudiobookViewLog,
+    Audiobook, Chapter, ChapterRendition, Review, Subscription, AudiobookViewLog,
     TicketCategory, Ticket, TicketMessage,
     ListeningHistory, UserLibraryItem,
     UserDownloadedAudiobook, CoinPurchase
@@ -65,6 +65,16 @@ class AudiobookAdmin(admin.ModelAdmin):
     creator_link.short_description = 'Creator'
     creator_link.admin_order_field = 'creator'
 
+class ChapterRenditionInline(admin.TabularInline):
+    model = ChapterRendition
+    extra = 0
+    can_delete = False
+    fields = ('profile', 'codec', 'bitrate_kbps', 'size_bytes', 'bytes_saved', 'integrated_lufs', 'audio_file', 'created_at')
+    readonly_fields = fields
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
 @admin.register(Chapter)
 class ChapterAdmin(admin.ModelAdmin):
     list_display = ('chapter_name', 'audiobook_title_link', 'chapter_order', 'is_tts_generated', 'created_at')
@@ -72,6 +82,7 @@ class ChapterAdmin(admin.ModelAdmin):
     list_filter = ('is_tts_generated', 'audiobook__language', 'created_at')
     ordering = ('audiobook', 'chapter_order')
     autocomplete_fields = ['audiobook']
+    inlines = [ChapterRenditionInline]
 
     def audiobook_title_link(self, obj):
         link = reverse("admin:AudioXApp_audiobook_change", args=[obj.audiobook.pk])
@@ -36,7 +36,7 @@ def get_duration_with_mutagen(file_source, filename):
         else:
             return None, "unsupported_format"
 
-        if audio and audio.info and hasattr(audio.info, 'length'):
+        if audio is not None and audio.info and hasattr(audio.info, 'length'):
             return float(audio.info.length), "success"
         else:
             return None, "no_stream_info"
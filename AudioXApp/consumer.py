@@ -4,7 +4,8 @@ import json
 import re
 from channels.generic.websocket import AsyncWebsocketConsumer
 from asgiref.sync import sync_to_async
-from .models import ChatRoom, ChatMessage, User, ChatRoomMember, Audiobook, MessageReaction
+from .models import ChatRoom, ChatMessage, User, ChatRoomMember, Audiobook, MessageReaction, DocumentConversionJob
+from .services.tts.document_jobs import job_group_name, job_status_payload
 from django.utils import timezone
 from django.core.files.base import ContentFile
 import base64
@@ -827,4 +828,44 @@ class ChatConsumer(AsyncWebsocketConsumer):
             return None
         except Exception as e:
             logger.error(f"ChatConsumer.get_audiobook_details: Error fetching audiobook details for ID {audiobook_id}: {e}", exc_info=True)
-            return None
\ No newline at end of file
+            return None
+
+
+# --- Document Conversion Job Consumer ---
+
+class DocumentConversionJobConsumer(AsyncWebsocketConsumer):
+    """Pushes progress of one of the user's document-to-audio jobs until it finishes."""
+
+    async def connect(self):
+        self.user = self.scope.get('user')
+        if not self.user or not self.user.is_authenticated:
+            await self.close()
+            return
+
+        self.job_id = self.scope['url_route']['kwargs']['job_id']
+        job_state = await self.get_job_state()
+        if job_state is None:
+            logger.warning(f"DocumentConversionJobConsumer.connect: Job {self.job_id} not found for user {self.user.username}. Closing connection.")
+            await self.close()
+            return
+
+        self.group_name = job_group_name(self.job_id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+        # The job may have moved on before the socket opened
+        await self.send(text_data=json.dumps({'type': 'job_progress', 'job': job_state}))
+
+    async def disconnect(self, close_code):
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def job_progress(self, event):
+        await self.send(text_data=json.dumps({'type': 'job_progress', 'job': event['job']}))
+
+    @sync_to_async
+    def get_job_state(self):
+        try:
+            job = DocumentConversionJob.objects.get(job_id=self.job_id, user=self.user)
+        except DocumentConversionJob.DoesNotExist:
+            return None
+        return job_status_payload(job)
@@ -0,0 +1,163 @@
+# AudioXApp/management/commands/benchmark_catalog_harvest.py
+
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from django.core.management.base import BaseCommand
+
+from ...services.catalog_harvester import CatalogHarvester
+from ...views.content_views import harvest_external_catalog
+
+# --- Benchmark Catalog Harvest Command ---
+
+STUB_RSS_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:itunes="http://www.itunes.com/dtds/podcast-1.0.dtd">
+<channel>
+<title>LibriVox Stub Book {feed_id}</title>
+<description>Stub feed {feed_id}</description>
+<language>en</language>
+<itunes:author>Stub Author {feed_id}</itunes:author>
+<image><url>http://{host}/covers/{feed_id}.jpg</url><title>cover</title><link>http://{host}/</link></image>
+{items}
+</channel>
+</rss>"""
+
+STUB_RSS_ITEM = """<item><title>Chapter {index}</title>
+<enclosure url="http://{host}/audio/{feed_id}/{index}.mp3" length="1000" type="audio/mpeg"/>
+<itunes:duration>00:10:00</itunes:duration></item>"""
+
+
+def _make_stub_handler(latency, error_rate):
+    class StubCatalogHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, body, content_type):
+            etag = f'"{hashlib.sha1(body).hexdigest()}"'
+            if status == 200 and self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            if status == 200:
+                self.send_header('ETag', etag)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            time.sleep(latency)
+            if error_rate and random.random() < error_rate:
+                self._send(503, b'busy', 'text/plain')
+                return
+
+            parsed = urlparse(self.path)
+            host = self.headers.get('Host', 'localhost')
+            if parsed.path.startswith('/rss/'):
+                feed_id = parsed.path.rsplit('/', 1)[-1]
+                items = '\n'.join(STUB_RSS_ITEM.format(host=host, feed_id=feed_id, index=i) for i in range(1, 6))
+                body = STUB_RSS_TEMPLATE.format(host=host, feed_id=feed_id, items=items).encode('utf-8')
+                self._send(200, body, 'application/rss+xml')
+            elif parsed.path == '/advancedsearch.php':
+                query = parse_qs(parsed.query).get('q', [''])[0]
+                term = query.split('"')[1] if '"' in query else 'stub'
+                rows = int(parse_qs(parsed.query).get('rows', ['10'])[0])
+                docs = [{
+                    'identifier': f"stub-{term.lower().replace(' ', '-')}-{i}",
+                    'title': f"Stub {term} Book {i}",
+                    'creator': f"Stub Author {i}",
+                    'description': f"A stub {term} audiobook.",
+                    'subject': [term],
+                    'language': 'English',
+                } for i in range(rows)]
+                self._send(200, json.dumps({'response': {'docs': docs}}).encode('utf-8'), 'application/json')
+            elif parsed.path.startswith('/metadata/'):
+                identifier = parsed.path.rsplit('/', 1)[-1]
+                files = [{'name': 'cover.jpg', 'format': 'JPEG'}] + [
+                    {'name': f'chapter_{i}.mp3', 'format': 'VBR MP3', 'title': f'Chapter {i}', 'length': '600'}
+                    for i in range(1, 6)
+                ]
+                metadata = {'title': f"Stub Item {identifier}", 'creator': 'Stub Author', 'language': 'urd'}
+                self._send(200, json.dumps({'metadata': metadata, 'files': files}).encode('utf-8'), 'application/json')
+            else:
+                self._send(404, b'not found', 'text/plain')
+
+    return StubCatalogHandler
+
+
+class Command(BaseCommand):
+    """
+    Benchmarks the external catalog harvester against an in-process HTTP stub
+    that mimics the LibriVox RSS and Archive.org search/metadata endpoints.
+
+    With ``--incremental`` each pool size is run twice against the same
+    validator state, so the second pass shows the conditional-request refresh.
+
+    Usage:
+        python manage.py benchmark_catalog_harvest --workers 1,8 --latency 0.1
+        python manage.py benchmark_catalog_harvest --workers 8 --incremental
+    """
+    help = 'Benchmarks the external catalog harvester against a local HTTP stub.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', default='1,4,8',
+                            help='Comma separated pool sizes to compare (default: 1,4,8).')
+        parser.add_argument('--latency', type=float, default=0.1,
+                            help='Artificial per-request latency of the stub in seconds (default: 0.1).')
+        parser.add_argument('--error-rate', type=float, default=0.0,
+                            help='Fraction of stub responses that return HTTP 503 (default: 0).')
+        parser.add_argument('--rate', type=float, default=0.0,
+                            help='Per-host requests/second for the token bucket; 0 disables throttling.')
+        parser.add_argument('--incremental', action='store_true',
+                            help='Run a second, conditional pass per pool size against the first pass state.')
+
+    def handle(self, *args, **options):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), _make_stub_handler(options['latency'], options['error_rate']))
+        server.daemon_threads = True
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        base_url = f'http://127.0.0.1:{server.server_address[1]}'
+        self.stdout.write(self.style.NOTICE(f'Stub catalog listening on {base_url}'))
+
+        try:
+            passes = ['full', 'incremental'] if options['incremental'] else ['full']
+            for workers in [int(w) for w in options['workers'].split(',') if w.strip()]:
+                state = {}
+                for mode in passes:
+                    self._run_pass(base_url, workers, options['rate'], state, mode)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def _run_pass(self, base_url, workers, rate, state, mode):
+        harvester = CatalogHarvester(
+            max_workers=workers,
+            backoff_seconds=0.05,
+            host_rate_limits={'*': (rate, max(1, int(rate)))},
+        )
+        started = time.monotonic()
+        data, fetch_successful, report = harvest_external_catalog(
+            harvester=harvester, librivox_base_url=base_url, archive_base_url=base_url,
+            state=state, incremental=(mode == 'incremental'),
+        )
+        elapsed = time.monotonic() - started
+        total_books = (
+            len(data['librivox_audiobooks'])
+            + sum(len(books) for books in data['archive_genre_audiobooks'].values())
+            + sum(len(books) for books in data['archive_language_audiobooks'].values())
+        )
+        totals = report.outcome_totals()
+        style = self.style.SUCCESS if fetch_successful else self.style.WARNING
+        self.stdout.write(style(
+            f"workers={workers} ({mode}): {total_books} books in {elapsed:.2f}s - "
+            f"{totals['fetched']} fetched, {totals['revalidated']} revalidated, {totals['skipped']} skipped"
+        ))
+        for line in report.summary_lines():
+            self.stdout.write(f'  {line}')
@@ -0,0 +1,104 @@
+# AudioXApp/management/commands/benchmark_catalog_search.py
+
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...services.catalog_text_index import CatalogTextIndex
+from ...views.content_views import _matches_external_filters
+
+# --- Benchmark Catalog Search Command ---
+
+WORDS = [
+    'adventure', 'ancient', 'autumn', 'battle', 'bright', 'castle', 'city', 'dark', 'desert', 'dream',
+    'empire', 'evening', 'forest', 'garden', 'ghost', 'golden', 'harbor', 'hidden', 'island', 'journey',
+    'kingdom', 'letters', 'lost', 'memory', 'midnight', 'mountain', 'mystery', 'night', 'ocean', 'promise',
+    'queen', 'river', 'road', 'secret', 'shadow', 'silent', 'stars', 'storm', 'stranger', 'summer',
+    'tales', 'tower', 'valley', 'village', 'voyage', 'war', 'whisper', 'winter', 'wolf', 'world',
+]
+GENRES = ['Fiction', 'Mystery', 'History', 'Poetry', 'Science Fiction', 'Romance', 'Philosophy', 'Horror']
+LANGUAGES = ['English', 'Urdu', 'Hindi', 'Punjabi', 'Sindhi']
+AUTHORS = ['Austen', 'Dickens', 'Tolstoy', 'Iqbal', 'Ghalib', 'Tagore', 'Twain', 'Wilde', 'Poe', 'Shelley']
+
+
+def _synthetic_catalog(size, rng):
+    books_by_genre = {}
+    for i in range(size):
+        genre = rng.choice(GENRES)
+        title = ' '.join(rng.sample(WORDS, 3)).title()
+        books_by_genre.setdefault(genre, []).append({
+            'source': 'archive',
+            'slug': f'bench-book-{i}',
+            'title': title,
+            'author': f"{rng.choice(AUTHORS)} {rng.choice(WORDS).title()}",
+            'description': 'A public domain recording.',
+            'subjects': [genre, rng.choice(WORDS)],
+            'language': rng.choice(LANGUAGES),
+            'genre': genre,
+        })
+    return {'librivox_audiobooks': [], 'archive_genre_audiobooks': books_by_genre, 'archive_language_audiobooks': {}}
+
+
+def _synthetic_queries(count, rng):
+    queries = []
+    for _ in range(count):
+        query = rng.choice(WORDS + AUTHORS)
+        if rng.random() < 0.3:
+            query = f"{query} {rng.choice(WORDS)}"
+        language = rng.choice(LANGUAGES) if rng.random() < 0.5 else None
+        genre = rng.choice(GENRES) if rng.random() < 0.3 else None
+        queries.append((query, language, genre))
+    return queries
+
+
+class Command(BaseCommand):
+    """
+    Compares the external catalog inverted index with the substring scan over
+    every cached book dict, on synthetic catalogs of increasing size. Hit
+    counts differ slightly: the index matches words in any order (also in
+    genre and subjects) where the scan matches the query as one substring.
+
+    Usage:
+        python manage.py benchmark_catalog_search
+        python manage.py benchmark_catalog_search --sizes 1000,10000 --queries 200
+    """
+    help = 'Benchmarks external catalog search: inverted index vs full scan.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000,100000',
+                            help='Comma separated catalog sizes (default: 1000,10000,100000).')
+        parser.add_argument('--queries', type=int, default=100,
+                            help='Number of random queries per size (default: 100).')
+        parser.add_argument('--seed', type=int, default=7, help='Random seed (default: 7).')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        queries = _synthetic_queries(options['queries'], rng)
+
+        for size in [int(s) for s in options['sizes'].split(',') if s.strip()]:
+            data = _synthetic_catalog(size, rng)
+            books = [book for genre_books in data['archive_genre_audiobooks'].values() for book in genre_books]
+
+            started = time.perf_counter()
+            index = CatalogTextIndex(data)
+            build_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            scan_hits = sum(
+                sum(1 for book in books if _matches_external_filters(book, query, language, genre))
+                for query, language, genre in queries
+            )
+            scan_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            index_hits = sum(len(index.search(query, language, genre)) for query, language, genre in queries)
+            index_seconds = time.perf_counter() - started
+
+            per_query = 1000 / len(queries) if queries else 0
+            self.stdout.write(self.style.SUCCESS(
+                f"{size} books: build {build_seconds * 1000:.1f}ms ({len(index.vocabulary)} terms) | "
+                f"scan {scan_seconds * per_query:.2f}ms/query ({scan_hits} hits) | "
+                f"index {index_seconds * per_query:.3f}ms/query ({index_hits} hits) | "
+                f"speedup x{scan_seconds / index_seconds if index_seconds else float('inf'):.0f}"
+            ))
@@ -0,0 +1,134 @@
+# AudioXApp/management/commands/benchmark_document_tts.py
+
+import asyncio
+import io
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+import docx
+import fitz
+from django.core.management.base import BaseCommand, CommandError
+
+from ...services.tts.extraction import document_type_for, extract_document_text, iter_document_text
+from ...services.tts.segmenting import iter_segments, split_text
+from ...services.tts.synthesizer import synthesize_segments
+from .benchmark_tts_synthesis import FakeVoiceBackend, _synthetic_text
+
+# --- Benchmark Document TTS Command ---
+
+
+def _write_pdf_fixture(path, pages, chars_per_page, rng):
+    document = fitz.open()
+    for _ in range(pages):
+        page = document.new_page()
+        page.insert_textbox(page.rect + (36, 36, -36, -36), _synthetic_text(chars_per_page, rng), fontsize=8)
+    document.save(path)
+    document.close()
+
+
+def _write_docx_fixture(path, pages, chars_per_page, rng):
+    document = docx.Document()
+    for paragraph in _synthetic_text(pages * chars_per_page, rng).split('\n\n'):
+        document.add_paragraph(paragraph)
+    document.save(path)
+
+
+class Command(BaseCommand):
+    """
+    Measures the shared document TTS pipeline on PDF and DOCX fixtures:
+    extraction time for each process pool size, then synthesis against the
+    fake voice backend with the text extracted up front (batch) versus
+    streamed page by page into synthesis (streaming). Reports time to the
+    first written segment, total time and peak Python memory.
+
+    Fixtures are generated into a temporary directory; real documents can be
+    added with --files.
+
+    Usage:
+        python manage.py benchmark_document_tts
+        python manage.py benchmark_document_tts --pages 300 --workers 1,4 --files book.pdf notes.docx
+    """
+    help = 'Benchmarks document text extraction and streamed TTS synthesis on PDF/DOCX fixtures.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=120, help='Pages in each generated fixture (default: 120).')
+        parser.add_argument('--chars-per-page', type=int, default=1800,
+                            help='Characters per generated page (default: 1800).')
+        parser.add_argument('--workers', default='1,4',
+                            help='Comma separated extraction pool sizes (default: 1,4).')
+        parser.add_argument('--concurrency', type=int, default=4, help='Synthesis concurrency (default: 4).')
+        parser.add_argument('--base-latency', type=float, default=0.05,
+                            help='Fake backend latency per request in seconds (default: 0.05).')
+        parser.add_argument('--ms-per-char', type=float, default=0.01,
+                            help='Fake backend latency per character in milliseconds (default: 0.01).')
+        parser.add_argument('--files', nargs='*', default=[], help='Extra PDF/DOCX documents to benchmark.')
+        parser.add_argument('--seed', type=int, default=7, help='Random seed (default: 7).')
+
+    def handle(self, *args, **options):
+        workers_levels = [int(s) for s in options['workers'].split(',') if s.strip()]
+        for path in options['files']:
+            if not os.path.isfile(path):
+                raise CommandError(f"File not found: {path}")
+
+        with tempfile.TemporaryDirectory() as fixture_dir:
+            rng = random.Random(options['seed'])
+            fixtures = [os.path.join(fixture_dir, 'fixture.pdf'), os.path.join(fixture_dir, 'fixture.docx')]
+            _write_pdf_fixture(fixtures[0], options['pages'], options['chars_per_page'], rng)
+            _write_docx_fixture(fixtures[1], options['pages'], options['chars_per_page'], rng)
+
+            for path in fixtures + options['files']:
+                file_type = document_type_for(path)
+                self.stdout.write(f"{os.path.basename(path)} ({file_type}, {os.path.getsize(path) / 1024:.0f} KiB)")
+                for workers in workers_levels:
+                    self._benchmark_extraction(path, file_type, workers)
+                self._benchmark_pipeline(path, file_type, max(workers_levels), options)
+
+    def _benchmark_extraction(self, path, file_type, workers):
+        started = time.perf_counter()
+        first_chunk_seconds = None
+        chunks = chars = 0
+        for chunk in iter_document_text(path, file_type, workers=workers):
+            if first_chunk_seconds is None:
+                first_chunk_seconds = time.perf_counter() - started
+            chunks += 1
+            chars += len(chunk)
+        seconds = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"  extraction | {workers} worker(s): {seconds:.2f}s for {chunks} chunks / {chars} chars "
+            f"(first chunk after {first_chunk_seconds or 0:.3f}s)"
+        ))
+
+    def _benchmark_pipeline(self, path, file_type, workers, options):
+        def batch_segments():
+            return split_text(extract_document_text(path, file_type, workers=workers) or '')
+
+        def streamed_segments():
+            return iter_segments(iter_document_text(path, file_type, workers=workers))
+
+        for label, make_segments in (('batch', batch_segments), ('streaming', streamed_segments)):
+            engine = FakeVoiceBackend(options['base_latency'], options['ms_per_char'] / 1000, seed=options['seed'])
+            output = io.BytesIO()
+            first_written = []
+
+            async def on_progress(done, total):
+                if not first_written:
+                    first_written.append(time.perf_counter())
+
+            tracemalloc.start()
+            started = time.perf_counter()
+            segments = make_segments()
+            asyncio.run(synthesize_segments(engine, segments, 'bench-voice', output,
+                                            concurrency=options['concurrency'], on_progress=on_progress,
+                                            use_cache=False))
+            seconds = time.perf_counter() - started
+            _current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            first_segment_seconds = first_written[0] - started if first_written else 0
+            self.stdout.write(self.style.SUCCESS(
+                f"  pipeline {label:<9} | {seconds:.2f}s total, first segment after {first_segment_seconds:.2f}s, "
+                f"peak {peak / 1024 ** 2:.1f} MiB ({output.tell() / 1024:.0f} KiB of audio)"
+            ))
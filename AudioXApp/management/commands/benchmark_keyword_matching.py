@@ -0,0 +1,102 @@
+# AudioXApp/management/commands/benchmark_keyword_matching.py
+
+import random
+import string
+import time
+
+from django.core.management.base import BaseCommand
+from thefuzz import fuzz
+
+from ...services.keyword_matcher import SIMILARITY_THRESHOLD, KeywordMatcher, tokenize
+from .benchmark_tts_synthesis import _synthetic_text
+
+# --- Benchmark Keyword Matching Command ---
+
+
+def _random_word(rng, min_length=4, max_length=10):
+    return ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(min_length, max_length)))
+
+
+def _misspell(word, rng):
+    position = rng.randrange(len(word))
+    return word[:position] + rng.choice(string.ascii_lowercase) + word[position + 1:]
+
+
+def _keywords(count, rng):
+    """Made-up keywords, one in ten a two-word phrase."""
+    keywords = set()
+    while len(keywords) < count:
+        keyword = _random_word(rng)
+        if rng.random() < 0.1:
+            keyword = f'{keyword} {_random_word(rng)}'
+        keywords.add(keyword)
+    return sorted(keywords)
+
+
+def _transcript(words, keywords, plants, rng):
+    """Synthetic prose of ``words`` words with ``plants`` keywords in it, half of them misspelled."""
+    tokens = _synthetic_text(words * 6, rng).split(' ')[:words]
+    for _ in range(plants):
+        keyword = rng.choice(keywords)
+        tokens[rng.randrange(len(tokens))] = _misspell(keyword, rng) if rng.random() < 0.5 else keyword
+    return ' '.join(tokens)
+
+
+def _legacy_hits(transcript_words, keywords):
+    """The former moderation loop: every keyword against every word, without stopping at the first hit."""
+    return sum(1 for keyword in keywords for word in transcript_words
+               if fuzz.ratio(keyword, word) >= SIMILARITY_THRESHOLD)
+
+
+class Command(BaseCommand):
+    """
+    Measures the compiled banned keyword matcher (build time and matching
+    time) on synthetic transcripts with planted, partly misspelled keywords,
+    for each keyword list size. The former keywords x words fuzzy loop is
+    timed on a prefix of the transcript and extrapolated to its full length.
+
+    Usage:
+        python manage.py benchmark_keyword_matching
+        python manage.py benchmark_keyword_matching --keywords 100,1000,10000 --words 50000 --legacy-words 500
+    """
+    help = 'Benchmarks the compiled banned keyword matcher against the former fuzzy loop.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keywords', default='100,1000,10000',
+                            help='Comma separated keyword list sizes (default: 100,1000,10000).')
+        parser.add_argument('--words', type=int, default=50000, help='Words per transcript (default: 50000).')
+        parser.add_argument('--plants', type=int, default=50, help='Keywords planted per transcript (default: 50).')
+        parser.add_argument('--legacy-words', type=int, default=1000,
+                            help='Transcript words the former loop is timed on, 0 to skip (default: 1000).')
+        parser.add_argument('--seed', type=int, default=7, help='Random seed (default: 7).')
+
+    def handle(self, *args, **options):
+        for count in [int(s) for s in options['keywords'].split(',') if s.strip()]:
+            rng = random.Random(options['seed'])
+            keywords = _keywords(count, rng)
+            transcript = _transcript(options['words'], keywords, options['plants'], rng)
+
+            started = time.perf_counter()
+            matcher = KeywordMatcher(keywords)
+            build_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            hits = matcher.find_all(transcript)
+            match_seconds = time.perf_counter() - started
+            exact = sum(1 for hit in hits if hit['exact'])
+
+            self.stdout.write(self.style.SUCCESS(
+                f"{count:>6} keywords x {options['words']} words | build {build_seconds:.2f}s, "
+                f"match {match_seconds:.2f}s: {len(hits)} hits ({exact} exact)"
+            ))
+
+            if options['legacy_words']:
+                words = [token for token, _start, _end in tokenize(transcript)][:options['legacy_words']]
+                started = time.perf_counter()
+                _legacy_hits(words, keywords)
+                legacy_seconds = time.perf_counter() - started
+                projected = legacy_seconds * options['words'] / len(words)
+                self.stdout.write(
+                    f"{'':>6}   former loop: {legacy_seconds:.2f}s for {len(words)} words, "
+                    f"~{projected:.0f}s projected for {options['words']} words"
+                )
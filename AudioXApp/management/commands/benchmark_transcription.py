@@ -0,0 +1,63 @@
+# AudioXApp/management/commands/benchmark_transcription.py
+
+import math
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...services.transcription.backends import StubTranscriptionBackend
+from ...services.transcription.engine import transcribe_file
+
+# --- Benchmark Transcription Command ---
+
+
+class Command(BaseCommand):
+    """
+    Measures wall time of the chunked transcription engine against the
+    offline stub backend (fixed latency per request plus latency per second
+    of audio) for every combination of window length and concurrency, and
+    checks that the stitched transcript has every word exactly once.
+
+    No audio is decoded: the stub backend makes up the words, so only the
+    windowing, the thread pool and the stitching are measured.
+
+    Usage:
+        python manage.py benchmark_transcription
+        python manage.py benchmark_transcription --minutes 90 --windows 30,55 --overlap 5 --concurrency 1,4,8
+    """
+    help = 'Benchmarks chunked, concurrent transcription against an offline stub backend.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--minutes', type=float, default=30, help='Length of the fake chapter (default: 30).')
+        parser.add_argument('--windows', default='30,55',
+                            help='Comma separated window lengths in seconds (default: 30,55).')
+        parser.add_argument('--overlap', type=float, default=5, help='Window overlap in seconds (default: 5).')
+        parser.add_argument('--concurrency', default='1,2,4,8',
+                            help='Comma separated concurrency limits (default: 1,2,4,8).')
+        parser.add_argument('--base-latency', type=float, default=0.2,
+                            help='Stub latency per request in seconds (default: 0.2).')
+        parser.add_argument('--ms-per-audio-second', type=float, default=5,
+                            help='Stub latency per second of audio in milliseconds (default: 5).')
+
+    def handle(self, *args, **options):
+        duration = options['minutes'] * 60
+        window_lengths = [float(s) for s in options['windows'].split(',') if s.strip()]
+        concurrency_levels = [int(s) for s in options['concurrency'].split(',') if s.strip()]
+        if any(window <= options['overlap'] for window in window_lengths):
+            raise CommandError("Every window must be longer than the overlap.")
+        expected = ' '.join(f'word{second}' for second in range(math.ceil(duration)))
+
+        for window_seconds in window_lengths:
+            for concurrency in concurrency_levels:
+                backend = StubTranscriptionBackend(options['base_latency'], options['ms_per_audio_second'] / 1000)
+                started = time.perf_counter()
+                result = transcribe_file('benchmark.mp3', backend=backend, duration=duration,
+                                         window_seconds=window_seconds, overlap_seconds=options['overlap'],
+                                         concurrency=concurrency, retries=0)
+                seconds = time.perf_counter() - started
+                status = 'ok' if result['transcript'] == expected else 'MISMATCH'
+                style = self.style.SUCCESS if status == 'ok' else self.style.ERROR
+                self.stdout.write(style(
+                    f"window {window_seconds:>4.0f}s | concurrency {concurrency:>2}: {seconds:.2f}s "
+                    f"for {len(result['segments'])} windows ({duration / 60:.0f} min of audio, stitching {status})"
+                ))
@@ -0,0 +1,98 @@
+# AudioXApp/management/commands/benchmark_tts_synthesis.py
+
+import asyncio
+import io
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...services.tts.engines import SILENT_MP3_FRAME
+from ...services.tts.segmenting import split_text
+from ...services.tts.synthesizer import synthesize_segments
+
+# --- Benchmark TTS Synthesis Command ---
+
+WORDS = [
+    'the', 'river', 'ran', 'quietly', 'past', 'old', 'village', 'where', 'children', 'played',
+    'under', 'tall', 'trees', 'and', 'evening', 'light', 'fell', 'across', 'fields', 'of', 'wheat',
+]
+
+
+class FakeVoiceBackend:
+    """A TTS engine whose latency grows with the text, like a remote voice service."""
+
+    def __init__(self, base_latency, seconds_per_char, failure_rate=0.0, seed=7):
+        self.base_latency = base_latency
+        self.seconds_per_char = seconds_per_char
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+
+    async def synthesize(self, text, voice_id):
+        await asyncio.sleep(self.base_latency + self.seconds_per_char * len(text))
+        if self.rng.random() < self.failure_rate:
+            raise ConnectionError("fake voice backend dropped the request")
+        return SILENT_MP3_FRAME * (len(text) // 4 + 1)
+
+
+def _synthetic_text(chars, rng):
+    sentences = []
+    length = 0
+    while length < chars:
+        sentence = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(6, 18))).capitalize() + '.'
+        sentences.append(sentence)
+        length += len(sentence) + 1
+    # A paragraph break every few sentences
+    return '\n\n'.join(' '.join(sentences[i:i + 5]) for i in range(0, len(sentences), 5))
+
+
+class Command(BaseCommand):
+    """
+    Measures wall time of the segmenting synthesizer against a fake voice
+    backend (fixed latency per request plus latency per character) for every
+    combination of segment size and concurrency.
+
+    Usage:
+        python manage.py benchmark_tts_synthesis
+        python manage.py benchmark_tts_synthesis --chars 60000 --chunk-sizes 1000,3000 --concurrency 1,4,8
+    """
+    help = 'Benchmarks concurrent segment TTS synthesis against a fake voice backend.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chars', type=int, default=30000, help='Length of the synthetic text (default: 30000).')
+        parser.add_argument('--chunk-sizes', default='500,1500,3000',
+                            help='Comma separated maximum segment sizes in characters (default: 500,1500,3000).')
+        parser.add_argument('--concurrency', default='1,2,4,8',
+                            help='Comma separated concurrency limits (default: 1,2,4,8).')
+        parser.add_argument('--base-latency', type=float, default=0.2,
+                            help='Fake backend latency per request in seconds (default: 0.2).')
+        parser.add_argument('--ms-per-char', type=float, default=0.05,
+                            help='Fake backend latency per character in milliseconds (default: 0.05).')
+        parser.add_argument('--failure-rate', type=float, default=0.0,
+                            help='Share of fake requests that fail and get retried (default: 0).')
+        parser.add_argument('--seed', type=int, default=7, help='Random seed (default: 7).')
+
+    def handle(self, *args, **options):
+        text = _synthetic_text(options['chars'], random.Random(options['seed']))
+        chunk_sizes = [int(s) for s in options['chunk_sizes'].split(',') if s.strip()]
+        concurrency_levels = [int(s) for s in options['concurrency'].split(',') if s.strip()]
+
+        for chunk_size in chunk_sizes:
+            segments = split_text(text, chunk_size)
+            serial_seconds = None
+            for concurrency in concurrency_levels:
+                engine = FakeVoiceBackend(options['base_latency'], options['ms_per_char'] / 1000,
+                                          options['failure_rate'], options['seed'])
+                output = io.BytesIO()
+                started = time.perf_counter()
+                asyncio.run(synthesize_segments(engine, segments, 'bench-voice', output,
+                                                concurrency=concurrency, backoff=0.05, use_cache=False))
+                seconds = time.perf_counter() - started
+                serial_seconds = serial_seconds or seconds
+
+                self.stdout.write(self.style.SUCCESS(
+                    f"{len(text)} chars | segments of <= {chunk_size} chars ({len(segments)}) | "
+                    f"concurrency {concurrency}: {seconds:.2f}s "
+                    f"(x{serial_seconds / seconds:.1f} vs concurrency {concurrency_levels[0]}, "
+                    f"{output.tell() / 1024:.0f} KiB)"
+                ))
@@ -2,6 +2,7 @@
 
 from django.core.management.base import BaseCommand
 from django.core.cache import cache
+from ...views.content_views import CACHE_KEY, CATALOG_META_CACHE_KEY
 
 # --- Clear Cache Management Command ---
 
@@ -28,7 +29,7 @@ class Command(BaseCommand):
 
     def handle(self, *args, **options):
         """The main logic of the command."""
-        cache_key = 'librivox_archive_audiobooks_data_v6'
+        cache_key = CACHE_KEY
 
         if options['all']:
             self.stdout.write(self.style.NOTICE('Attempting to clear the entire cache...'))
@@ -41,6 +42,7 @@ class Command(BaseCommand):
             self.stdout.write(self.style.NOTICE(f"Attempting to delete cache key '{cache_key}'..."))
             try:
                 was_found_and_deleted = cache.delete(cache_key)
+                cache.delete(CATALOG_META_CACHE_KEY)
                 if was_found_and_deleted:
                     self.stdout.write(self.style.SUCCESS(f"Successfully deleted cache key '{cache_key}'."))
                 else:
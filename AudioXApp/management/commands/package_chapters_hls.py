@@ -0,0 +1,42 @@
+# AudioXApp/management/commands/package_chapters_hls.py
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from ...models import Chapter
+from ...tasks import package_chapter_hls
+
+# --- Package Chapters for HLS Command ---
+
+
+class Command(BaseCommand):
+    """
+    Queues HLS packaging for approved chapters with local audio that have no
+    package yet (chapters approved before packaging existed, or whose
+    packaging failed).
+
+    Usage:
+        python manage.py package_chapters_hls
+        python manage.py package_chapters_hls --audiobook my-audiobook-slug --all
+    """
+    help = 'Queues HLS packaging for approved local chapters without a package.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--audiobook', help='Only the chapters of the audiobook with this slug.')
+        parser.add_argument('--all', action='store_true',
+                            help='Also re-queue chapters that already have a package.')
+
+    def handle(self, *args, **options):
+        chapters = Chapter.objects.filter(
+            moderation_status=Chapter.ModerationStatusChoices.APPROVED,
+            audio_status=Chapter.AudioStatusChoices.READY,
+        ).filter(Q(external_audio_url__isnull=True) | Q(external_audio_url='')).exclude(audio_file='').exclude(audio_file__isnull=True)
+        if options['audiobook']:
+            chapters = chapters.filter(audiobook__slug=options['audiobook'])
+        if not options['all']:
+            chapters = chapters.filter(hls_package='')
+
+        chapter_ids = list(chapters.values_list('chapter_id', flat=True))
+        for chapter_id in chapter_ids:
+            package_chapter_hls.delay(chapter_id)
+        self.stdout.write(self.style.SUCCESS(f"Queued HLS packaging for {len(chapter_ids)} chapters."))
@@ -3,31 +3,53 @@
 import time
 from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
-from ...views.content_views import fetch_audiobooks_data
+from ...views.content_views import (
+    finish_catalog_refresh, ingest_catalog_snapshot, rebuild_audiobooks_cache, start_catalog_refresh,
+)
 
 # --- Populate Audiobook Cache Command ---
 
 class Command(BaseCommand):
     """
-    Fetches audiobook data from LibriVox and Archive.org and populates the cache.
-    
+    Fetches audiobook data from LibriVox and Archive.org, populates the cache
+    and upserts the harvested books and chapters into the database.
+
     This command is designed to be run as a scheduled task (e.g., a cron job)
     to keep the external audiobook data fresh without impacting user request times.
-    
+
     Usage:
         python manage.py populate_audiobook_cache
+        python manage.py populate_audiobook_cache --incremental
     """
     help = 'Fetches audiobook data from external sources and populates the cache.'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--incremental', action='store_true',
+            help='Send conditional requests and only re-parse feeds and items that changed since the last run.'
+        )
+
     def handle(self, *args, **options):
         """The main logic of the command."""
-        self.stdout.write(self.style.NOTICE('Starting audiobook cache population...'))
-        
+        incremental = options['incremental']
+        mode = 'incremental' if incremental else 'full'
+        # Requests rebuilding a stale snapshot in the background hold the same lock
+        lock_token = start_catalog_refresh()
+        if lock_token is None:
+            self.stdout.write(self.style.WARNING(
+                'An external catalog refresh is already running or has just failed; not starting another.'
+            ))
+            return
+
+        self.stdout.write(self.style.NOTICE(f'Starting {mode} audiobook cache population...'))
+
         start_time = time.time()
+        succeeded = False
 
         try:
             # This function handles its own caching logic and logging
-            fetched_data = fetch_audiobooks_data()
+            fetched_data, harvest_report = rebuild_audiobooks_cache(incremental=incremental)
+            succeeded = fetched_data is not None
 
             end_time = time.time()
             duration = end_time - start_time
@@ -36,7 +58,7 @@ class Command(BaseCommand):
                 librivox_count = len(fetched_data.get("librivox_audiobooks", []))
                 archive_genre_count = sum(len(books) for books in fetched_data.get("archive_genre_audiobooks", {}).values())
                 archive_lang_count = sum(len(books) for books in fetched_data.get("archive_language_audiobooks", {}).values())
-                
+
                 self.stdout.write(self.style.SUCCESS(
                     f'Successfully populated audiobook cache in {duration:.2f} seconds. '
                     f'LibriVox: {librivox_count}, Archive Genres: {archive_genre_count}, Archive Languages: {archive_lang_count} items.'
@@ -46,9 +68,29 @@ class Command(BaseCommand):
                     f'Audiobook cache population completed in {duration:.2f} seconds, but no data was fetched. Check logs for details.'
                 ))
 
+            totals = harvest_report.outcome_totals()
+            self.stdout.write(
+                f"Items fetched: {totals['fetched']}, revalidated: {totals['revalidated']}, "
+                f"skipped: {totals['skipped']}, failed: {totals['failed']}"
+            )
+            self.stdout.write('Per-source timings:')
+            for line in harvest_report.summary_lines():
+                self.stdout.write(f'  {line}')
+
+            if fetched_data:
+                ingest_report = ingest_catalog_snapshot(fetched_data)
+                for table, counts in ingest_report.items():
+                    self.stdout.write(
+                        f"{table.capitalize()} inserted: {counts['inserted']}, updated: {counts['updated']}, "
+                        f"unchanged: {counts['unchanged']}"
+                        + (f", skipped (creator slugs): {counts['skipped']}" if 'skipped' in counts else '')
+                    )
+
         except Exception as e:
             end_time = time.time()
             duration = end_time - start_time
             self.stderr.write(self.style.ERROR(f'An error occurred during cache population after {duration:.2f} seconds: {e}'))
+        finally:
+            finish_catalog_refresh(lock_token, succeeded)
 
-        self.stdout.write(self.style.NOTICE('Cache population process finished.'))
\ No newline at end of file
+        self.stdout.write(self.style.NOTICE('Cache population process finished.'))
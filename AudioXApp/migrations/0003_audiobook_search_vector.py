@@ -0,0 +1,69 @@
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.operations import TrigramExtension
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+SEARCH_INDEXES = [
+    GinIndex(fields=['search_vector'], name='audiobook_search_vector_gin'),
+    GinIndex(fields=['title'], opclasses=['gin_trgm_ops'], name='audiobook_title_trgm_gin'),
+]
+
+
+def create_search_indexes(apps, schema_editor):
+    # GIN indexes and tsvector columns only exist on PostgreSQL.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Audiobook = apps.get_model('AudioXApp', 'Audiobook')
+    for index in SEARCH_INDEXES:
+        schema_editor.add_index(Audiobook, index)
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Audiobook = apps.get_model('AudioXApp', 'Audiobook')
+    for index in SEARCH_INDEXES:
+        schema_editor.remove_index(Audiobook, index)
+
+
+def populate_search_vectors(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Audiobook = apps.get_model('AudioXApp', 'Audiobook')
+    Creator = apps.get_model('AudioXApp', 'Creator')
+    config = getattr(settings, 'AUDIOBOOK_SEARCH_CONFIG', 'simple')
+    creator_name = Subquery(Creator.objects.filter(pk=OuterRef('creator_id')).values('creator_name')[:1])
+    Audiobook.objects.update(search_vector=(
+        SearchVector('title', weight='A', config=config)
+        + SearchVector('author', weight='B', config=config)
+        + SearchVector(creator_name, weight='B', config=config)
+        + SearchVector('genre', weight='C', config=config)
+        + SearchVector('description', weight='D', config=config)
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AudioXApp', '0002_enhanced_chat_features'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='audiobook',
+            name='search_vector',
+            field=SearchVectorField(blank=True, editable=False, help_text='Weighted full-text vector of title, author, creator, genre and description.', null=True),
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(model_name='audiobook', index=index) for index in SEARCH_INDEXES
+            ],
+            database_operations=[
+                migrations.RunPython(create_search_indexes, drop_search_indexes),
+            ],
+        ),
+        migrations.RunPython(populate_search_vectors, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('AudioXApp', '0003_audiobook_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentConversionJob',
+            fields=[
+                ('job_id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('source_file', models.FileField(help_text='Uploaded document to convert', upload_to='tts_jobs/sources/')),
+                ('original_filename', models.CharField(help_text='Name of the uploaded document', max_length=255)),
+                ('content_type', models.CharField(help_text='MIME type of the uploaded document', max_length=150)),
+                ('language', models.CharField(help_text='Narration language', max_length=50)),
+                ('narrator_gender', models.CharField(blank=True, help_text='Preferred narrator voice gender', max_length=10)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('extracting', 'Extracting Text'), ('synthesizing', 'Synthesizing Audio'), ('completed', 'Completed'), ('failed', 'Failed')], db_index=True, default='pending', max_length=20)),
+                ('segments_total', models.PositiveIntegerField(default=0, help_text='Number of text segments to synthesize')),
+                ('segments_done', models.PositiveIntegerField(default=0, help_text='Number of text segments synthesized so far')),
+                ('audio_file', models.FileField(blank=True, help_text='Generated MP3', null=True, upload_to='tts_jobs/audio/')),
+                ('error_message', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='document_conversion_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Document Conversion Job',
+                'verbose_name_plural': 'Document Conversion Jobs',
+                'db_table': 'DOCUMENT_CONVERSION_JOBS',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AudioXApp', '0004_documentconversionjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chapter',
+            name='audio_status',
+            field=models.CharField(choices=[('ready', 'Ready'), ('pending', 'Waiting for Audio'), ('generating', 'Generating Audio'), ('failed', 'Audio Generation Failed')], db_index=True, default='ready', help_text='Whether the audio file exists or is still being generated', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='chapter',
+            name='audio_progress',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Percent of the TTS audio generated so far'),
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AudioXApp', '0005_chapter_audio_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chapter',
+            name='hls_package',
+            field=models.CharField(blank=True, default='', help_text='HLS package of the audio file (directory under MEDIA_ROOT/hls/), once packaged', max_length=64),
+        ),
+    ]
@@ -0,0 +1,34 @@
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AudioXApp', '0006_chapter_hls_package'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChapterRendition',
+            fields=[
+                ('rendition_id', models.AutoField(primary_key=True, serialize=False)),
+                ('profile', models.CharField(choices=[('low', 'Low Bitrate'), ('medium', 'Medium Bitrate')], help_text='Ladder profile of this rendition', max_length=20)),
+                ('audio_file', models.FileField(help_text='Encoded audio file', upload_to='chapters_audio/renditions/')),
+                ('codec', models.CharField(help_text='Audio codec of the rendition', max_length=20)),
+                ('bitrate_kbps', models.PositiveIntegerField(help_text='Target bitrate in kbit/s')),
+                ('size_bytes', models.PositiveBigIntegerField(help_text='File size in bytes')),
+                ('integrated_lufs', models.FloatField(blank=True, help_text='Integrated loudness of the upload before normalization (LUFS)', null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('chapter', models.ForeignKey(help_text='Chapter whose audio this rendition encodes', on_delete=django.db.models.deletion.CASCADE, related_name='renditions', to='AudioXApp.chapter')),
+            ],
+            options={
+                'verbose_name': 'Chapter Rendition',
+                'verbose_name_plural': 'Chapter Renditions',
+                'db_table': 'CHAPTER_RENDITIONS',
+                'ordering': ['chapter', 'bitrate_kbps'],
+                'unique_together': {('chapter', 'profile')},
+            },
+        ),
+    ]
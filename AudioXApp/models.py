@@ -28,6 +28,8 @@ from decimal import Decimal, InvalidOperation
 from urllib.parse import quote
 
 from django.db import models, transaction
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.contrib.auth.hashers import make_password, check_password
 from django.core.exceptions import ValidationError
@@ -42,6 +44,7 @@ from django.db.models import Avg, Sum, F, Prefetch, Q, Max, Value, IntegerField
 from django.db.models.functions import Cast, Substr, Replace
 
 from .audio_utils import get_audio_duration
+from .services import hls_packaging, stream_tokens
 
 # ============================================================================
 # LOGGING CONFIGURATION
@@ -2045,11 +2048,26 @@ class Audiobook(models.Model):
         help_text=_("Reason for the takedown, provided by the admin.")
     )
 
+    # ============================================================================
+    # SEARCH
+    # ============================================================================
+
+    search_vector = SearchVectorField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text=_("Weighted full-text vector of title, author, creator, genre and description.")
+    )
+
     class Meta:
         db_table = "AUDIOBOOKS"
         ordering = ['-created_at']
         verbose_name = _("Audiobook")
         verbose_name_plural = _("Audiobooks")
+        indexes = [
+            GinIndex(fields=['search_vector'], name='audiobook_search_vector_gin'),
+            GinIndex(fields=['title'], opclasses=['gin_trgm_ops'], name='audiobook_title_trgm_gin'),
+        ]
 
     def save(self, *args, **kwargs):
         """Auto-generate slug and handle status transitions."""
@@ -2157,6 +2175,13 @@ class Chapter(models.Model):
         NEEDS_REVIEW = 'needs_review', _('Needs Manual Review')
         REJECTED = 'rejected', _('Rejected')
 
+    class AudioStatusChoices(models.TextChoices):
+        """Whether the chapter's audio exists yet (TTS chapters are synthesized in the background)."""
+        READY = 'ready', _('Ready')
+        PENDING = 'pending', _('Waiting for Audio')
+        GENERATING = 'generating', _('Generating Audio')
+        FAILED = 'failed', _('Audio Generation Failed')
+
     # ============================================================================
     # BASIC CHAPTER INFORMATION
     # ============================================================================
@@ -2262,6 +2287,23 @@ class Chapter(models.Model):
         null=True,
         help_text=_("Original document filename if converted from text")
     )
+    audio_status = models.CharField(
+        max_length=20,
+        choices=AudioStatusChoices.choices,
+        default=AudioStatusChoices.READY,
+        db_index=True,
+        help_text=_("Whether the audio file exists or is still being generated")
+    )
+    audio_progress = models.PositiveSmallIntegerField(
+        default=0,
+        help_text=_("Percent of the TTS audio generated so far")
+    )
+    hls_package = models.CharField(
+        max_length=64,
+        blank=True,
+        default='',
+        help_text=_("HLS package of the audio file (directory under MEDIA_ROOT/hls/), once packaged")
+    )
     
     # ============================================================================
     # ADDITIONAL FLAGS
@@ -2308,13 +2350,21 @@ class Chapter(models.Model):
     def save(self, *args, **kwargs):
         """Auto-calculate duration and file size."""
         is_new_file = False
+        stale_hls_package = ''
+        audio_replaced = False
+        was_approved = False
         if not self.pk:
             is_new_file = True
         else:
             try:
                 old = Chapter.objects.get(pk=self.pk)
+                was_approved = old.moderation_status == self.ModerationStatusChoices.APPROVED
                 if old.audio_file != self.audio_file:
                     is_new_file = True
+                    # The HLS package and renditions belong to the replaced audio
+                    stale_hls_package = old.hls_package
+                    self.hls_package = ''
+                    audio_replaced = True
             except Chapter.DoesNotExist:
                 is_new_file = True
 
@@ -2323,6 +2373,18 @@ class Chapter(models.Model):
 
         super().save(*args, **kwargs)
 
+        if stale_hls_package:
+            hls_packaging.remove_package(stale_hls_package)
+        if audio_replaced:
+            self.renditions.all().delete()
+
+        # Approved local audio without a package (newly approved, or its audio replaced) gets packaged for HLS
+        if (self.moderation_status == self.ModerationStatusChoices.APPROVED and self.audio_file
+                and not self.external_audio_url and (is_new_file or not was_approved)):
+            # Imported here because tasks imports this module
+            from .tasks import queue_chapter_packaging
+            queue_chapter_packaging([self.pk])
+
         # Calculate duration after saving
         if is_new_file and self.audio_file and self.duration_seconds is None:
             try:
@@ -2350,26 +2412,120 @@ class Chapter(models.Model):
                 return "--:--"
         return "--:--"
 
-    def get_streaming_url(self):
-        """Get streaming URL for this chapter."""
+    def get_rendition(self, profile):
+        """Get this chapter's rendition for ``profile`` (uses prefetched renditions), or None."""
+        for rendition in self.renditions.all():
+            if rendition.profile == profile:
+                return rendition
+        return None
+
+    def get_streaming_source(self, profile=None):
+        """
+        Get the audio URL stream_audio serves this chapter from (external or local
+        media URL): the rendition for ``profile`` if there is one, else the upload.
+        """
         if self.external_audio_url:
-            return reverse('AudioXApp:stream_audio') + f'?url={quote(self.external_audio_url, safe="")}'
+            return self.external_audio_url
+        rendition = self.get_rendition(profile) if profile else None
+        if rendition is not None:
+            return rendition.audio_file.url
         elif self.audio_file and hasattr(self.audio_file, 'url'):
             try:
                 if default_storage.exists(self.audio_file.name):
-                    relative_url = self.audio_file.url
-                    return reverse('AudioXApp:stream_audio') + f'?url={quote(relative_url, safe="")}'
+                    return self.audio_file.url
                 else:
                     logger.warning(f"Local audio file missing for chapter {self.pk}: {self.audio_file.name}")
             except Exception as e:
                 logger.error(f"Error getting streaming URL for local chapter {self.pk}: {e}")
         return None
 
+    def get_streaming_url(self, stream_token=None, profile=None):
+        """Get streaming URL for this chapter (``profile`` rendition if any), carrying ``stream_token`` if given."""
+        source = self.get_streaming_source(profile)
+        if not source:
+            return None
+        url = reverse('AudioXApp:stream_audio') + f'?url={quote(source, safe="")}'
+        return f'{url}&{stream_tokens.QUERY_PARAM}={stream_token}' if stream_token else url
+
+    def get_hls_source(self):
+        """Get the source stream tokens are minted for to play this chapter's HLS package, if it has one."""
+        return hls_packaging.token_source(self.hls_package) if self.hls_package else None
+
+    def get_hls_url(self, stream_token):
+        """Get the master playlist URL of this chapter's HLS package (preferred by players that support HLS)."""
+        if not self.hls_package or not stream_token:
+            return None
+        return reverse('AudioXApp:stream_hls', args=[stream_token, self.hls_package, hls_packaging.MASTER_PLAYLIST])
+
     @property
     def frontend_id(self):
         """Get frontend-compatible ID."""
         return str(self.pk)
 
+class ChapterRendition(models.Model):
+    """
+    Loudness-normalized encoding of a chapter's uploaded audio at one bitrate
+    of the rendition ladder (see services/transcoding.py).
+    """
+
+    class ProfileChoices(models.TextChoices):
+        """Rendition ladder profiles."""
+        LOW = 'low', _('Low Bitrate')
+        MEDIUM = 'medium', _('Medium Bitrate')
+
+    rendition_id = models.AutoField(primary_key=True)
+    chapter = models.ForeignKey(
+        Chapter,
+        on_delete=models.CASCADE,
+        related_name="renditions",
+        help_text=_("Chapter whose audio this rendition encodes")
+    )
+    profile = models.CharField(
+        max_length=20,
+        choices=ProfileChoices.choices,
+        help_text=_("Ladder profile of this rendition")
+    )
+    audio_file = models.FileField(
+        upload_to="chapters_audio/renditions/",
+        help_text=_("Encoded audio file")
+    )
+    codec = models.CharField(
+        max_length=20,
+        help_text=_("Audio codec of the rendition")
+    )
+    bitrate_kbps = models.PositiveIntegerField(
+        help_text=_("Target bitrate in kbit/s")
+    )
+    size_bytes = models.PositiveBigIntegerField(
+        help_text=_("File size in bytes")
+    )
+    integrated_lufs = models.FloatField(
+        null=True,
+        blank=True,
+        help_text=_("Integrated loudness of the upload before normalization (LUFS)")
+    )
+    created_at = models.DateTimeField(
+        default=timezone.now,
+        editable=False
+    )
+
+    class Meta:
+        db_table = "CHAPTER_RENDITIONS"
+        ordering = ['chapter', 'bitrate_kbps']
+        unique_together = (('chapter', 'profile'),)
+        verbose_name = _("Chapter Rendition")
+        verbose_name_plural = _("Chapter Renditions")
+
+    def __str__(self):
+        return f"{self.chapter_id} {self.profile}: {self.codec} {self.bitrate_kbps}k ({self.size_bytes} bytes)"
+
+    @property
+    def bytes_saved(self):
+        """Bytes saved against the upload each time this rendition is served instead."""
+        if self.chapter.size_bytes is None:
+            return None
+        return self.chapter.size_bytes - self.size_bytes
+
 # ============================================================================
 # REVIEW AND RATING MODELS
 # ============================================================================
@@ -3564,6 +3720,116 @@ class ChapterUnlock(models.Model):
     def __str__(self):
         return f"{self.user.username} unlocked '{self.chapter.chapter_name}' for {self.coins_spent} coins"
 
+
+class DocumentConversionJob(models.Model):
+    """
+    Model for background document-to-audio conversions.
+
+    Tracks an uploaded document through text extraction and segmented
+    speech synthesis; the finished MP3 is stored under MEDIA_ROOT.
+    """
+
+    class StatusChoices(models.TextChoices):
+        PENDING = 'pending', _('Pending')
+        EXTRACTING = 'extracting', _('Extracting Text')
+        SYNTHESIZING = 'synthesizing', _('Synthesizing Audio')
+        COMPLETED = 'completed', _('Completed')
+        FAILED = 'failed', _('Failed')
+
+    job_id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='document_conversion_jobs'
+    )
+
+    # ============================================================================
+    # SOURCE DOCUMENT AND OPTIONS
+    # ============================================================================
+
+    source_file = models.FileField(
+        upload_to="tts_jobs/sources/",
+        help_text=_("Uploaded document to convert")
+    )
+    original_filename = models.CharField(
+        max_length=255,
+        help_text=_("Name of the uploaded document")
+    )
+    content_type = models.CharField(
+        max_length=150,
+        help_text=_("MIME type of the uploaded document")
+    )
+    language = models.CharField(
+        max_length=50,
+        help_text=_("Narration language")
+    )
+    narrator_gender = models.CharField(
+        max_length=10,
+        blank=True,
+        help_text=_("Preferred narrator voice gender")
+    )
+
+    # ============================================================================
+    # PROGRESS AND RESULT
+    # ============================================================================
+
+    status = models.CharField(
+        max_length=20,
+        choices=StatusChoices.choices,
+        default=StatusChoices.PENDING,
+        db_index=True
+    )
+    segments_total = models.PositiveIntegerField(
+        default=0,
+        help_text=_("Number of text segments to synthesize")
+    )
+    segments_done = models.PositiveIntegerField(
+        default=0,
+        help_text=_("Number of text segments synthesized so far")
+    )
+    audio_file = models.FileField(
+        upload_to="tts_jobs/audio/",
+        blank=True,
+        null=True,
+        help_text=_("Generated MP3")
+    )
+    error_message = models.TextField(
+        blank=True
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True
+    )
+    completed_at = models.DateTimeField(
+        null=True,
+        blank=True
+    )
+
+    class Meta:
+        db_table = "DOCUMENT_CONVERSION_JOBS"
+        ordering = ['-created_at']
+        verbose_name = _("Document Conversion Job")
+        verbose_name_plural = _("Document Conversion Jobs")
+
+    def __str__(self):
+        return f"{self.original_filename} for {self.user.username} ({self.get_status_display()})"
+
+    @property
+    def progress_percent(self):
+        """Share of segments synthesized, 0-100; None while synthesizing before extraction has ended."""
+        if self.status == self.StatusChoices.COMPLETED:
+            return 100
+        if not self.segments_total:
+            return None if self.status == self.StatusChoices.SYNTHESIZING else 0
+        return int(self.segments_done * 100 / self.segments_total)
+
 # ============================================================================
 # END OF MODELS
 # ============================================================================
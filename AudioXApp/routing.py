@@ -8,4 +8,8 @@ websocket_urlpatterns = [
         r'ws/chat/(?P<room_id>[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})/$', 
         consumer.ChatConsumer.as_asgi()
     ),
+    re_path(
+        r'ws/document-jobs/(?P<job_id>[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})/$',
+        consumer.DocumentConversionJobConsumer.as_asgi()
+    ),
 ]
\ No newline at end of file
@@ -0,0 +1,379 @@
+# AudioXApp/services/audio_chunk_cache.py
+
+"""
+On-disk cache of external chapter audio, in fixed-size aligned blocks.
+
+Each proxied URL gets a directory named after its SHA-256 holding
+``meta.json`` (size, type and validators of the origin file) and one file per
+cached block: block ``i`` holds bytes ``[i * BLOCK_BYTES, (i + 1) *
+BLOCK_BYTES)``. A Range request is answered block by block; cached blocks are
+read from disk and runs of missing blocks are fetched from the origin with a
+single Range request, relayed to the listener as they arrive and written to
+the cache once complete.
+
+Total size is capped at ``MAX_BYTES``: block files are touched when read, and
+the least recently used ones are deleted once the cache grows past the cap.
+Hit and byte counters are kept in the Django cache so every worker reports
+into the same totals.
+
+Origins that ignore Range requests are remembered as uncacheable and left to
+the plain proxy.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+
+import httpx
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from . import audio_proxy, disk_cache
+
+logger = logging.getLogger(__name__)
+
+ENABLED = getattr(settings, 'AUDIO_CHUNK_CACHE_ENABLED', True)
+CACHE_DIR = str(getattr(settings, 'AUDIO_CHUNK_CACHE_DIR', os.path.join(settings.BASE_DIR, 'audio_chunk_cache')))
+BLOCK_BYTES = getattr(settings, 'AUDIO_CHUNK_CACHE_BLOCK_BYTES', 1024 * 1024)
+MAX_BYTES = getattr(settings, 'AUDIO_CHUNK_CACHE_MAX_BYTES', 2 * 1024 ** 3)
+EVICTION_TARGET_RATIO = disk_cache.EVICTION_TARGET_RATIO
+
+METRICS_KEY_PREFIX = 'audio_chunk_cache_metrics'
+METRIC_NAMES = ('hits', 'misses', 'bytes_from_cache', 'bytes_from_origin')
+
+META_FILENAME = 'meta.json'
+CONTENT_RANGE_RE = re.compile(r'bytes (\d+)-(\d+)/(\d+)')
+
+
+class StaleEntry(Exception):
+    """The origin file no longer matches the cached entry (size or validators changed)."""
+
+
+# ==========================================
+# DISK LAYOUT
+# ==========================================
+
+def url_key(url):
+    return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+
+def _entry_dir(key):
+    return os.path.join(CACHE_DIR, key[:2], key)
+
+
+def _block_path(key, index):
+    return os.path.join(_entry_dir(key), f'{index}.blk')
+
+
+def block_count(size):
+    return (size + BLOCK_BYTES - 1) // BLOCK_BYTES
+
+
+def block_length(index, size):
+    return min(BLOCK_BYTES, size - index * BLOCK_BYTES)
+
+
+def load_meta(key):
+    try:
+        with open(os.path.join(_entry_dir(key), META_FILENAME), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_meta(key, meta):
+    disk_cache.write_atomic(os.path.join(_entry_dir(key), META_FILENAME), json.dumps(meta).encode('utf-8'))
+
+
+def purge_entry(key):
+    shutil.rmtree(_entry_dir(key), ignore_errors=True)
+
+
+def has_block(key, index):
+    return os.path.exists(_block_path(key, index))
+
+
+def read_block(key, index, start=0, stop=None):
+    """
+    Bytes ``[start, stop)`` of a cached block (offsets within the block), or
+    None on a miss. Counts the hit and refreshes the block's LRU position.
+    """
+    path = _block_path(key, index)
+    try:
+        with open(path, 'rb') as f:
+            f.seek(start)
+            data = f.read() if stop is None else f.read(stop - start)
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    record(hits=1, bytes_from_cache=len(data))
+    return data
+
+
+def write_block(key, index, data):
+    """Stores a block fetched from the origin, then evicts if the cache grew past its cap."""
+    disk_cache.write_atomic(_block_path(key, index), data)
+    record(misses=1, bytes_from_origin=len(data))
+    _eviction_trigger.note_written(len(data))
+
+
+# ==========================================
+# LRU EVICTION
+# ==========================================
+
+def evict(max_bytes=None):
+    """Deletes least recently used blocks until the cache is under ``EVICTION_TARGET_RATIO`` of its cap."""
+    max_bytes = MAX_BYTES if max_bytes is None else max_bytes
+    touched_dirs = disk_cache.evict(CACHE_DIR, max_bytes, suffix='.blk', target_ratio=EVICTION_TARGET_RATIO)
+    # Entries left without blocks only hold their meta.json
+    for entry_dir in touched_dirs:
+        if not any(name.endswith('.blk') for name in os.listdir(entry_dir)):
+            shutil.rmtree(entry_dir, ignore_errors=True)
+
+
+_eviction_trigger = disk_cache.EvictionTrigger(MAX_BYTES, evict)
+
+
+def disk_usage():
+    return disk_cache.disk_usage(CACHE_DIR)
+
+
+# ==========================================
+# METRICS
+# ==========================================
+
+_counters = disk_cache.Counters(METRICS_KEY_PREFIX, METRIC_NAMES)
+record = _counters.record
+
+
+def get_metrics():
+    metrics = _counters.get()
+    metrics['hit_ratio'] = disk_cache.ratio(metrics['hits'], metrics['hits'] + metrics['misses'])
+    metrics['byte_hit_ratio'] = disk_cache.ratio(
+        metrics['bytes_from_cache'], metrics['bytes_from_cache'] + metrics['bytes_from_origin']
+    )
+    metrics['disk_bytes'] = disk_usage()
+    metrics['max_bytes'] = MAX_BYTES
+    metrics['block_bytes'] = BLOCK_BYTES
+    return metrics
+
+
+# ==========================================
+# ORIGIN RESPONSES
+# ==========================================
+
+def _meta_from_probe(url, status_code, headers):
+    """Entry metadata from the response to the first block's Range request."""
+    match = CONTENT_RANGE_RE.match(headers.get('Content-Range', ''))
+    if status_code != 206 or not match or int(match.group(1)) != 0:
+        # The origin ignores ranges; streaming from it is left to the plain proxy
+        return {'url': url, 'cacheable': False}
+    return {
+        'url': url,
+        'cacheable': True,
+        'size': int(match.group(3)),
+        'content_type': headers.get('Content-Type', ''),
+        'etag': headers.get('ETag', ''),
+        'last_modified': headers.get('Last-Modified', ''),
+    }
+
+
+def _check_fill_response(meta, offset, status_code, headers):
+    match = CONTENT_RANGE_RE.match(headers.get('Content-Range', ''))
+    if (status_code != 206 or not match or int(match.group(1)) != offset
+            or int(match.group(3)) != meta['size']
+            or (meta['etag'] and headers.get('ETag', meta['etag']) != meta['etag'])):
+        raise StaleEntry(f"{meta['url']} answered {status_code} {headers.get('Content-Range')} for offset {offset}")
+
+
+def _range_header(meta, first_block, last_block):
+    start = first_block * BLOCK_BYTES
+    end = min((last_block + 1) * BLOCK_BYTES, meta['size']) - 1
+    return start, end, {'Range': f'bytes={start}-{end}'}
+
+
+def _missing_run(key, first_block, last_block):
+    """The last block of the run of uncached blocks starting at ``first_block``."""
+    run_end = first_block
+    while run_end < last_block and not has_block(key, run_end + 1):
+        run_end += 1
+    return run_end
+
+
+class _BlockAssembler:
+    """Cuts a contiguous byte stream starting at a block boundary into whole blocks."""
+
+    def __init__(self, first_block, last_block, size):
+        self.index = first_block
+        self.last_block = last_block
+        self.size = size
+        self.buffer = bytearray()
+
+    def feed(self, data):
+        self.buffer += data
+        completed = []
+        while self.index <= self.last_block:
+            length = block_length(self.index, self.size)
+            if len(self.buffer) < length:
+                break
+            completed.append((self.index, bytes(self.buffer[:length])))
+            del self.buffer[:length]
+            self.index += 1
+        return completed
+
+    @property
+    def finished(self):
+        return self.index > self.last_block
+
+
+# ==========================================
+# ASYNC PATH (stream_audio)
+# ==========================================
+
+async def get_entry(url):
+    """
+    Cached metadata for ``url``, probing the origin with a Range request for
+    the first block when the URL is new (the block is cached as a side
+    effect). Returns None when the origin can't be cached.
+    """
+    key = url_key(url)
+    meta = await sync_to_async(load_meta, thread_sensitive=False)(key)
+    if meta is None:
+        client = audio_proxy.get_client()
+        request = client.build_request('GET', url, headers={'Range': f'bytes=0-{BLOCK_BYTES - 1}'})
+        response = await client.send(request, stream=True)
+        try:
+            if response.status_code >= 400:
+                return None
+            meta = _meta_from_probe(url, response.status_code, response.headers)
+            if meta['cacheable']:
+                data = await response.aread()
+                if len(data) != block_length(0, meta['size']):
+                    return None
+                await sync_to_async(write_block, thread_sensitive=False)(key, 0, data)
+        finally:
+            await response.aclose()
+        await sync_to_async(_save_meta, thread_sensitive=False)(key, meta)
+    return meta if meta.get('cacheable') else None
+
+
+async def iter_range(meta, start, end):
+    """
+    Yields bytes ``start..end`` (inclusive) of a cached URL, reading cached
+    blocks from disk and filling runs of missing blocks from the origin.
+    """
+    url = meta['url']
+    key = url_key(url)
+    block = start // BLOCK_BYTES
+    last_block = end // BLOCK_BYTES
+    sent = 0
+    try:
+        while block <= last_block:
+            block_start = block * BLOCK_BYTES
+            data = await sync_to_async(read_block, thread_sensitive=False)(
+                key, block, max(start - block_start, 0), min(end + 1 - block_start, BLOCK_BYTES)
+            )
+            if data is not None:
+                sent += len(data)
+                yield data
+                block += 1
+                continue
+
+            run_end = await sync_to_async(_missing_run, thread_sensitive=False)(key, block, last_block)
+            offset, _run_last_byte, headers = _range_header(meta, block, run_end)
+            client = audio_proxy.get_client()
+            response = await client.send(client.build_request('GET', url, headers=headers), stream=True)
+            try:
+                _check_fill_response(meta, offset, response.status_code, response.headers)
+                assembler = _BlockAssembler(block, run_end, meta['size'])
+                async for chunk in audio_proxy.adaptive_chunks(response.aiter_raw()):
+                    # Relay the requested part of each chunk right away, store whole blocks
+                    low, high = max(start, offset), min(end + 1, offset + len(chunk))
+                    if low < high:
+                        sent += high - low
+                        yield chunk[low - offset:high - offset]
+                    offset += len(chunk)
+                    for index, block_data in assembler.feed(chunk):
+                        await sync_to_async(write_block, thread_sensitive=False)(key, index, block_data)
+            finally:
+                await response.aclose()
+            if not assembler.finished:
+                logger.warning(f"Origin ended early filling blocks {block}-{run_end} of {url}")
+                return
+            block = run_end + 1
+    except StaleEntry as e:
+        logger.warning(f"Audio chunk cache entry is stale, purging: {e}")
+        await sync_to_async(purge_entry, thread_sensitive=False)(key)
+    except httpx.HTTPError as e:
+        logger.warning(f"Filling audio chunk cache from {url} failed after {sent} bytes: {e}")
+
+
+# ==========================================
+# SYNC PATH (clip generation)
+# ==========================================
+
+def _sync_session():
+    session = requests.Session()
+    session.headers.update({'Accept-Encoding': 'identity'})
+    return session
+
+
+def download_to_file(url, destination_path, timeout=60):
+    """
+    Writes the whole file at ``url`` to ``destination_path``, taking cached
+    blocks from disk and caching the ones fetched from the origin. Origins
+    that ignore ranges are downloaded in one plain request without caching.
+    Raises ``requests.RequestException`` on origin errors.
+    """
+    key = url_key(url)
+    with _sync_session() as session:
+        meta = load_meta(key)
+        if meta is None:
+            with session.get(url, headers={'Range': f'bytes=0-{BLOCK_BYTES - 1}'}, stream=True, timeout=timeout) as r:
+                r.raise_for_status()
+                meta = _meta_from_probe(url, r.status_code, r.headers)
+                if meta['cacheable']:
+                    data = r.raw.read()
+                    if len(data) == block_length(0, meta['size']):
+                        write_block(key, 0, data)
+            _save_meta(key, meta)
+
+        if not meta.get('cacheable'):
+            with session.get(url, stream=True, timeout=timeout) as r:
+                r.raise_for_status()
+                with open(destination_path, 'wb') as f:
+                    for chunk in r.iter_content(chunk_size=8192):
+                        f.write(chunk)
+            return
+
+        last_block = block_count(meta['size']) - 1
+        with open(destination_path, 'wb') as f:
+            block = 0
+            while block <= last_block:
+                data = read_block(key, block)
+                if data is not None:
+                    f.write(data)
+                    block += 1
+                    continue
+
+                run_end = _missing_run(key, block, last_block)
+                offset, _run_last_byte, headers = _range_header(meta, block, run_end)
+                with session.get(url, headers=headers, stream=True, timeout=timeout) as r:
+                    r.raise_for_status()
+                    try:
+                        _check_fill_response(meta, offset, r.status_code, r.headers)
+                    except StaleEntry:
+                        purge_entry(key)
+                        raise
+                    assembler = _BlockAssembler(block, run_end, meta['size'])
+                    for chunk in r.raw.stream(audio_proxy.INITIAL_CHUNK_BYTES, decode_content=False):
+                        f.write(chunk)
+                        for index, block_data in assembler.feed(chunk):
+                            write_block(key, index, block_data)
+                if not assembler.finished:
+                    raise requests.exceptions.ChunkedEncodingError(f"Origin ended early filling blocks {block}-{run_end} of {url}")
+                block = run_end + 1
@@ -0,0 +1,102 @@
+# AudioXApp/services/audio_proxy.py
+
+"""
+Async upstream side of the audio streaming proxy.
+
+One ``httpx.AsyncClient`` is kept per event loop (under Daphne that is one per
+worker process), so connections to archive.org and LibriVox are pooled and
+kept alive across listeners instead of being opened per request. Response
+bodies are re-chunked adaptively: small first chunks so playback starts
+quickly, then doubling up to a cap so long streams cost few sends.
+
+Streams are closed in ``finally`` blocks; when a listener disconnects, the
+ASGI server cancels the response task and the upstream connection is
+released back to the pool.
+"""
+
+import asyncio
+import logging
+import weakref
+
+import httpx
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+MAX_CONNECTIONS = getattr(settings, 'AUDIO_PROXY_MAX_CONNECTIONS', 500)
+MAX_KEEPALIVE_CONNECTIONS = getattr(settings, 'AUDIO_PROXY_MAX_KEEPALIVE_CONNECTIONS', 100)
+KEEPALIVE_EXPIRY_SECONDS = getattr(settings, 'AUDIO_PROXY_KEEPALIVE_EXPIRY_SECONDS', 60)
+INITIAL_CHUNK_BYTES = getattr(settings, 'AUDIO_PROXY_INITIAL_CHUNK_BYTES', 64 * 1024)
+MAX_CHUNK_BYTES = getattr(settings, 'AUDIO_PROXY_MAX_CHUNK_BYTES', 1024 * 1024)
+
+# Headers copied from the listener's request to the upstream request and back.
+FORWARDED_REQUEST_HEADERS = ('Range', 'If-Range', 'If-None-Match', 'If-Modified-Since')
+FORWARDED_RESPONSE_HEADERS = ('Content-Range', 'Content-Length', 'ETag', 'Last-Modified')
+
+_clients = weakref.WeakKeyDictionary()
+
+
+def get_client():
+    """The pooled client of the running event loop (created on first use)."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        user_agent_host = settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else "audiox.com"
+        client = httpx.AsyncClient(
+            headers={
+                'User-Agent': f'AudioXApp Audio Proxy/1.0 (+http://{user_agent_host})',
+                # Bodies are relayed raw, so byte ranges and Content-Length stay those of the file
+                'Accept-Encoding': 'identity',
+            },
+            timeout=httpx.Timeout(60.0, connect=10.0, pool=10.0),
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS,
+            ),
+            follow_redirects=True,
+        )
+        _clients[loop] = client
+    return client
+
+
+async def open_upstream(url, request_headers):
+    """
+    Sends a streamed GET for ``url`` with the listener's Range and conditional
+    headers. The caller owns the returned response and must ``aclose()`` it
+    (``iter_upstream`` does so when it finishes or is cancelled).
+    """
+    headers = {name: request_headers[name] for name in FORWARDED_REQUEST_HEADERS if request_headers.get(name)}
+    client = get_client()
+    request = client.build_request('GET', url, headers=headers)
+    return await client.send(request, stream=True)
+
+
+async def adaptive_chunks(byte_iterator, initial_size=INITIAL_CHUNK_BYTES, max_size=MAX_CHUNK_BYTES):
+    """Regroups a byte stream into chunks of ``initial_size`` doubling up to ``max_size``."""
+    target = initial_size
+    buffer = bytearray()
+    async for data in byte_iterator:
+        buffer += data
+        while len(buffer) >= target:
+            yield bytes(buffer[:target])
+            del buffer[:target]
+            target = min(target * 2, max_size)
+    if buffer:
+        yield bytes(buffer)
+
+
+async def iter_upstream(response, url):
+    """Streams an upstream body and always returns its connection to the pool."""
+    sent = 0
+    try:
+        async for chunk in adaptive_chunks(response.aiter_raw()):
+            sent += len(chunk)
+            yield chunk
+    except asyncio.CancelledError:
+        logger.info(f"Listener disconnected from {url} after {sent} bytes")
+        raise
+    except httpx.HTTPError as e:
+        logger.warning(f"Upstream audio stream from {url} broke after {sent} bytes: {e}")
+    finally:
+        await response.aclose()
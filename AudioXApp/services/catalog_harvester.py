@@ -0,0 +1,363 @@
+# AudioXApp/services/catalog_harvester.py
+
+"""
+Concurrent fetch engine for the external (LibriVox / Archive.org) catalog.
+
+The harvester only deals with HTTP: it runs a set of ``HarvestJob`` objects on a
+bounded thread pool, throttles each upstream host with a token bucket, retries
+transient failures with exponential backoff and records per-source timings.
+Turning the payloads into audiobook dicts stays with the caller.
+
+Jobs may carry the validators (ETag / Last-Modified / body hash) and the parsed
+payload from a previous run. The harvester then sends a conditional request and
+hands back the previous payload when the upstream copy has not changed, so only
+changed items are re-parsed.
+"""
+
+import hashlib
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from urllib.parse import urlparse
+
+import requests
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_SECONDS = 0.5
+DEFAULT_TIMEOUT_SECONDS = 30
+
+# Requests per second and burst size per upstream host. Hosts that are not
+# listed fall back to the '*' entry.
+DEFAULT_HOST_RATE_LIMITS = {
+    'archive.org': (4.0, 4),
+    'librivox.org': (2.0, 2),
+    '*': (5.0, 5),
+}
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Result outcomes
+OUTCOME_FETCHED = 'fetched'          # new or changed upstream copy, parsed
+OUTCOME_REVALIDATED = 'revalidated'  # request confirmed the previous copy (304 or identical body)
+OUTCOME_SKIPPED = 'skipped'          # previous copy reused without a request
+OUTCOME_FAILED = 'failed'
+
+
+# ==========================================
+# RATE LIMITING
+# ==========================================
+
+class TokenBucket:
+    """Thread-safe token bucket; ``acquire`` blocks until a token is available."""
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = max(1, int(capacity))
+        self._tokens = float(self.capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+# ==========================================
+# JOBS, RESULTS AND REPORTING
+# ==========================================
+
+class HarvestJob:
+    """
+    A single GET request.
+
+    ``key`` identifies the result, ``source`` groups jobs in the timing report,
+    ``parse`` is either 'json' or 'content'. ``transform`` optionally turns the
+    parsed body into the payload handed back (it runs on the worker thread).
+    ``follow`` is an optional callable ``follow(job, payload)`` returning further
+    jobs to schedule once this one succeeds (e.g. the metadata lookups for an
+    advancedsearch page).
+
+    ``validators`` (``etag`` / ``last_modified`` / ``content_hash``) and
+    ``cached_payload`` come from a previous run; with ``skip`` set the cached
+    payload is reused without any request at all.
+    """
+
+    def __init__(self, key, source, url, params=None, parse='json', follow=None, timeout=None,
+                 transform=None, validators=None, cached_payload=None, skip=False):
+        self.key = key
+        self.source = source
+        self.url = url
+        self.params = params
+        self.parse = parse
+        self.follow = follow
+        self.timeout = timeout
+        self.transform = transform
+        self.validators = validators or {}
+        self.cached_payload = cached_payload
+        self.skip = skip and cached_payload is not None
+
+    @property
+    def has_cached_copy(self):
+        return self.cached_payload is not None
+
+    def conditional_headers(self):
+        if not self.has_cached_copy:
+            return {}
+        headers = {}
+        if self.validators.get('etag'):
+            headers['If-None-Match'] = self.validators['etag']
+        if self.validators.get('last_modified'):
+            headers['If-Modified-Since'] = self.validators['last_modified']
+        return headers
+
+    def __repr__(self):
+        return f"<HarvestJob {self.source}:{self.key}>"
+
+
+class HarvestResult:
+    def __init__(self, job, payload=None, status_code=None, error=None, elapsed=0.0, attempts=0, throttled=0.0,
+                 outcome=None, validators=None):
+        self.job = job
+        self.payload = payload
+        self.status_code = status_code
+        self.error = error
+        self.elapsed = elapsed
+        self.attempts = attempts
+        self.throttled = throttled
+        self.outcome = outcome or (OUTCOME_FAILED if error is not None else OUTCOME_FETCHED)
+        self.validators = validators if validators is not None else dict(job.validators)
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+class HarvestReport:
+    """Per-source request counts and timings for one harvester run."""
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.wall_seconds = 0.0
+        self.sources = {}
+
+    def record(self, result):
+        stats = self.sources.setdefault(result.job.source, {
+            'requests': 0, 'succeeded': 0, 'failed': 0, 'retries': 0,
+            'busy_seconds': 0.0, 'slowest_seconds': 0.0, 'throttled_seconds': 0.0,
+            OUTCOME_FETCHED: 0, OUTCOME_REVALIDATED: 0, OUTCOME_SKIPPED: 0,
+        })
+        if result.outcome == OUTCOME_SKIPPED:
+            stats[OUTCOME_SKIPPED] += 1
+            return
+        if result.outcome in (OUTCOME_FETCHED, OUTCOME_REVALIDATED):
+            stats[result.outcome] += 1
+        stats['requests'] += 1
+        stats['succeeded' if result.ok else 'failed'] += 1
+        stats['retries'] += max(0, result.attempts - 1)
+        stats['busy_seconds'] += result.elapsed
+        stats['slowest_seconds'] = max(stats['slowest_seconds'], result.elapsed)
+        stats['throttled_seconds'] += result.throttled
+
+    def finish(self):
+        self.wall_seconds = time.monotonic() - self.started_at
+
+    def outcome_totals(self):
+        totals = {OUTCOME_FETCHED: 0, OUTCOME_REVALIDATED: 0, OUTCOME_SKIPPED: 0, OUTCOME_FAILED: 0}
+        for stats in self.sources.values():
+            totals[OUTCOME_FETCHED] += stats[OUTCOME_FETCHED]
+            totals[OUTCOME_REVALIDATED] += stats[OUTCOME_REVALIDATED]
+            totals[OUTCOME_SKIPPED] += stats[OUTCOME_SKIPPED]
+            totals[OUTCOME_FAILED] += stats['failed']
+        return totals
+
+    def as_dict(self):
+        sources = {}
+        for name, stats in self.sources.items():
+            average = stats['busy_seconds'] / stats['requests'] if stats['requests'] else 0.0
+            sources[name] = dict(stats, average_seconds=average)
+        return {'wall_seconds': self.wall_seconds, 'sources': sources, 'totals': self.outcome_totals()}
+
+    def summary_lines(self):
+        lines = []
+        for name, stats in sorted(self.as_dict()['sources'].items()):
+            lines.append(
+                f"{name}: {stats['succeeded']}/{stats['requests']} ok, {stats['failed']} failed, "
+                f"{stats[OUTCOME_FETCHED]} fetched, {stats[OUTCOME_REVALIDATED]} revalidated, "
+                f"{stats[OUTCOME_SKIPPED]} skipped, "
+                f"{stats['retries']} retries, avg {stats['average_seconds']:.2f}s, "
+                f"slowest {stats['slowest_seconds']:.2f}s, throttled {stats['throttled_seconds']:.2f}s"
+            )
+        lines.append(f"total wall time: {self.wall_seconds:.2f}s")
+        return lines
+
+
+# ==========================================
+# HARVESTER
+# ==========================================
+
+class CatalogHarvester:
+    """Runs ``HarvestJob`` objects concurrently with per-host rate limiting."""
+
+    def __init__(self, max_workers=None, max_retries=None, backoff_seconds=None,
+                 host_rate_limits=None, headers=None):
+        self.max_workers = max_workers or getattr(settings, 'EXTERNAL_CATALOG_MAX_WORKERS', DEFAULT_MAX_WORKERS)
+        self.max_retries = max_retries if max_retries is not None else getattr(
+            settings, 'EXTERNAL_CATALOG_MAX_RETRIES', DEFAULT_MAX_RETRIES)
+        self.backoff_seconds = backoff_seconds if backoff_seconds is not None else getattr(
+            settings, 'EXTERNAL_CATALOG_BACKOFF_SECONDS', DEFAULT_BACKOFF_SECONDS)
+        self.host_rate_limits = host_rate_limits if host_rate_limits is not None else getattr(
+            settings, 'EXTERNAL_CATALOG_HOST_RATE_LIMITS', DEFAULT_HOST_RATE_LIMITS)
+        self.headers = headers or {}
+        self.report = HarvestReport()
+        self._buckets = {}
+        self._buckets_lock = threading.Lock()
+        self._local = threading.local()
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(self.headers)
+            self._local.session = session
+        return session
+
+    def _bucket_for(self, url):
+        host = (urlparse(url).hostname or '').lower()
+        with self._buckets_lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                limit = None
+                for pattern, value in self.host_rate_limits.items():
+                    if pattern != '*' and (host == pattern or host.endswith('.' + pattern)):
+                        limit = value
+                        break
+                rate, burst = limit or self.host_rate_limits.get('*', DEFAULT_HOST_RATE_LIMITS['*'])
+                bucket = TokenBucket(rate, burst)
+                self._buckets[host] = bucket
+            return bucket
+
+    def _retry_delay(self, attempt, response=None):
+        if response is not None:
+            retry_after = response.headers.get('Retry-After')
+            if retry_after and retry_after.isdigit():
+                return float(retry_after)
+        return self.backoff_seconds * (2 ** (attempt - 1)) + random.uniform(0, self.backoff_seconds)
+
+    def _build_result(self, job, response, started, attempt, throttled):
+        validators = {
+            'etag': response.headers.get('ETag') or job.validators.get('etag'),
+            'last_modified': response.headers.get('Last-Modified') or job.validators.get('last_modified'),
+            'content_hash': job.validators.get('content_hash'),
+        }
+        elapsed = time.monotonic() - started
+        if response.status_code == 304 and job.has_cached_copy:
+            return HarvestResult(job, job.cached_payload, 304, None, elapsed, attempt, throttled,
+                                 OUTCOME_REVALIDATED, validators)
+
+        content_hash = hashlib.sha1(response.content).hexdigest()
+        validators['content_hash'] = content_hash
+        if job.has_cached_copy and content_hash == job.validators.get('content_hash'):
+            return HarvestResult(job, job.cached_payload, response.status_code, None, elapsed, attempt, throttled,
+                                 OUTCOME_REVALIDATED, validators)
+
+        payload = response.json() if job.parse == 'json' else response.content
+        if job.transform is not None:
+            payload = job.transform(payload)
+        return HarvestResult(job, payload, response.status_code, None, time.monotonic() - started, attempt, throttled,
+                             OUTCOME_FETCHED, validators)
+
+    def _execute(self, job):
+        bucket = self._bucket_for(job.url)
+        timeout = job.timeout or getattr(settings, 'EXTERNAL_CATALOG_TIMEOUT_SECONDS', DEFAULT_TIMEOUT_SECONDS)
+        started = time.monotonic()
+        throttled = 0.0
+        attempt = 0
+        while True:
+            attempt += 1
+            throttled += bucket.acquire()
+            response = None
+            try:
+                response = self._session().get(job.url, params=job.params, timeout=timeout,
+                                               headers=job.conditional_headers())
+                if response.status_code in RETRYABLE_STATUS_CODES and attempt <= self.max_retries:
+                    delay = self._retry_delay(attempt, response)
+                    logger.warning(f"Harvester got HTTP {response.status_code} for {job.url}, retry {attempt} in {delay:.2f}s")
+                    time.sleep(delay)
+                    continue
+                if response.status_code != 304:
+                    response.raise_for_status()
+                return self._build_result(job, response, started, attempt, throttled)
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                if attempt <= self.max_retries:
+                    delay = self._retry_delay(attempt)
+                    logger.warning(f"Harvester {type(e).__name__} for {job.url}, retry {attempt} in {delay:.2f}s")
+                    time.sleep(delay)
+                    continue
+                error = e
+            except Exception as e:
+                error = e
+            logger.error(f"Harvester failed {job.source} request {job.url}: {error}")
+            return HarvestResult(job, None, getattr(response, 'status_code', None), error,
+                                 time.monotonic() - started, attempt, throttled)
+
+    def run(self, jobs):
+        """
+        Executes ``jobs`` (and any jobs returned by their ``follow`` callbacks)
+        and returns a dict of ``key -> HarvestResult``. Follow-up jobs are
+        scheduled from this thread, so the pool never waits on itself.
+        """
+        self.report = HarvestReport()
+        results = {}
+        scheduled = set()
+        pending = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='catalog-harvester') as pool:
+            def complete(job, result):
+                results[job.key] = result
+                self.report.record(result)
+                if result.ok and job.follow:
+                    try:
+                        for follow_job in job.follow(job, result.payload) or []:
+                            submit(follow_job)
+                    except Exception as e:
+                        logger.error(f"Harvester follow-up for {job} failed: {e}", exc_info=True)
+
+            def submit(job):
+                if job.key in scheduled:
+                    return
+                scheduled.add(job.key)
+                if job.skip:
+                    complete(job, HarvestResult(job, job.cached_payload, outcome=OUTCOME_SKIPPED))
+                    return
+                pending[pool.submit(self._execute, job)] = job
+
+            for job in jobs:
+                submit(job)
+
+            while pending:
+                done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = pending.pop(future)
+                    complete(job, future.result())
+
+        self.report.finish()
+        logger.info("Catalog harvest finished. " + "; ".join(self.report.summary_lines()))
+        return results
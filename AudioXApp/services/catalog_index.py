@@ -0,0 +1,169 @@
+# AudioXApp/services/catalog_index.py
+
+"""
+Normalized, slug-keyed index of the external catalog snapshot.
+
+Alongside the snapshot blob, every rebuild writes under its snapshot version:
+  - one entry per slug holding that book's dict,
+  - the slug order of the snapshot,
+  - language -> slugs and genre/subject -> slugs maps,
+  - a language -> genres facet summary,
+  - a manifest, written last, that marks the version as complete.
+
+Readers always resolve the version from the snapshot metadata first, so they
+never mix entries from two harvests. Old versions simply expire.
+"""
+
+import logging
+from collections import defaultdict
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+INDEX_KEY_PREFIX = 'external_catalog_index'
+MAX_FACET_LENGTH = 50
+
+
+def _key(version, *parts):
+    return ':'.join((INDEX_KEY_PREFIX, version) + parts)
+
+
+def _lowered_values(value):
+    values = value if isinstance(value, list) else [value]
+    return [str(v).strip().lower() for v in values if v and str(v).strip()]
+
+
+def iter_catalog_books(data):
+    """Yields ``(book_dict, section_key)`` for every entry of a snapshot, in snapshot order."""
+    for book in data.get('librivox_audiobooks', []):
+        yield book, None
+    for source_key in ('archive_genre_audiobooks', 'archive_language_audiobooks'):
+        for section_key, books in data.get(source_key, {}).items():
+            for book in books:
+                yield book, (section_key if source_key == 'archive_language_audiobooks' else None)
+
+
+def build_catalog_index(data):
+    """
+    Builds the index structures for a snapshot. A slug that appears in several
+    sections keeps its first dict, but is listed under every language and
+    genre it was harvested for.
+    """
+    books = {}
+    order = []
+    # dicts used as insertion-ordered sets of slugs
+    languages = defaultdict(dict)
+    genres = defaultdict(dict)
+    facets = defaultdict(set)
+
+    for book, language_section in iter_catalog_books(data):
+        slug = book.get('slug')
+        if not slug:
+            continue
+        if slug not in books:
+            books[slug] = book
+            order.append(slug)
+
+        book_languages = _lowered_values(book.get('language', 'English'))
+        if language_section:
+            book_languages.append(language_section.lower())
+        terms = [book['genre']] if book.get('genre') else []
+        terms.extend(s for s in book.get('subjects', []) if s and len(str(s)) < MAX_FACET_LENGTH)
+
+        for language in book_languages:
+            languages[language][slug] = None
+            facets[language].update(str(t) for t in terms)
+        for term in terms:
+            genres[str(term).lower()][slug] = None
+
+    return {
+        'books': books,
+        'order': order,
+        'languages': {language: list(slugs) for language, slugs in languages.items()},
+        'genres': {genre: list(slugs) for genre, slugs in genres.items()},
+        'facets': {language: sorted(values) for language, values in facets.items()},
+    }
+
+
+def write_catalog_index(data, version, timeout):
+    """Writes the index for ``data`` under ``version``; the manifest goes last."""
+    index = build_catalog_index(data)
+    entries = {_key(version, 'book', slug): book for slug, book in index['books'].items()}
+    entries[_key(version, 'order')] = index['order']
+    entries[_key(version, 'languages')] = index['languages']
+    entries[_key(version, 'genres')] = index['genres']
+    entries[_key(version, 'facets')] = index['facets']
+    cache.set_many(entries, timeout)
+    cache.set(_key(version, 'manifest'), {'books': len(index['order'])}, timeout)
+    logger.info(f"Wrote external catalog index version {version} with {len(index['order'])} books.")
+    return index
+
+
+def _matching_slugs(mapping, needle):
+    """Union of the slug lists whose key contains ``needle`` (the catalog's substring semantics)."""
+    needle = needle.strip().lower()
+    matched = set()
+    for key, slugs in mapping.items():
+        if needle in key:
+            matched.update(slugs)
+    return matched
+
+
+def lookup_book(version, slug):
+    """
+    Returns ``(available, book)`` with a single cache round trip. ``available``
+    is False when the index for ``version`` is missing or incomplete.
+    """
+    book_key, manifest_key = _key(version, 'book', slug), _key(version, 'manifest')
+    found = cache.get_many([book_key, manifest_key])
+    if manifest_key not in found:
+        return False, None
+    return True, found.get(book_key)
+
+
+def get_books(version, slugs):
+    """Returns the book dicts for ``slugs`` (in that order), skipping unknown slugs."""
+    if not slugs:
+        return []
+    keys = [_key(version, 'book', slug) for slug in slugs]
+    found = cache.get_many(keys)
+    return [found[key] for key in keys if key in found]
+
+
+def find_slugs(version, language=None, genre=None):
+    """
+    Returns the snapshot-ordered slugs matching the language/genre filters, or
+    None if the index for ``version`` is not available.
+    """
+    parts = ['manifest', 'order']
+    if language:
+        parts.append('languages')
+    if genre:
+        parts.append('genres')
+    keys = {part: _key(version, part) for part in parts}
+    found = cache.get_many(list(keys.values()))
+    if any(key not in found for key in keys.values()):
+        return None
+
+    slugs = found[keys['order']]
+    if language:
+        language_slugs = _matching_slugs(found[keys['languages']], language)
+        slugs = [slug for slug in slugs if slug in language_slugs]
+    if genre:
+        genre_slugs = _matching_slugs(found[keys['genres']], genre)
+        slugs = [slug for slug in slugs if slug in genre_slugs]
+    return slugs
+
+
+def get_facets(version, language=None):
+    """Returns the genre/subject facets for books matching ``language`` (all books when empty)."""
+    facets = cache.get(_key(version, 'facets'))
+    if facets is None:
+        return None
+    needle = (language or '').strip().lower()
+    values = set()
+    for book_language, terms in facets.items():
+        if needle in book_language:
+            values.update(terms)
+    return values
@@ -0,0 +1,184 @@
+# AudioXApp/services/catalog_ingest.py
+
+"""
+Batch ingestion of harvested external books into Audiobook / Chapter rows.
+
+Books are keyed on ``slug`` and chapters on ``external_chapter_identifier``
+(``ext-<slug>-<index>``, the identifier the detail view has always used).
+Existing rows are read once per batch and compared field by field; only new
+or changed rows are written, with ``bulk_create(update_conflicts=True)``.
+Slugs that belong to creator uploads are never touched. Written books get
+their full-text search vectors refreshed in the same batch.
+"""
+
+import logging
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import Audiobook, Chapter
+from . import search_engine
+from .catalog_index import iter_catalog_books
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 500
+
+AUDIOBOOK_SYNC_FIELDS = ['title', 'author', 'description', 'language', 'genre', 'source']
+CHAPTER_SYNC_FIELDS = ['audiobook_id', 'chapter_order', 'chapter_name', 'external_audio_url', 'duration_seconds']
+
+
+def external_chapter_identifier(audiobook_slug, chapter_index):
+    return f"ext-{audiobook_slug}-{chapter_index}"
+
+
+def _clip(value, max_length):
+    if value is None:
+        return None
+    value = str(value)
+    return value[:max_length]
+
+
+def _new_report():
+    return {
+        'audiobooks': {'inserted': 0, 'updated': 0, 'unchanged': 0, 'skipped': 0},
+        'chapters': {'inserted': 0, 'updated': 0, 'unchanged': 0},
+    }
+
+
+def _audiobook_values(book_dict):
+    language = book_dict.get('language')
+    if isinstance(language, list):
+        language = language[0] if language else None
+    return {
+        'title': _clip(book_dict.get('title') or 'Unknown Title', 255),
+        'author': _clip(book_dict.get('author'), 255),
+        'description': book_dict.get('description') or "No description provided.",
+        'language': _clip(language, 100),
+        'genre': _clip(book_dict.get('genre'), 100),
+        'source': book_dict.get('source', 'archive') if book_dict.get('source') in ('librivox', 'archive') else 'archive',
+    }
+
+
+def _chapter_values(audiobook_id, chapter_index, chapter_info):
+    return {
+        'audiobook_id': audiobook_id,
+        'chapter_order': chapter_index,
+        'chapter_name': _clip(chapter_info.get('chapter_title') or f"Chapter {chapter_index + 1}", 255),
+        'external_audio_url': _clip(chapter_info.get('audio_url'), 1024),
+        'duration_seconds': chapter_info.get('duration_seconds') or 0,
+    }
+
+
+def _ingest_batch(book_dicts, report):
+    slugs = [book_dict['slug'] for book_dict in book_dicts]
+    existing_books = {
+        row['slug']: row
+        for row in Audiobook.objects.filter(slug__in=slugs).values('slug', 'is_creator_book', *AUDIOBOOK_SYNC_FIELDS)
+    }
+
+    now = timezone.now()
+    books_to_write = []
+    ingestible = []
+    for book_dict in book_dicts:
+        existing = existing_books.get(book_dict['slug'])
+        if existing and existing['is_creator_book']:
+            report['audiobooks']['skipped'] += 1
+            continue
+        ingestible.append(book_dict)
+        values = _audiobook_values(book_dict)
+        if existing and all(existing[field] == values[field] for field in AUDIOBOOK_SYNC_FIELDS):
+            report['audiobooks']['unchanged'] += 1
+            continue
+        report['audiobooks']['updated' if existing else 'inserted'] += 1
+        books_to_write.append(Audiobook(
+            slug=book_dict['slug'],
+            is_creator_book=False,
+            creator=None,
+            is_paid=False,
+            price=Decimal('0.00'),
+            status='PUBLISHED',
+            created_at=now,
+            **values
+        ))
+
+    if books_to_write:
+        Audiobook.objects.bulk_create(
+            books_to_write,
+            update_conflicts=True,
+            unique_fields=['slug'],
+            update_fields=AUDIOBOOK_SYNC_FIELDS + ['updated_at'],
+        )
+        # bulk_create skips post_save, so the search vectors are refreshed here
+        search_engine.refresh_search_vectors(
+            Audiobook.objects.filter(slug__in=[book.slug for book in books_to_write])
+        )
+
+    audiobook_ids = dict(
+        Audiobook.objects.filter(slug__in=[b['slug'] for b in ingestible]).values_list('slug', 'audiobook_id')
+    )
+
+    wanted_chapters = {}
+    for book_dict in ingestible:
+        audiobook_id = audiobook_ids.get(book_dict['slug'])
+        if audiobook_id is None:
+            continue
+        for chapter_index, chapter_info in enumerate(book_dict.get('chapters', [])):
+            identifier = external_chapter_identifier(book_dict['slug'], chapter_index)
+            wanted_chapters[identifier] = _chapter_values(audiobook_id, chapter_index, chapter_info)
+
+    existing_chapters = {
+        row['external_chapter_identifier']: row
+        for row in Chapter.objects.filter(external_chapter_identifier__in=list(wanted_chapters)).values(
+            'external_chapter_identifier', *CHAPTER_SYNC_FIELDS
+        )
+    }
+
+    chapters_to_write = []
+    for identifier, values in wanted_chapters.items():
+        existing = existing_chapters.get(identifier)
+        if existing and all(existing[field] == values[field] for field in CHAPTER_SYNC_FIELDS):
+            report['chapters']['unchanged'] += 1
+            continue
+        report['chapters']['updated' if existing else 'inserted'] += 1
+        chapters_to_write.append(Chapter(
+            external_chapter_identifier=identifier,
+            is_preview_eligible=True,
+            created_at=now,
+            **values
+        ))
+
+    if chapters_to_write:
+        Chapter.objects.bulk_create(
+            chapters_to_write,
+            update_conflicts=True,
+            unique_fields=['external_chapter_identifier'],
+            update_fields=[field for field in CHAPTER_SYNC_FIELDS if field != 'audiobook_id'] + ['updated_at'],
+        )
+
+
+def ingest_external_books(book_dicts, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Upserts the given external book dicts (one per slug, first one wins) and
+    their chapters. Returns a report of inserted / updated / unchanged rows.
+    """
+    report = _new_report()
+    unique_books = {}
+    for book_dict in book_dicts:
+        slug = book_dict.get('slug')
+        if slug and slug not in unique_books:
+            unique_books[slug] = book_dict
+
+    books = list(unique_books.values())
+    for start in range(0, len(books), batch_size):
+        with transaction.atomic():
+            _ingest_batch(books[start:start + batch_size], report)
+
+    logger.info(f"External catalog ingestion finished: {report}")
+    return report
+
+
+def ingest_external_catalog(data, batch_size=DEFAULT_BATCH_SIZE):
+    """Upserts every book of a harvested catalog snapshot."""
+    return ingest_external_books((book_dict for book_dict, _ in iter_catalog_books(data)), batch_size=batch_size)
@@ -0,0 +1,137 @@
+# AudioXApp/services/catalog_text_index.py
+
+"""
+In-process inverted index over the external catalog snapshot.
+
+Documents are the snapshot's books (one per slug, snapshot order) numbered
+0..n-1. Title, author, genre and subject words are case-folded into a sorted
+vocabulary whose postings are ``array('I')`` doc id lists; languages and
+genres get postings of their own. A query is then a handful of set
+intersections instead of a substring scan over every book dict.
+
+Each worker process keeps one index and rebuilds it only when the snapshot
+version it was built for changes.
+"""
+
+import logging
+import re
+import threading
+from array import array
+from bisect import bisect_left
+
+from .catalog_index import build_catalog_index
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(str(text).casefold()) if text else []
+
+
+def _to_postings(doc_id_lists):
+    return {key: array('I', doc_ids) for key, doc_ids in doc_id_lists.items()}
+
+
+class CatalogTextIndex:
+    """Token, language and genre postings for one catalog snapshot."""
+
+    def __init__(self, data):
+        catalog = build_catalog_index(data)
+        self.slugs = catalog['order']
+        self.books = [catalog['books'][slug] for slug in self.slugs]
+        doc_ids = {slug: doc_id for doc_id, slug in enumerate(self.slugs)}
+
+        token_docs = {}
+        for doc_id, book in enumerate(self.books):
+            texts = [book.get('title'), book.get('author'), book.get('genre')]
+            texts.extend(book.get('subjects') or [])
+            for token in {token for text in texts for token in tokenize(text)}:
+                token_docs.setdefault(token, []).append(doc_id)
+
+        self.vocabulary = sorted(token_docs)
+        self.postings = _to_postings(token_docs)
+        # Slug lists from the catalog index become doc id postings (sorted, so intersections stay ordered)
+        self.languages = _to_postings({
+            language: sorted(doc_ids[slug] for slug in slugs) for language, slugs in catalog['languages'].items()
+        })
+        self.genres = _to_postings({
+            genre: sorted(doc_ids[slug] for slug in slugs) for genre, slugs in catalog['genres'].items()
+        })
+
+    def __len__(self):
+        return len(self.books)
+
+    def _prefix_docs(self, token):
+        """Docs containing a word that starts with ``token``."""
+        matched = set()
+        position = bisect_left(self.vocabulary, token)
+        while position < len(self.vocabulary) and self.vocabulary[position].startswith(token):
+            matched.update(self.postings[self.vocabulary[position]])
+            position += 1
+        return matched
+
+    @staticmethod
+    def _facet_docs(postings, needle):
+        """Docs filed under any facet key containing ``needle`` (the catalog's substring semantics)."""
+        needle = needle.strip().lower()
+        matched = set()
+        for key, doc_ids in postings.items():
+            if needle in key:
+                matched.update(doc_ids)
+        return matched
+
+    def search(self, query=None, language=None, genre=None):
+        """
+        Returns the books, in snapshot order, where every query word is a
+        prefix of a title/author/genre/subject word and which match the
+        language and genre filters.
+        """
+        candidates = None
+        for docs in self._filter_sets(query, language, genre):
+            candidates = docs if candidates is None else candidates & docs
+            if not candidates:
+                return []
+        if candidates is None:
+            return list(self.books)
+        return [self.books[doc_id] for doc_id in sorted(candidates)]
+
+    def _filter_sets(self, query, language, genre):
+        if language:
+            yield self._facet_docs(self.languages, language)
+        if genre:
+            yield self._facet_docs(self.genres, genre)
+        # Rarer (longer) words first so the intersection shrinks quickly
+        for token in sorted(set(tokenize(query)), key=len, reverse=True):
+            yield self._prefix_docs(token)
+
+
+_index_lock = threading.Lock()
+# (version, index), replaced as a whole so readers never pair a version with another index
+_current_index = (None, None)
+
+
+def get_text_index(version, load_snapshot):
+    """
+    Returns this worker's index for snapshot ``version``, building it from
+    ``load_snapshot()`` when the version changed. Returns None if the snapshot
+    cannot be loaded.
+    """
+    global _current_index
+    built_version, index = _current_index
+    if built_version == version:
+        return index
+
+    with _index_lock:
+        built_version, index = _current_index
+        if built_version == version:
+            return index
+        data = load_snapshot()
+        if not data:
+            return None
+        index = CatalogTextIndex(data)
+        _current_index = (version, index)
+        logger.info(f"Built external catalog text index for version {version}: {len(index)} books, "
+                    f"{len(index.vocabulary)} terms.")
+        return index
@@ -0,0 +1,124 @@
+# AudioXApp/services/disk_cache.py
+
+"""
+Building blocks shared by the on-disk caches (proxied chapter audio,
+synthesized TTS segments).
+
+Cache files are touched when read, so their mtime orders them by last use;
+``evict`` deletes the least recently used ones once a directory grows past
+its cap. Walking the tree is costly, so ``EvictionTrigger`` only runs it after
+a fraction of the cap has been written by the current process. ``Counters``
+keeps hit / miss totals in the Django cache so every worker reports into the
+same numbers.
+"""
+
+import logging
+import os
+import threading
+import uuid
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Eviction trims a cache down to this fraction of its cap, so it doesn't run on every write
+EVICTION_TARGET_RATIO = 0.9
+
+
+def write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+def _cache_files(root, suffix):
+    for dir_path, _dirs, files in os.walk(root):
+        for name in files:
+            if suffix and not name.endswith(suffix):
+                continue
+            path = os.path.join(dir_path, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            yield stat.st_mtime, stat.st_size, path
+
+
+def evict(root, max_bytes, suffix=None, target_ratio=EVICTION_TARGET_RATIO):
+    """
+    Deletes the least recently used files under ``root`` (only those ending in
+    ``suffix``, if given) until they total at most ``target_ratio`` of
+    ``max_bytes``. Does nothing while they fit under ``max_bytes``. Returns
+    the set of directories files were deleted from.
+    """
+    files = list(_cache_files(root, suffix))
+    total = sum(size for _mtime, size, _path in files)
+    if total <= max_bytes:
+        return set()
+
+    target = int(max_bytes * target_ratio)
+    freed = 0
+    touched_dirs = set()
+    for _mtime, size, path in sorted(files):
+        if total - freed <= target:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            continue
+        freed += size
+        touched_dirs.add(os.path.dirname(path))
+
+    logger.info(f"Disk cache {root} evicted {freed} bytes ({total} -> {total - freed}, cap {max_bytes}).")
+    return touched_dirs
+
+
+def disk_usage(root):
+    return sum(size for _mtime, size, _path in _cache_files(root, None))
+
+
+class EvictionTrigger:
+    """Calls ``evict_callback`` each time ``fraction`` of ``max_bytes`` has been written."""
+
+    def __init__(self, max_bytes, evict_callback, fraction=0.05):
+        self.threshold = max(int(max_bytes * fraction), 1)
+        self.evict_callback = evict_callback
+        self._lock = threading.Lock()
+        self._bytes_since_eviction = 0
+
+    def note_written(self, size):
+        with self._lock:
+            self._bytes_since_eviction += size
+            if self._bytes_since_eviction < self.threshold:
+                return
+            self._bytes_since_eviction = 0
+        self.evict_callback()
+
+
+class Counters:
+    """Named counters kept in the Django cache under ``<prefix>:<name>``."""
+
+    def __init__(self, prefix, names):
+        self.prefix = prefix
+        self.names = tuple(names)
+
+    def record(self, **counts):
+        for name, value in counts.items():
+            if not value:
+                continue
+            cache_key = f'{self.prefix}:{name}'
+            try:
+                cache.add(cache_key, 0, timeout=None)
+                cache.incr(cache_key, value)
+            except Exception as e:
+                logger.debug(f"Could not record cache metric {cache_key}: {e}")
+
+    def get(self):
+        values = cache.get_many([f'{self.prefix}:{name}' for name in self.names])
+        return {name: values.get(f'{self.prefix}:{name}', 0) for name in self.names}
+
+
+def ratio(part, whole):
+    return round(part / whole, 4) if whole else None
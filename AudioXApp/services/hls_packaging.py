@@ -0,0 +1,185 @@
+# AudioXApp/services/hls_packaging.py
+
+"""
+HLS packaging of local chapter audio.
+
+Once a chapter is approved, ``package_chapter`` has ffmpeg encode its audio
+at each bitrate of ``HLS_BITRATES_KBPS`` (AAC), normalized to the loudness
+target of the progressive renditions with the same two-pass ``loudnorm``
+measurement (``transcoding.measure_loudness``), and cut every rendition into
+``HLS_SEGMENT_SECONDS`` long MPEG-TS segments, with a VOD media playlist per
+rendition and a master playlist listing them, so players can switch bitrate
+with the network and resume after a stall by fetching a few seconds of audio
+instead of a large byte range.
+
+A package lives in ``MEDIA_ROOT/hls/<chapter id>-<audio digest>/``::
+
+    master.m3u8
+    48k/index.m3u8
+    48k/seg_00000.ts ...
+    96k/index.m3u8 ...
+
+Its name changes with the audio, so its files never change once written and
+can be cached without revalidation. The package is built in a temporary
+directory and renamed into place, so a partial package is never served.
+``stream_hls`` serves the files to holders of a stream token minted for
+``token_source(package)``.
+"""
+
+import hashlib
+import logging
+import mimetypes
+import os
+import shutil
+import subprocess
+import uuid
+
+from django.conf import settings
+from django.utils._os import safe_join
+
+from . import transcoding
+
+logger = logging.getLogger(__name__)
+
+ENABLED = getattr(settings, 'HLS_PACKAGING_ENABLED', True)
+SEGMENT_SECONDS = getattr(settings, 'HLS_SEGMENT_SECONDS', 6)
+BITRATES_KBPS = getattr(settings, 'HLS_BITRATES_KBPS', [48, 96])
+FFMPEG_PATH = getattr(settings, 'HLS_FFMPEG_PATH', 'ffmpeg')
+CACHE_CONTROL = getattr(settings, 'HLS_CACHE_CONTROL', 'private, max-age=31536000, immutable')
+
+PACKAGES_DIR = 'hls'
+MASTER_PLAYLIST = 'master.m3u8'
+MEDIA_PLAYLIST = 'index.m3u8'
+AUDIO_CODEC = 'mp4a.40.2'  # AAC-LC
+# Renditions at or below this bitrate are encoded in mono, which suits speech
+MONO_MAX_KBPS = 64
+
+CONTENT_TYPES = {
+    '.m3u8': 'application/vnd.apple.mpegurl',
+    '.ts': 'video/mp2t',
+}
+
+
+class PackagingError(Exception):
+    """ffmpeg is missing or failed to measure the audio or encode a rendition."""
+
+
+def package_name(chapter_id, digest):
+    return f'{chapter_id}-{digest[:16]}'
+
+
+def package_dir(package):
+    return os.path.join(settings.MEDIA_ROOT, PACKAGES_DIR, package)
+
+
+def token_source(package):
+    """The source stream tokens for the package are minted for."""
+    return f'{PACKAGES_DIR}:{package}'
+
+
+def resolve(package, name):
+    """The absolute path of ``name`` in the package; raises SuspiciousFileOperation outside it."""
+    return safe_join(package_dir(package), name)
+
+
+def content_type(name):
+    extension = os.path.splitext(name)[1].lower()
+    return CONTENT_TYPES.get(extension) or mimetypes.guess_type(name)[0] or 'application/octet-stream'
+
+
+def remove_package(package):
+    if package:
+        shutil.rmtree(package_dir(package), ignore_errors=True)
+
+
+def _file_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.file_digest(f, 'sha256').hexdigest()
+
+
+def _encode_rendition(source_path, directory, bitrate_kbps, measurement):
+    os.makedirs(directory)
+    command = [
+        FFMPEG_PATH, '-nostdin', '-loglevel', 'error', '-y',
+        '-i', source_path,
+        '-map', '0:a:0', '-vn',
+        '-af', transcoding.loudnorm_filter(measurement),
+        '-c:a', 'aac', '-b:a', f'{bitrate_kbps}k', '-ac', '1' if bitrate_kbps <= MONO_MAX_KBPS else '2',
+        '-f', 'hls',
+        '-hls_time', str(SEGMENT_SECONDS),
+        '-hls_playlist_type', 'vod',
+        '-hls_segment_filename', os.path.join(directory, 'seg_%05d.ts'),
+        os.path.join(directory, MEDIA_PLAYLIST),
+    ]
+    try:
+        subprocess.run(command, capture_output=True, check=True)
+    except FileNotFoundError as e:
+        raise PackagingError(f"ffmpeg not found at '{FFMPEG_PATH}'") from e
+    except subprocess.CalledProcessError as e:
+        raise PackagingError(f"ffmpeg failed on the {bitrate_kbps}k rendition: {e.stderr.decode(errors='replace').strip()}") from e
+
+
+def _measured_bandwidth(directory):
+    """Peak and average bits per second of a rendition, from its segment sizes and durations."""
+    peak, total_bits, total_seconds = 0, 0, 0.0
+    duration = None
+    with open(os.path.join(directory, MEDIA_PLAYLIST)) as playlist:
+        for line in playlist:
+            line = line.strip()
+            if line.startswith('#EXTINF:'):
+                duration = float(line[len('#EXTINF:'):].split(',')[0])
+            elif line and not line.startswith('#') and duration:
+                bits = os.path.getsize(os.path.join(directory, line)) * 8
+                peak = max(peak, int(bits / duration))
+                total_bits += bits
+                total_seconds += duration
+                duration = None
+    return peak, int(total_bits / total_seconds) if total_seconds else 0
+
+
+def _write_master_playlist(directory, bitrates_kbps):
+    lines = ['#EXTM3U', '#EXT-X-VERSION:3', '#EXT-X-INDEPENDENT-SEGMENTS']
+    for bitrate_kbps in bitrates_kbps:
+        peak, average = _measured_bandwidth(os.path.join(directory, f'{bitrate_kbps}k'))
+        lines.append(
+            f'#EXT-X-STREAM-INF:BANDWIDTH={peak or bitrate_kbps * 1000},'
+            f'AVERAGE-BANDWIDTH={average or bitrate_kbps * 1000},CODECS="{AUDIO_CODEC}"'
+        )
+        lines.append(f'{bitrate_kbps}k/{MEDIA_PLAYLIST}')
+    with open(os.path.join(directory, MASTER_PLAYLIST), 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+def package_chapter(chapter, bitrates_kbps=None):
+    """
+    Packages the chapter's local audio file, loudness-normalized, and returns
+    the package name. An existing package of the same audio is reused as is.
+    """
+    bitrates_kbps = sorted(bitrates_kbps or BITRATES_KBPS)
+    source_path = chapter.audio_file.path
+    package = package_name(chapter.pk, _file_digest(source_path))
+    final_dir = package_dir(package)
+    if os.path.exists(os.path.join(final_dir, MASTER_PLAYLIST)):
+        logger.info(f"HLS package {package} of Chapter ID {chapter.pk} already exists")
+        return package
+
+    try:
+        measurement = transcoding.measure_loudness(source_path)
+    except transcoding.TranscodingError as e:
+        raise PackagingError(f"Could not measure the loudness of Chapter ID {chapter.pk}: {e}") from e
+
+    work_dir = f'{final_dir}.tmp-{uuid.uuid4().hex[:8]}'
+    try:
+        for bitrate_kbps in bitrates_kbps:
+            _encode_rendition(source_path, os.path.join(work_dir, f'{bitrate_kbps}k'), bitrate_kbps, measurement)
+        _write_master_playlist(work_dir, bitrates_kbps)
+        os.replace(work_dir, final_dir)
+    except OSError as e:
+        # Renaming fails when another worker has just put the same package in place
+        if not os.path.exists(os.path.join(final_dir, MASTER_PLAYLIST)):
+            raise PackagingError(f"Could not write HLS package {package}: {e}") from e
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    logger.info(f"Packaged Chapter ID {chapter.pk} for HLS as {package} ({', '.join(f'{b}k' for b in bitrates_kbps)})")
+    return package
@@ -0,0 +1,159 @@
+# AudioXApp/services/http_ranges.py
+
+"""
+Range and conditional request handling for audio responses (RFC 9110).
+
+``build_response`` answers a request for a resource of known size from a
+``read_range(start, end)`` async byte iterator, with:
+
+- strong validators: the ETag and Last-Modified given by the caller
+  (``file_validators`` derives them from a file's size and mtime);
+- conditional requests: If-None-Match / If-Modified-Since answer 304 and
+  If-Match / If-Unmodified-Since 412, through Django's
+  ``get_conditional_response``;
+- ranges: ``bytes=a-b``, open ``bytes=a-`` and suffix ``bytes=-n`` specs,
+  several ranges in one request (coalesced, then sent as
+  ``multipart/byteranges`` if more than one remains), 416 when none is
+  satisfiable, and If-Range, which only honours the Range header while the
+  client's validator still matches.
+
+Used by ``stream_audio`` for local files and for external audio served from
+the chunk cache alike.
+"""
+
+import os
+import uuid
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+# A Range header asking for more pieces than this is ignored (the whole file is sent)
+MAX_RANGES = 16
+
+
+def file_validators(path):
+    """``(size, etag, last_modified)`` of a file; the strong ETag changes with its size or mtime."""
+    stat = os.stat(path)
+    return stat.st_size, f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"', int(stat.st_mtime)
+
+
+def parse_range_header(header, size):
+    """
+    The byte ranges ``[(start, end), ...]`` (inclusive, sorted and coalesced)
+    asked for by a Range header on a resource of ``size`` bytes. None if the
+    header is absent, malformed or not in bytes (to be ignored); an empty
+    list if no range is satisfiable.
+    """
+    if not header or not header.startswith('bytes='):
+        return None
+    ranges = []
+    for spec in header[len('bytes='):].split(','):
+        spec = spec.strip()
+        if not spec:
+            continue
+        first, dash, last = spec.partition('-')
+        first, last = first.strip(), last.strip()
+        if not dash:
+            return None
+        if not first:
+            # Suffix range: the last ``last`` bytes
+            if not last.isdigit():
+                return None
+            length = int(last)
+            if length and size:
+                ranges.append((max(size - length, 0), size - 1))
+            continue
+        if not first.isdigit() or (last and not last.isdigit()):
+            return None
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        if start < size:
+            ranges.append((start, min(int(last), size - 1) if last else size - 1))
+    if len(ranges) > MAX_RANGES:
+        return None
+
+    coalesced = []
+    for start, end in sorted(ranges):
+        if coalesced and start <= coalesced[-1][1] + 1:
+            coalesced[-1] = (coalesced[-1][0], max(end, coalesced[-1][1]))
+        else:
+            coalesced.append((start, end))
+    return coalesced
+
+
+def if_range_allows(request, etag, last_modified):
+    """Whether the Range header applies: no If-Range, or one naming the current representation."""
+    value = request.headers.get('If-Range')
+    if not value:
+        return True
+    if value.startswith(('"', 'W/"')):
+        # Only a strong comparison counts
+        return bool(etag) and not etag.startswith('W/') and value == etag
+    date = parse_http_date_safe(value)
+    return date is not None and last_modified is not None and date == last_modified
+
+
+def _set_validators(response, etag, last_modified):
+    response['Accept-Ranges'] = 'bytes'
+    if etag:
+        response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+async def _multipart_body(ranges, read_range, part_headers, closing):
+    for (start, end), headers in zip(ranges, part_headers):
+        yield headers
+        async for chunk in read_range(start, end):
+            yield chunk
+    yield closing
+
+
+def build_response(request, size, content_type, read_range, etag=None, last_modified=None):
+    """
+    The response to a GET for a ``size`` byte resource, whose bytes
+    ``start..end`` (inclusive) ``read_range(start, end)`` yields.
+    ``last_modified`` is a UNIX timestamp.
+    """
+    conditional_response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if conditional_response is not None:
+        return _set_validators(conditional_response, etag, last_modified)
+
+    ranges = None
+    if if_range_allows(request, etag, last_modified):
+        ranges = parse_range_header(request.headers.get('Range'), size)
+
+    if ranges == []:
+        response = HttpResponse("Requested range not satisfiable", status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return _set_validators(response, etag, last_modified)
+
+    if not ranges:
+        response = StreamingHttpResponse(read_range(0, size - 1), content_type=content_type) if size else HttpResponse(content_type=content_type)
+        response['Content-Length'] = str(size)
+        return _set_validators(response, etag, last_modified)
+
+    if len(ranges) == 1:
+        start, end = ranges[0]
+        response = StreamingHttpResponse(read_range(start, end), content_type=content_type, status=206)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+        return _set_validators(response, etag, last_modified)
+
+    boundary = uuid.uuid4().hex
+    part_headers = [
+        f'\r\n--{boundary}\r\nContent-Type: {content_type}\r\nContent-Range: bytes {start}-{end}/{size}\r\n\r\n'.encode('ascii')
+        for start, end in ranges
+    ]
+    closing = f'\r\n--{boundary}--\r\n'.encode('ascii')
+    content_length = sum(len(headers) for headers in part_headers) + len(closing) + sum(end - start + 1 for start, end in ranges)
+    response = StreamingHttpResponse(
+        _multipart_body(ranges, read_range, part_headers, closing),
+        content_type=f'multipart/byteranges; boundary={boundary}',
+        status=206
+    )
+    response['Content-Length'] = str(content_length)
+    return _set_validators(response, etag, last_modified)
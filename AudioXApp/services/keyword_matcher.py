@@ -0,0 +1,188 @@
+# AudioXApp/services/keyword_matcher.py
+
+"""
+Compiled banned-keyword matching for content moderation.
+
+A ``KeywordMatcher`` is built once per keyword list and finds every banned
+keyword in a transcript in two stages:
+
+- Exact: an Aho-Corasick automaton over word tokens finds every keyword
+  (single words and multi-word phrases alike) in one pass over the
+  transcript, whatever the number of keywords.
+- Approximate: every distinct word (and, for phrases of ``k`` words, every
+  distinct run of ``k`` words) is compared with RapidFuzz against only the
+  keywords whose length could reach the similarity threshold at all. A
+  transcript repeats most of its words, so this costs distinct units times
+  a few candidates instead of words times keywords.
+
+Hits carry their character offsets in the original transcript.
+``compiled_matcher`` keeps one matcher per keyword list in the process,
+keyed by the list's ``rules_version`` hash, so a matcher is only rebuilt
+after ``BannedKeyword`` rows change.
+"""
+
+import hashlib
+import logging
+import math
+import re
+from collections import defaultdict, deque
+
+from rapidfuzz import fuzz, process
+
+logger = logging.getLogger(__name__)
+
+SIMILARITY_THRESHOLD = 80
+MAX_COMPILED_MATCHERS = 16
+
+WORD_RE = re.compile(r'\w+')
+
+
+def tokenize(text):
+    """``(token, start, end)`` for every word of ``text``, lower-cased, with offsets into ``text``."""
+    return [(match.group().lower(), match.start(), match.end()) for match in WORD_RE.finditer(text)]
+
+
+def rules_version(keywords):
+    """A short hash identifying a keyword list, independent of its order."""
+    digest = hashlib.sha256('\n'.join(sorted(set(keywords))).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+class TokenAutomaton:
+    """Aho-Corasick automaton whose alphabet is word tokens."""
+
+    def __init__(self, phrases):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for index, tokens in enumerate(phrases):
+            state = 0
+            for token in tokens:
+                next_state = self.goto[state].get(token)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                    self.goto[state][token] = next_state
+                state = next_state
+            self.output[state].append(index)
+
+        # Breadth-first, so every state's failure state is final before its children need it
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and token not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(token, 0)
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+
+    def iter_matches(self, tokens):
+        """``(end_index, phrase_index)`` for every phrase occurring in ``tokens``."""
+        state = 0
+        for position, token in enumerate(tokens):
+            while state and token not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(token, 0)
+            for phrase_index in self.output[state]:
+                yield position, phrase_index
+
+
+class KeywordMatcher:
+    def __init__(self, keywords, threshold=SIMILARITY_THRESHOLD):
+        self.keywords = sorted({' '.join(WORD_RE.findall(keyword.lower())) for keyword in keywords} - {''})
+        self.version = rules_version(keywords)
+        self.threshold = threshold
+        self.phrases = [tuple(keyword.split()) for keyword in self.keywords]
+        self.automaton = TokenAutomaton(self.phrases)
+
+        # Keywords by word count, then by length, for the approximate stage
+        self.by_size = defaultdict(lambda: defaultdict(list))
+        for keyword, phrase in zip(self.keywords, self.phrases):
+            self.by_size[len(phrase)][len(keyword)].append(keyword)
+        self._candidates = {}
+
+        # thefuzz rounded scores to whole numbers, so 79.5 used to count as 80
+        self.score_cutoff = threshold - 0.5
+        # ratio = 2 * matches / (len(a) + len(b)) can only reach the cutoff within these length ratios
+        cutoff = self.score_cutoff / 100
+        self.min_length_ratio = cutoff / (2 - cutoff)
+        self.max_length_ratio = (2 - cutoff) / cutoff
+
+    def __len__(self):
+        return len(self.keywords)
+
+    def candidates(self, word_count, length):
+        """Keywords of ``word_count`` words whose length could match a unit of ``length`` characters."""
+        key = (word_count, length)
+        if key not in self._candidates:
+            by_length = self.by_size[word_count]
+            low = math.ceil(length * self.min_length_ratio)
+            high = math.floor(length * self.max_length_ratio)
+            self._candidates[key] = [keyword for size in range(low, high + 1) for keyword in by_length.get(size, ())]
+        return self._candidates[key]
+
+    def find_all(self, text):
+        """
+        Every banned keyword found in ``text``, in order of position: dicts of
+        ``keyword``, ``matched`` (the transcript words), ``score`` (100 for
+        exact matches), ``exact``, ``word_index`` and the ``start``/``end``
+        character offsets in ``text``.
+        """
+        tokens = tokenize(text)
+        words = [token for token, _start, _end in tokens]
+        hits = {}
+
+        def add_hit(first, last, keyword, score):
+            span = (first, keyword)
+            if span not in hits:
+                hits[span] = {
+                    'keyword': keyword,
+                    'matched': text[tokens[first][1]:tokens[last][2]],
+                    'score': round(score, 1),
+                    'exact': score == 100,
+                    'word_index': first,
+                    'start': tokens[first][1],
+                    'end': tokens[last][2],
+                }
+
+        for last, phrase_index in self.automaton.iter_matches(words):
+            phrase = self.phrases[phrase_index]
+            add_hit(last - len(phrase) + 1, last, self.keywords[phrase_index], 100)
+
+        for word_count in self.by_size:
+            # Distinct runs of ``word_count`` words and where they start
+            positions = defaultdict(list)
+            for first in range(len(words) - word_count + 1):
+                positions[' '.join(words[first:first + word_count])].append(first)
+            for unit, firsts in positions.items():
+                candidates = self.candidates(word_count, len(unit))
+                if not candidates:
+                    continue
+                for keyword, score, _index in process.extract(unit, candidates, scorer=fuzz.ratio,
+                                                              score_cutoff=self.score_cutoff, limit=None):
+                    if keyword == unit:
+                        continue  # Found by the automaton
+                    for first in firsts:
+                        add_hit(first, first + word_count - 1, keyword, score)
+
+        return sorted(hits.values(), key=lambda hit: (hit['start'], -hit['score']))
+
+
+# version -> KeywordMatcher, for this process
+_compiled = {}
+
+
+def compiled_matcher(keywords, threshold=SIMILARITY_THRESHOLD):
+    """The matcher for ``keywords``, built on first use and reused until the list changes."""
+    key = (rules_version(keywords), threshold)
+    matcher = _compiled.get(key)
+    if matcher is None:
+        if len(_compiled) >= MAX_COMPILED_MATCHERS:
+            _compiled.clear()
+        matcher = _compiled[key] = KeywordMatcher(keywords, threshold)
+        logger.info(f"Compiled banned keyword matcher {key[0]} for {len(matcher)} keywords")
+    return matcher
@@ -0,0 +1,57 @@
+# AudioXApp/services/media_offload.py
+
+"""
+Hands local media files to the front proxy once the view has authorized the
+request, so the bytes are sent by the proxy (with sendfile) instead of
+passing through a Python worker.
+
+``MEDIA_OFFLOAD_MODE`` selects the header understood by the proxy:
+
+- ``'x-accel-redirect'`` (nginx): the file is addressed under
+  ``MEDIA_OFFLOAD_INTERNAL_PREFIX``, which nginx must map to MEDIA_ROOT in
+  an internal location, e.g.::
+
+      location /protected-media/ {
+          internal;
+          alias /app/media/;
+      }
+
+- ``'x-sendfile'`` (Apache mod_xsendfile, lighttpd): the file is addressed by
+  its absolute path.
+
+The proxy answers Range and conditional requests itself. With no mode set
+(the default, e.g. under runserver) the view streams the file itself.
+"""
+
+import logging
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import HttpResponse
+
+logger = logging.getLogger(__name__)
+
+X_ACCEL_REDIRECT = 'x-accel-redirect'
+X_SENDFILE = 'x-sendfile'
+
+MODE = (getattr(settings, 'MEDIA_OFFLOAD_MODE', '') or '').lower()
+INTERNAL_PREFIX = getattr(settings, 'MEDIA_OFFLOAD_INTERNAL_PREFIX', '/protected-media/')
+
+
+def offload_response(file_path, relative_path, content_type):
+    """
+    An empty response telling the proxy to send ``file_path`` (``relative_path``
+    under MEDIA_ROOT), or None when offloading is not configured.
+    """
+    if MODE == X_ACCEL_REDIRECT:
+        header, value = 'X-Accel-Redirect', quote(INTERNAL_PREFIX.rstrip('/') + '/' + relative_path.lstrip('/'))
+    elif MODE == X_SENDFILE:
+        header, value = 'X-Sendfile', file_path
+    else:
+        return None
+
+    response = HttpResponse(content_type=content_type)
+    response[header] = value
+    response['Accept-Ranges'] = 'bytes'
+    logger.debug(f"Offloading {relative_path} to the proxy with {header}")
+    return response
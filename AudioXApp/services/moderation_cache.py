@@ -0,0 +1,89 @@
+# AudioXApp/services/moderation_cache.py
+
+"""
+Moderation results cached by content.
+
+A chapter's content is identified by the SHA-256 of its audio file or, for
+text-to-speech chapters, of the text it was synthesized from (whose
+transcript is that text, so those never need speech-to-text at all). Each
+entry holds the transcript and the verdict reached under a rules version
+(see ``moderation_service.rules_version``): while the banned keywords of the
+language are unchanged the verdict is reused as is; after they change the
+transcript is reused and only the analysis runs again.
+
+Re-uploads of the same audio and edits that keep a chapter's audio therefore
+skip the paid transcription and analysis calls. Only verdicts reached by
+analysis are cached, never failures.
+"""
+
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import disk_cache
+
+logger = logging.getLogger(__name__)
+
+ENABLED = getattr(settings, 'MODERATION_CACHE_ENABLED', True)
+TIMEOUT = getattr(settings, 'MODERATION_CACHE_TIMEOUT', 30 * 24 * 3600)
+KEY_PREFIX = 'moderation_result'
+
+METRICS_KEY_PREFIX = 'moderation_cache_metrics'
+METRIC_NAMES = ('verdict_hits', 'transcript_hits', 'misses')
+_counters = disk_cache.Counters(METRICS_KEY_PREFIX, METRIC_NAMES)
+
+
+def text_digest(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def file_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.file_digest(f, 'sha256').hexdigest()
+
+
+def content_key(chapter):
+    """
+    The cache key of the chapter's content: its source text for TTS chapters,
+    else its audio file. None if the chapter has neither.
+    """
+    if chapter.is_tts_generated and chapter.text_content:
+        return f'{KEY_PREFIX}:text:{text_digest(chapter.text_content)}'
+    if chapter.audio_file:
+        try:
+            return f'{KEY_PREFIX}:audio:{file_digest(chapter.audio_file.path)}'
+        except (OSError, ValueError, NotImplementedError) as e:
+            logger.warning(f"Could not hash the audio of Chapter ID {chapter.chapter_id}: {e}")
+    return None
+
+
+def get(key):
+    if not ENABLED or key is None:
+        return None
+    return cache.get(key)
+
+
+def put(key, transcript, rules_version, moderation_status, moderation_notes):
+    if not ENABLED or key is None:
+        return
+    cache.set(key, {
+        'transcript': transcript,
+        'rules_version': rules_version,
+        'moderation_status': str(moderation_status),
+        'moderation_notes': moderation_notes,
+    }, TIMEOUT)
+
+
+def record(outcome):
+    """Counts a lookup as ``verdict_hits``, ``transcript_hits`` or ``misses``."""
+    _counters.record(**{outcome: 1})
+
+
+def get_metrics():
+    metrics = _counters.get()
+    lookups = sum(metrics.values())
+    metrics['verdict_hit_ratio'] = disk_cache.ratio(metrics['verdict_hits'], lookups)
+    metrics['stt_skip_ratio'] = disk_cache.ratio(metrics['verdict_hits'] + metrics['transcript_hits'], lookups)
+    return metrics
@@ -2,21 +2,19 @@
 
 import logging
 import os
-import re 
 from django.conf import settings
 from django.core.cache import cache
-from google.cloud import speech
 from google.api_core import exceptions as google_exceptions
 from google.cloud import language_v1
 
-# NEW: Import the fuzzy matching library
-from thefuzz import fuzz
-
 from ..models import BannedKeyword
+from . import disk_cache, keyword_matcher
+from .transcription.backends import TranscriptionError
+from .transcription.engine import transcribe_file
 
 logger = logging.getLogger(__name__)
 
-# --- Language & Audio Mappings (No changes here) ---
+# --- Language Mappings ---
 LANGUAGE_CODE_MAPPING = {
     'English': 'en-US',
     'Urdu': 'ur-PK',
@@ -24,12 +22,32 @@ LANGUAGE_CODE_MAPPING = {
     'Sindhi': 'sd-IN', 
 }
 
-AUDIO_ENCODING_MAPPING = {
-    '.mp3': speech.RecognitionConfig.AudioEncoding.MP3,
-    '.wav': speech.RecognitionConfig.AudioEncoding.LINEAR16,
-    '.ogg': speech.RecognitionConfig.AudioEncoding.OGG_OPUS,
-    '.m4a': speech.RecognitionConfig.AudioEncoding.MP3,
-}
+# --- Pipeline Metrics ---
+# Per stage: the number of chapters timed and their total in milliseconds
+METRICS_KEY_PREFIX = 'moderation_metrics'
+TIMED_STAGES = ('queue_wait', 'transcription', 'analysis')
+_counters = disk_cache.Counters(
+    METRICS_KEY_PREFIX,
+    [f'{stage}_{suffix}' for stage in TIMED_STAGES for suffix in ('count', 'ms')],
+)
+
+
+def record_chapter_timings(**timings):
+    """Adds one chapter's stage durations, in seconds, to the pipeline metrics."""
+    counts = {}
+    for stage, seconds in timings.items():
+        if stage in TIMED_STAGES:
+            counts[f'{stage}_count'] = 1
+            counts[f'{stage}_ms'] = int(seconds * 1000)
+    _counters.record(**counts)
+
+
+def get_metrics():
+    metrics = _counters.get()
+    for stage in TIMED_STAGES:
+        count = metrics[f'{stage}_count']
+        metrics[f'{stage}_avg_seconds'] = round(metrics[f'{stage}_ms'] / count / 1000, 3) if count else None
+    return metrics
 
 # --- _get_banned_keywords_for_language (No changes here) ---
 def _get_banned_keywords_for_language(language_name):
@@ -50,88 +68,80 @@ def _get_banned_keywords_for_language(language_name):
     
     return keywords
 
-# --- transcribe_audio (No changes here) ---
+# --- transcribe_audio ---
 def transcribe_audio(audio_file_path, language_name='English'):
+    """
+    Transcribes a chapter of any length through the chunked transcription
+    engine (see ``services.transcription``). Besides the transcript, returns
+    its ``segments`` with their start and end times in seconds.
+    """
     logger.info(f"Attempting transcription for '{audio_file_path}' with language '{language_name}'")
-    
-    if not settings.GOOGLE_APPLICATION_CREDENTIALS or not os.path.exists(settings.GOOGLE_APPLICATION_CREDENTIALS):
-        error_msg = "Google Cloud credentials file not found or not configured in settings.py. Cannot perform transcription."
-        logger.error(error_msg)
-        return {'success': False, 'transcript': None, 'error': error_msg}
 
     if not os.path.exists(audio_file_path):
         error_msg = f"Audio file not found at path: {audio_file_path}"
         logger.error(error_msg)
         return {'success': False, 'transcript': None, 'error': error_msg}
-        
+
+    gcp_language_code = LANGUAGE_CODE_MAPPING.get(language_name, 'en-US')
     try:
-        client = speech.SpeechClient.from_service_account_file(settings.GOOGLE_APPLICATION_CREDENTIALS)
-        with open(audio_file_path, "rb") as audio_file:
-            content = audio_file.read()
-        audio = speech.RecognitionAudio(content=content)
-        file_ext = os.path.splitext(audio_file_path)[1].lower()
-        encoding = AUDIO_ENCODING_MAPPING.get(file_ext)
-        gcp_language_code = LANGUAGE_CODE_MAPPING.get(language_name, 'en-US')
-        if not encoding:
-            error_msg = f"Unsupported audio format: '{file_ext}'. Cannot transcribe."
-            logger.error(error_msg)
-            return {'success': False, 'transcript': None, 'error': error_msg}
-        config = speech.RecognitionConfig(
-            encoding=encoding,
-            language_code=gcp_language_code,
-            enable_automatic_punctuation=True,
-        )
-        logger.info(f"Sending audio file to Google STT API. Encoding: {encoding}, Language: {gcp_language_code}")
-        response = client.recognize(config=config, audio=audio)
-        transcript = "".join(result.alternatives[0].transcript for result in response.results)
-        logger.info(f"Transcription successful for '{os.path.basename(audio_file_path)}'. Transcript length: {len(transcript)} chars.")
-        return {'success': True, 'transcript': transcript, 'error': None}
+        result = transcribe_file(audio_file_path, gcp_language_code)
+    except TranscriptionError as e:
+        logger.error(f"Transcription of '{audio_file_path}' failed: {e}")
+        return {'success': False, 'transcript': None, 'error': str(e)}
     except Exception as e:
-        error_msg = "An unexpected error occurred during the Google Speech-to-Text API call."
+        error_msg = "An unexpected error occurred during the Speech-to-Text transcription."
         logger.error(f"{error_msg} - Original error: {e}", exc_info=True)
         return {'success': False, 'transcript': None, 'error': str(e)}
 
+    transcript = result['transcript']
+    logger.info(f"Transcription successful for '{os.path.basename(audio_file_path)}'. Transcript length: {len(transcript)} chars.")
+    return {'success': True, 'transcript': transcript, 'segments': result['segments'], 'error': None}
+
+
+def get_keyword_matcher(language_name):
+    """The compiled banned keyword matcher for ``language_name``; rebuilt only when its keywords change."""
+    return keyword_matcher.compiled_matcher(_get_banned_keywords_for_language(language_name))
+
+
+def rules_version(language_name):
+    """
+    Identifies the rules a verdict is reached under: the language's banned
+    keywords and whether sentiment analysis is configured.
+    """
+    sentiment_configured = bool(settings.GOOGLE_APPLICATION_CREDENTIALS) and os.path.exists(settings.GOOGLE_APPLICATION_CREDENTIALS)
+    return f"{get_keyword_matcher(language_name).version}:{'sentiment' if sentiment_configured else 'keywords'}"
+
 
 def analyze_text(transcript_text, language_name):
     """
-    Analyzes a transcript for banned keywords using fuzzy matching
+    Analyzes a transcript for banned keywords using exact and fuzzy matching
     and for negative sentiment.
-    Returns a dictionary: {'is_inappropriate': bool, 'details': str}
+    Returns a dictionary: {'is_inappropriate': bool, 'details': str, 'keyword_hits': list}
     """
-    # --- Pass 1: Banned Keyword Check (with Fuzzy Matching) ---
-    banned_keywords = _get_banned_keywords_for_language(language_name)
-    
-    normalized_transcript = ' ' + re.sub(r'[^\w\s]', ' ', transcript_text.lower()) + ' '
-    normalized_transcript = re.sub(r'\s+', ' ', normalized_transcript)
-
-    logger.info("--- Moderation Check (Fuzzy) ---")
-    logger.info(f"Language: {language_name}")
-    logger.info(f"Banned Keywords Fetched: {banned_keywords}")
+    # --- Pass 1: Banned Keyword Check (Exact + Fuzzy Matching) ---
+    matcher = get_keyword_matcher(language_name)
 
-    # ADDED THIS LINE FOR DEBUGGING: Let's see the exact text being checked.
-    logger.info(f"Normalized Transcript for Matching: '{normalized_transcript}'")
+    logger.info("--- Moderation Check (Keywords) ---")
+    logger.info(f"Language: {language_name}, {len(matcher)} banned keywords (rules {matcher.version})")
 
-    SIMILARITY_THRESHOLD = 80
-    
-    if not banned_keywords:
+    if not len(matcher):
         logger.info("No banned keywords configured for this language. Skipping keyword check.")
     else:
-        transcript_words = normalized_transcript.strip().split()
-
-        for banned_word in banned_keywords:
-            for transcript_word in transcript_words:
-                similarity_score = fuzz.ratio(banned_word, transcript_word)
-                
-                if similarity_score >= SIMILARITY_THRESHOLD:
-                    logger.warning(
-                        f"BANNED KEYWORD FOUND (Fuzzy Match): Keyword '{banned_word}' is "
-                        f"{similarity_score}% similar to transcript word '{transcript_word}'. Flagging for review."
-                    )
-                    return {
-                        'is_inappropriate': True,
-                        'details': f"Content flagged for potential banned keyword. Found '{transcript_word}' which is highly similar to '{banned_word}'."
-                    }
-            
+        hits = matcher.find_all(transcript_text)
+        if hits:
+            first = hits[0]
+            logger.warning(
+                f"BANNED KEYWORDS FOUND: {len(hits)} match(es). First: keyword '{first['keyword']}' is "
+                f"{first['score']}% similar to '{first['matched']}' at character {first['start']}. Flagging for review."
+            )
+            found = ', '.join(f"'{hit['matched']}' (~'{hit['keyword']}')" for hit in hits[:5])
+            more = f" and {len(hits) - 5} more" if len(hits) > 5 else ""
+            return {
+                'is_inappropriate': True,
+                'details': f"Content flagged for potential banned keywords. Found {found}{more}.",
+                'keyword_hits': hits,
+            }
+
     # --- Pass 2: Sentiment Analysis (No changes here) ---
     if not settings.GOOGLE_APPLICATION_CREDENTIALS or not os.path.exists(settings.GOOGLE_APPLICATION_CREDENTIALS):
         logger.warning("Google Cloud credentials not configured. Skipping sentiment analysis.")
@@ -0,0 +1,140 @@
+# AudioXApp/services/search_engine.py
+
+"""
+Ranked audiobook search for the search results page.
+
+On PostgreSQL every audiobook carries a stored ``search_vector`` (title A,
+author and creator name B, genre C, description D) behind a GIN index, and the
+title has a pg_trgm GIN index. A query matches rows whose vector satisfies the
+web-style ``SearchQuery`` or whose title is trigram-similar to it (typos), and
+rows are ranked in the database by ``SearchRank`` plus title similarity, so
+only the requested page is ever fetched.
+
+Other backends (SQLite in development) fall back to ``icontains`` matching
+with the same weights expressed as a ``Case`` / ``When`` relevance score.
+"""
+
+import logging
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramSimilarity
+from django.db import connection
+from django.db.models import Case, F, FloatField, OuterRef, Q, Subquery, Value, When
+
+from ..models import Audiobook, Creator
+
+logger = logging.getLogger(__name__)
+
+SEARCH_CONFIG = getattr(settings, 'AUDIOBOOK_SEARCH_CONFIG', 'simple')
+
+# Fields that feed the stored vector; saves touching none of them leave it alone.
+SEARCH_VECTOR_SOURCE_FIELDS = {'title', 'author', 'genre', 'description', 'creator', 'creator_id'}
+
+
+def is_full_text_enabled():
+    return connection.vendor == 'postgresql' and getattr(settings, 'AUDIOBOOK_FULL_TEXT_SEARCH', True)
+
+
+def audiobook_search_vector():
+    """The weighted vector expression stored in ``Audiobook.search_vector``."""
+    creator_name = Subquery(Creator.objects.filter(pk=OuterRef('creator_id')).values('creator_name')[:1])
+    return (
+        SearchVector('title', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('author', weight='B', config=SEARCH_CONFIG)
+        + SearchVector(creator_name, weight='B', config=SEARCH_CONFIG)
+        + SearchVector('genre', weight='C', config=SEARCH_CONFIG)
+        + SearchVector('description', weight='D', config=SEARCH_CONFIG)
+    )
+
+
+def refresh_search_vectors(queryset):
+    """Recomputes the stored vectors of ``queryset`` in one UPDATE. No-op off PostgreSQL."""
+    if not is_full_text_enabled():
+        return 0
+    return queryset.update(search_vector=audiobook_search_vector())
+
+
+def _filtered_audiobooks(language_filter, genre_filter, creator_filter):
+    audiobooks = Audiobook.objects.filter(status='PUBLISHED')
+
+    if language_filter:
+        audiobooks = audiobooks.filter(language__iexact=language_filter)
+
+    if genre_filter:
+        audiobooks = audiobooks.filter(genre__icontains=genre_filter)
+
+    if creator_filter:
+        # Only apply creator filter to creator books
+        audiobooks = audiobooks.filter(
+            Q(is_creator_book=True) & (
+                Q(creator__creator_name__icontains=creator_filter) |
+                Q(creator__user__username__icontains=creator_filter) |
+                Q(creator__user__first_name__icontains=creator_filter) |
+                Q(creator__user__last_name__icontains=creator_filter)
+            )
+        )
+    return audiobooks
+
+
+def _full_text_search(audiobooks, query):
+    search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch')
+    return audiobooks.filter(
+        Q(search_vector=search_query) | Q(title__trigram_similar=query)
+    ).annotate(
+        relevance=SearchRank(F('search_vector'), search_query) + TrigramSimilarity('title', query)
+    )
+
+
+def _fallback_search(audiobooks, query):
+    """``icontains`` matching, scored in SQL (title 0.4, title prefix +0.2, author 0.2, the rest 0.1)."""
+    def weight(condition, value):
+        return Case(When(condition, then=Value(value)), default=Value(0.0), output_field=FloatField())
+
+    audiobooks = audiobooks.filter(
+        Q(title__icontains=query) |
+        Q(description__icontains=query) |
+        Q(author__icontains=query) |
+        Q(genre__icontains=query) |
+        Q(creator__creator_name__icontains=query)
+    )
+    return audiobooks.annotate(
+        relevance=(
+            weight(Q(title__icontains=query), 0.4)
+            + weight(Q(title__istartswith=query), 0.2)
+            + weight(Q(author__icontains=query), 0.2)
+            + weight(Q(genre__icontains=query), 0.1)
+            + weight(Q(creator__creator_name__icontains=query), 0.1)
+            + weight(Q(description__icontains=query), 0.1)
+            + weight(Q(total_views__gt=1000), 0.1)
+        )
+    )
+
+
+def search_audiobooks(query, language_filter=None, genre_filter=None, creator_filter=None):
+    """
+    Returns a queryset of published audiobooks matching ``query`` and the
+    filters, annotated with ``relevance`` and ordered by ``(-relevance,
+    -total_views, pk)``. With an empty query every filtered book matches with
+    the same relevance, so popularity decides the order.
+    """
+    audiobooks = _filtered_audiobooks(language_filter, genre_filter, creator_filter)
+
+    if not query:
+        audiobooks = audiobooks.annotate(relevance=Value(1.0, output_field=FloatField()))
+    elif is_full_text_enabled():
+        audiobooks = _full_text_search(audiobooks, query)
+    else:
+        audiobooks = _fallback_search(audiobooks, query)
+    return audiobooks.order_by('-relevance', '-total_views', 'pk')
+
+
+def rows_after(audiobooks, relevance, total_views, pk=None):
+    """
+    Keyset filter for the ``search_audiobooks`` order: rows strictly after
+    ``(relevance, total_views, pk)``. Without ``pk`` every row tied on
+    ``(relevance, total_views)`` counts as already seen.
+    """
+    after = Q(relevance__lt=relevance) | Q(relevance=relevance, total_views__lt=total_views)
+    if pk is not None:
+        after |= Q(relevance=relevance, total_views=total_views, pk__gt=pk)
+    return audiobooks.filter(after)
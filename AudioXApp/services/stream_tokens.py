@@ -0,0 +1,67 @@
+# AudioXApp/services/stream_tokens.py
+
+"""
+Signed, expiring playback tokens for ``stream_audio``.
+
+The audiobook page authorizes every chapter when it renders, so it mints a
+token for each accessible chapter and adds it to the chapter's stream URL.
+The token is an HMAC (keyed by SECRET_KEY) over the chapter id, the user id,
+the byte source (the ``url`` the stream serves) and an expiry time. Every
+Range request the player then sends for that URL is authorized by checking
+the signature and ``matches_request``: the token's user must be the one
+logged in to the session (read from the session, without loading the user)
+and its chapter the one the request names, so a shared URL is no use to
+anyone else. Without a matching token (expired, minted for someone else, or
+an URL built elsewhere) ``stream_audio`` falls back to the full access check.
+"""
+
+import time
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+QUERY_PARAM = 'st'
+TTL_SECONDS = getattr(settings, 'STREAM_TOKEN_TTL_SECONDS', 6 * 3600)
+KEY_SALT = 'AudioXApp.stream_tokens'
+
+
+def _signature(chapter_id, user_id, source, expires):
+    message = f'{chapter_id}:{user_id}:{expires}:{source}'
+    return salted_hmac(KEY_SALT, message, algorithm='sha256').hexdigest()
+
+
+def mint(chapter_id, user_id, source, ttl=TTL_SECONDS):
+    """A token allowing ``user_id`` (None for anonymous) to stream ``source`` as chapter ``chapter_id``."""
+    user_id = user_id or ''
+    expires = int(time.time()) + ttl
+    return f'{chapter_id}.{user_id}.{expires}.{_signature(chapter_id, user_id, source, expires)}'
+
+
+def verify(token, source):
+    """
+    The token's claims (``chapter_id``, ``user_id``, ``expires``) if it is
+    correctly signed for ``source`` and not expired, else None.
+    """
+    try:
+        chapter_id, user_id, expires, signature = token.split('.')
+        expires = int(expires)
+    except (AttributeError, ValueError):
+        return None
+    if expires < time.time():
+        return None
+    if not constant_time_compare(signature, _signature(chapter_id, user_id, source, expires)):
+        return None
+    return {'chapter_id': chapter_id, 'user_id': user_id or None, 'expires': expires}
+
+
+def matches_request(claims, request, chapter_id=None):
+    """
+    Whether verified ``claims`` were minted for the session's user (None for
+    anonymous) and, when the request names one, for ``chapter_id``. Reads the
+    session, so call it off the event loop in async views.
+    """
+    session_user_id = request.session.get(SESSION_KEY)
+    if claims['user_id'] != (str(session_user_id) if session_user_id is not None else None):
+        return False
+    return chapter_id is None or claims['chapter_id'] == str(chapter_id)
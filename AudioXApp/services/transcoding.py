@@ -0,0 +1,168 @@
+# AudioXApp/services/transcoding.py
+
+"""
+Loudness-normalized renditions of uploaded chapter audio.
+
+Creators upload whatever ``audio_utils.get_audio_duration`` can parse,
+lossless WAV and FLAC included. ``transcode`` measures the upload's loudness
+with ffmpeg's ``loudnorm`` filter (EBU R128), then encodes one AAC rendition
+(``.m4a``, moov atom first so it streams progressively) per profile of
+``AUDIO_RENDITION_PROFILES``, normalized to ``AUDIO_LOUDNESS_TARGET_LUFS`` with
+the measured values (two-pass, linear normalization). A rendition that is not
+smaller than the upload is dropped: the upload itself is then served.
+
+``select_profile`` picks the profile for a client from its network hints
+(``Save-Data``, ``ECT``, ``Downlink``); ``Chapter.get_streaming_source`` falls
+back to the upload when the chapter has no rendition for that profile.
+
+The ``transcode_chapter_audio`` task runs on the ``AUDIO_TRANSCODING_QUEUE``
+Celery queue, whose worker concurrency caps the ffmpeg processes running at
+once. Source and served bytes are counted, to report the bytes saved.
+"""
+
+import json
+import logging
+import os
+import subprocess
+
+from django.conf import settings
+
+from . import disk_cache
+
+logger = logging.getLogger(__name__)
+
+ENABLED = getattr(settings, 'AUDIO_TRANSCODING_ENABLED', True)
+PROFILES = getattr(settings, 'AUDIO_RENDITION_PROFILES', {'low': 48, 'medium': 96})
+DEFAULT_PROFILE = getattr(settings, 'AUDIO_RENDITION_DEFAULT_PROFILE', 'medium')
+LOW_BANDWIDTH_PROFILE = 'low'
+TARGET_LUFS = getattr(settings, 'AUDIO_LOUDNESS_TARGET_LUFS', -18.0)
+TRUE_PEAK_DB = getattr(settings, 'AUDIO_LOUDNESS_TRUE_PEAK_DB', -1.5)
+LOUDNESS_RANGE = getattr(settings, 'AUDIO_LOUDNESS_RANGE', 11.0)
+FFMPEG_PATH = getattr(settings, 'AUDIO_TRANSCODING_FFMPEG_PATH', 'ffmpeg')
+FFMPEG_THREADS = getattr(settings, 'AUDIO_TRANSCODING_FFMPEG_THREADS', 1)
+
+CODEC = 'aac'
+EXTENSION = '.m4a'
+SAMPLE_RATE = 44100
+# Renditions at or below this bitrate are encoded in mono, which suits speech
+MONO_MAX_KBPS = 64
+
+# Effective connection types (Network Information API) served the low profile
+LOW_BANDWIDTH_ECT = {'slow-2g', '2g', '3g'}
+LOW_BANDWIDTH_DOWNLINK_MBPS = 1.0
+CLIENT_HINTS = 'ECT, Downlink, Save-Data'
+
+METRICS_KEY_PREFIX = 'audio_transcoding_metrics'
+METRIC_NAMES = ('chapters', 'renditions', 'source_bytes', 'served_bytes')
+_counters = disk_cache.Counters(METRICS_KEY_PREFIX, METRIC_NAMES)
+
+
+class TranscodingError(Exception):
+    """ffmpeg is missing or failed to measure or encode the audio."""
+
+
+def _run_ffmpeg(arguments, action):
+    command = [FFMPEG_PATH, '-nostdin', '-hide_banner', '-threads', str(FFMPEG_THREADS), *arguments]
+    try:
+        return subprocess.run(command, capture_output=True, check=True)
+    except FileNotFoundError as e:
+        raise TranscodingError(f"ffmpeg not found at '{FFMPEG_PATH}'") from e
+    except subprocess.CalledProcessError as e:
+        raise TranscodingError(f"ffmpeg failed to {action}: {e.stderr.decode(errors='replace').strip()[-500:]}") from e
+
+
+def _loudnorm_target():
+    return f'I={TARGET_LUFS}:TP={TRUE_PEAK_DB}:LRA={LOUDNESS_RANGE}'
+
+
+def measure_loudness(source_path):
+    """The first loudnorm pass: the upload's integrated loudness, true peak, range and threshold."""
+    result = _run_ffmpeg([
+        '-i', source_path, '-map', '0:a:0', '-vn',
+        '-af', f'loudnorm={_loudnorm_target()}:print_format=json',
+        '-f', 'null', '-',
+    ], 'measure loudness')
+    stderr = result.stderr.decode(errors='replace')
+    # loudnorm prints its JSON report last
+    try:
+        measurement = json.loads(stderr[stderr.rindex('{'):stderr.rindex('}') + 1])
+        return {name: float(measurement[name]) for name in ('input_i', 'input_tp', 'input_lra', 'input_thresh', 'target_offset')}
+    except (ValueError, KeyError) as e:
+        raise TranscodingError(f"Could not read the loudness measurement: {e}") from e
+
+
+def loudnorm_filter(measurement):
+    """The second loudnorm pass's filter, normalizing linearly with the measured values."""
+    return (
+        f"loudnorm={_loudnorm_target()}"
+        f":measured_I={measurement['input_i']}:measured_TP={measurement['input_tp']}"
+        f":measured_LRA={measurement['input_lra']}:measured_thresh={measurement['input_thresh']}"
+        f":offset={measurement['target_offset']}:linear=true"
+    )
+
+
+def encode(source_path, output_path, bitrate_kbps, measurement):
+    """The second loudnorm pass, encoding one rendition."""
+    _run_ffmpeg([
+        '-y', '-i', source_path, '-map', '0:a:0', '-vn', '-map_metadata', '-1',
+        '-af', loudnorm_filter(measurement),
+        '-c:a', CODEC, '-b:a', f'{bitrate_kbps}k',
+        '-ac', '1' if bitrate_kbps <= MONO_MAX_KBPS else '2', '-ar', str(SAMPLE_RATE),
+        '-movflags', '+faststart',
+        output_path,
+    ], f'encode the {bitrate_kbps}k rendition')
+
+
+def transcode(source_path, work_dir, profiles=None):
+    """
+    Encodes the renditions of ``source_path`` into ``work_dir``. Returns the
+    measured loudness (``integrated_lufs``) and the renditions smaller than
+    the source, each a dict of ``profile``, ``path``, ``codec``,
+    ``bitrate_kbps`` and ``size_bytes``.
+    """
+    profiles = profiles or PROFILES
+    source_size = os.path.getsize(source_path)
+    measurement = measure_loudness(source_path)
+
+    renditions = []
+    for profile, bitrate_kbps in sorted(profiles.items(), key=lambda item: item[1]):
+        output_path = os.path.join(work_dir, f'{profile}{EXTENSION}')
+        encode(source_path, output_path, bitrate_kbps, measurement)
+        size_bytes = os.path.getsize(output_path)
+        if size_bytes >= source_size:
+            logger.info(f"Dropping the {profile} rendition of {source_path}: {size_bytes} bytes, the source has {source_size}")
+            continue
+        renditions.append({
+            'profile': profile,
+            'path': output_path,
+            'codec': CODEC,
+            'bitrate_kbps': bitrate_kbps,
+            'size_bytes': size_bytes,
+        })
+    return {'integrated_lufs': measurement['input_i'], 'renditions': renditions}
+
+
+def select_profile(request):
+    """The rendition profile for the client: low on data saver or a slow connection, else the default."""
+    if request.headers.get('Save-Data', '').lower() == 'on':
+        return LOW_BANDWIDTH_PROFILE
+    if request.headers.get('ECT', '').lower() in LOW_BANDWIDTH_ECT:
+        return LOW_BANDWIDTH_PROFILE
+    try:
+        if float(request.headers.get('Downlink', '')) < LOW_BANDWIDTH_DOWNLINK_MBPS:
+            return LOW_BANDWIDTH_PROFILE
+    except ValueError:
+        pass
+    return DEFAULT_PROFILE
+
+
+def record(source_bytes, served_bytes, renditions):
+    """Counts a transcoded chapter: its upload size and the size served by default."""
+    _counters.record(chapters=1, renditions=renditions, source_bytes=source_bytes, served_bytes=served_bytes)
+
+
+def get_metrics():
+    metrics = _counters.get()
+    metrics['bytes_saved'] = metrics['source_bytes'] - metrics['served_bytes']
+    metrics['size_ratio'] = disk_cache.ratio(metrics['served_bytes'], metrics['source_bytes'])
+    return metrics
@@ -0,0 +1,151 @@
+# AudioXApp/services/transcription/backends.py
+
+"""
+Speech-to-text backends for the chunked transcription engine.
+
+A backend transcribes one ``AudioWindow`` through
+``transcribe(window, language_code)`` and returns its words as
+``(start_seconds, word)`` pairs, with times relative to the window's start.
+``google`` calls Google Cloud Speech-to-Text with one client per process;
+``stub`` makes up one word per second of audio without reading it, so the
+engine runs offline in tests and benchmarks. ``TRANSCRIPTION_BACKEND``
+selects the backend by name or by dotted path to a class of your own.
+"""
+
+import logging
+import math
+import os
+import subprocess
+import time
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from google.cloud import speech
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKEND = getattr(settings, 'TRANSCRIPTION_BACKEND', 'google')
+FFMPEG_PATH = getattr(settings, 'TRANSCRIPTION_FFMPEG_PATH', 'ffmpeg')
+SAMPLE_RATE_HERTZ = 16000
+
+
+class TranscriptionError(Exception):
+    """A window could not be transcribed."""
+
+
+class AudioWindow:
+    """The stretch ``start``..``end`` (seconds) of the audio file at ``path``."""
+
+    def __init__(self, path, index, start, end):
+        self.path = path
+        self.index = index
+        self.start = start
+        self.end = end
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+    def read_flac(self):
+        """The window decoded by ffmpeg to 16 kHz mono FLAC, as bytes."""
+        command = [
+            FFMPEG_PATH, '-nostdin', '-loglevel', 'error',
+            '-ss', f'{self.start:.3f}', '-t', f'{self.duration:.3f}', '-i', self.path,
+            '-vn', '-ac', '1', '-ar', str(SAMPLE_RATE_HERTZ), '-f', 'flac', 'pipe:1',
+        ]
+        try:
+            result = subprocess.run(command, capture_output=True, check=True)
+        except FileNotFoundError as e:
+            raise TranscriptionError(f"ffmpeg not found at '{FFMPEG_PATH}'") from e
+        except subprocess.CalledProcessError as e:
+            raise TranscriptionError(f"ffmpeg failed on window {self.index}: {e.stderr.decode(errors='replace').strip()}") from e
+        return result.stdout
+
+    def __repr__(self):
+        return f"<AudioWindow {self.index} {self.start:.1f}-{self.end:.1f}s>"
+
+
+# ==========================================
+# GOOGLE SPEECH-TO-TEXT
+# ==========================================
+
+# (pid, client): gRPC channels must not be shared across a fork, so a forked worker builds its own
+_google_client = (None, None)
+
+
+def get_google_client():
+    """The process's Speech-to-Text client, created on first use."""
+    global _google_client
+    pid, client = _google_client
+    if client is None or pid != os.getpid():
+        client = speech.SpeechClient.from_service_account_file(settings.GOOGLE_APPLICATION_CREDENTIALS)
+        _google_client = (os.getpid(), client)
+    return client
+
+
+class GoogleSpeechBackend:
+    name = 'google'
+
+    def __init__(self):
+        if not settings.GOOGLE_APPLICATION_CREDENTIALS or not os.path.exists(settings.GOOGLE_APPLICATION_CREDENTIALS):
+            raise TranscriptionError("Google Cloud credentials file not found or not configured in settings.py. Cannot perform transcription.")
+
+    def transcribe(self, window, language_code):
+        config = speech.RecognitionConfig(
+            encoding=speech.RecognitionConfig.AudioEncoding.FLAC,
+            sample_rate_hertz=SAMPLE_RATE_HERTZ,
+            audio_channel_count=1,
+            language_code=language_code,
+            enable_automatic_punctuation=True,
+            enable_word_time_offsets=True,
+        )
+        audio = speech.RecognitionAudio(content=window.read_flac())
+        response = get_google_client().recognize(config=config, audio=audio)
+
+        words = []
+        for result in response.results:
+            alternative = result.alternatives[0]
+            if alternative.words:
+                words.extend((word.start_time.total_seconds(), word.word) for word in alternative.words)
+            elif alternative.transcript:
+                # No word offsets: place the whole result where it ends
+                words.append((result.result_end_time.total_seconds(), alternative.transcript.strip()))
+        return words
+
+
+# ==========================================
+# OFFLINE STUB
+# ==========================================
+
+class StubTranscriptionBackend:
+    """
+    Offline backend: the word ``word<n>`` at every whole second ``n`` of the
+    window, after ``latency`` seconds plus ``seconds_per_audio_second`` for
+    each second of audio. Stitched windows must read ``word0 word1 ...``
+    with nothing missing or repeated.
+    """
+    name = 'stub'
+
+    def __init__(self, latency=None, seconds_per_audio_second=0.0):
+        self.latency = getattr(settings, 'TRANSCRIPTION_STUB_LATENCY_SECONDS', 0.0) if latency is None else latency
+        self.seconds_per_audio_second = seconds_per_audio_second
+
+    def transcribe(self, window, language_code):
+        delay = self.latency + self.seconds_per_audio_second * window.duration
+        if delay:
+            time.sleep(delay)
+        return [(second - window.start, f'word{second}')
+                for second in range(math.ceil(window.start), math.ceil(window.end))]
+
+
+BACKENDS = {
+    GoogleSpeechBackend.name: GoogleSpeechBackend,
+    StubTranscriptionBackend.name: StubTranscriptionBackend,
+}
+
+
+def get_backend(name=None):
+    """A backend instance by registered name or dotted class path (default ``TRANSCRIPTION_BACKEND``)."""
+    name = name or DEFAULT_BACKEND
+    backend_class = BACKENDS.get(name) or import_string(name)
+    return backend_class()
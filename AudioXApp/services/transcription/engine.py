@@ -0,0 +1,125 @@
+# AudioXApp/services/transcription/engine.py
+
+"""
+Chunked transcription of long audio.
+
+Synchronous speech recognition only takes about a minute of audio per
+request, so ``transcribe_file`` cuts a chapter into windows of
+``WINDOW_SECONDS`` that overlap their neighbours by ``OVERLAP_SECONDS``,
+transcribes up to ``CONCURRENCY`` windows at once in a thread pool (each
+window is decoded by ffmpeg only when its turn comes, so at most that many
+are held in memory) and stitches the results in order.
+
+Stitching keeps, from each window, only the words that start in its own
+share of the audio: the overlap with each neighbour is split at its
+midpoint, so a word cut at one window's edge is heard whole by the other
+and is kept exactly once.
+
+A failing window is retried with exponential backoff; when its retries are
+used up the whole transcription fails.
+"""
+
+import logging
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from ...audio_utils import get_duration_with_mutagen, get_duration_with_pydub
+from .backends import AudioWindow, TranscriptionError, get_backend
+
+logger = logging.getLogger(__name__)
+
+WINDOW_SECONDS = getattr(settings, 'TRANSCRIPTION_WINDOW_SECONDS', 55)
+OVERLAP_SECONDS = getattr(settings, 'TRANSCRIPTION_OVERLAP_SECONDS', 5)
+CONCURRENCY = getattr(settings, 'TRANSCRIPTION_CONCURRENCY', 4)
+DEFAULT_RETRIES = getattr(settings, 'TRANSCRIPTION_WINDOW_RETRIES', 2)
+RETRY_BACKOFF_SECONDS = 1.0
+
+
+def audio_duration(path):
+    """Length of the audio file in seconds, from its headers if possible."""
+    duration, reason = get_duration_with_mutagen(path, path)
+    if duration is None:
+        logger.warning(f"Mutagen could not read the duration of '{path}' ({reason}); decoding it with pydub.")
+        duration, reason = get_duration_with_pydub(path)
+    if duration is None:
+        raise TranscriptionError(f"Cannot determine the duration of '{path}': {reason}")
+    return duration
+
+
+def plan_windows(path, duration, window_seconds=WINDOW_SECONDS, overlap_seconds=OVERLAP_SECONDS):
+    """Overlapping windows covering ``0 .. duration`` seconds of ``path``."""
+    step = window_seconds - overlap_seconds
+    if step <= 0:
+        raise ValueError("The window must be longer than the overlap.")
+    windows = []
+    start = 0.0
+    while start < duration:
+        end = min(start + window_seconds, duration)
+        windows.append(AudioWindow(path, len(windows), start, end))
+        if end >= duration:
+            break
+        start += step
+    return windows
+
+
+def stitch(windows, window_words, overlap_seconds=OVERLAP_SECONDS):
+    """
+    One segment per window, ``{'start', 'end', 'text'}`` in seconds of the
+    whole file, holding the words that start in the window's own share.
+    """
+    segments = []
+    for i, (window, words) in enumerate(zip(windows, window_words)):
+        own_start = window.start + overlap_seconds / 2 if i > 0 else -math.inf
+        own_end = window.end - overlap_seconds / 2 if i < len(windows) - 1 else math.inf
+        kept = [word for offset, word in words if own_start <= window.start + offset < own_end]
+        segments.append({
+            'start': round(max(own_start, window.start), 3),
+            'end': round(min(own_end, window.end), 3),
+            'text': ' '.join(kept),
+        })
+    return segments
+
+
+def transcribe_window(backend, window, language_code, retries=DEFAULT_RETRIES, backoff=RETRY_BACKOFF_SECONDS):
+    for attempt in range(retries + 1):
+        try:
+            return backend.transcribe(window, language_code)
+        except Exception as e:
+            if attempt == retries:
+                raise TranscriptionError(f"Window {window.index} ({window.start:.0f}-{window.end:.0f}s) failed after {retries + 1} attempts: {e}") from e
+            delay = backoff * 2 ** attempt
+            logger.warning(f"Transcription of window {window.index} failed (attempt {attempt + 1}/{retries + 1}), retrying in {delay:.1f}s: {e}")
+            time.sleep(delay)
+
+
+def transcribe_file(path, language_code='en-US', backend=None, duration=None, window_seconds=WINDOW_SECONDS,
+                    overlap_seconds=OVERLAP_SECONDS, concurrency=CONCURRENCY, retries=DEFAULT_RETRIES,
+                    backoff=RETRY_BACKOFF_SECONDS):
+    """
+    Transcribes the audio file at ``path``. Returns ``{'transcript',
+    'segments', 'duration'}``; raises ``TranscriptionError`` if a window
+    cannot be transcribed.
+    """
+    backend = backend or get_backend()
+    if duration is None:
+        duration = audio_duration(path)
+    windows = plan_windows(path, duration, window_seconds, overlap_seconds)
+    if not windows:
+        return {'transcript': '', 'segments': [], 'duration': duration}
+
+    logger.info(f"Transcribing {duration:.0f}s of '{path}' in {len(windows)} windows with the '{getattr(backend, 'name', type(backend).__name__)}' backend")
+    with ThreadPoolExecutor(max_workers=max(min(concurrency, len(windows)), 1)) as pool:
+        futures = [pool.submit(transcribe_window, backend, window, language_code, retries, backoff) for window in windows]
+        try:
+            window_words = [future.result() for future in futures]
+        except Exception:
+            for future in futures:
+                future.cancel()
+            raise
+
+    segments = stitch(windows, window_words, overlap_seconds)
+    transcript = ' '.join(segment['text'] for segment in segments if segment['text'])
+    return {'transcript': transcript, 'segments': segments, 'duration': duration}
@@ -0,0 +1,74 @@
+# AudioXApp/services/tts/chapter_jobs.py
+
+"""
+Background synthesis of TTS chapters.
+
+``creator_upload_audiobook`` creates text-to-speech chapters without audio,
+in the ``pending`` audio state, and queues ``generate_chapter_tts_audio`` for
+each one once the upload is committed. The task synthesizes the chapter's
+text with its voice into ``chapters_audio/<audiobook slug>/``, saving the
+share of segments written on the chapter as it goes, then stores the file
+on the chapter, which fills in its size and duration.
+"""
+
+import asyncio
+import logging
+import os
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.core.files.storage import default_storage
+from django.utils.text import slugify
+
+from ...models import Chapter
+from .synthesizer import synthesize_to_file
+from .voices import get_voice
+
+logger = logging.getLogger(__name__)
+
+
+def chapter_audio_name(chapter):
+    """A fresh file name, relative to MEDIA_ROOT, for the chapter's generated audio."""
+    base = f"ch_{chapter.chapter_order}_{slugify(chapter.chapter_name)}_{uuid.uuid4().hex[:6]}"
+    return os.path.join('chapters_audio', chapter.audiobook.slug, f'{base}_directgen.mp3')
+
+
+def chapter_audio_payload(chapter):
+    """The audio state reported to the creator's progress polling."""
+    return {
+        'audio_status': chapter.audio_status,
+        'audio_status_display': chapter.get_audio_status_display(),
+        'audio_progress': 100 if chapter.audio_status == Chapter.AudioStatusChoices.READY else chapter.audio_progress,
+    }
+
+
+def set_audio_state(chapter_id, **fields):
+    Chapter.objects.filter(pk=chapter_id).update(**fields)
+
+
+def synthesize_chapter_audio(chapter):
+    """Synthesizes ``chapter.text_content`` with the chapter's voice and stores it as its audio file."""
+    voice = get_voice(chapter.tts_voice_id)
+    if not voice:
+        raise ValueError(f"Unknown TTS voice '{chapter.tts_voice_id}'.")
+    if not chapter.text_content:
+        raise ValueError("The chapter has no text to synthesize.")
+
+    relative_name = chapter_audio_name(chapter)
+    output_path = default_storage.path(relative_name)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    set_audio_state(chapter.pk, audio_status=Chapter.AudioStatusChoices.GENERATING, audio_progress=0)
+
+    save_progress = sync_to_async(set_audio_state)
+
+    async def on_progress(done, total):
+        await save_progress(chapter.pk, audio_progress=int(done * 100 / total))
+
+    segment_count = asyncio.run(synthesize_to_file(chapter.text_content, voice['edge_voice_id'], output_path,
+                                                   on_progress=on_progress))
+
+    chapter.audio_file = relative_name
+    chapter.audio_status = Chapter.AudioStatusChoices.READY
+    chapter.audio_progress = 100
+    chapter.save()
+    logger.info(f"Chapter {chapter.pk}: {segment_count} TTS segments synthesized to {relative_name}")
@@ -0,0 +1,112 @@
+# AudioXApp/services/tts/document_jobs.py
+
+"""
+Background document-to-audio conversion.
+
+A ``DocumentConversionJob`` is run by the ``convert_document_to_audio``
+Celery task: the document text is split into segments as its pages are
+extracted, each segment is synthesized by the configured engine and appended
+to the job's MP3 under MEDIA_ROOT, and progress is saved on the job and
+pushed to the job's channel group. Clients poll the status endpoint or listen
+on the job WebSocket.
+"""
+
+import asyncio
+import itertools
+import logging
+import os
+
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.layers import get_channel_layer
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from django.utils import timezone
+
+from ...models import DocumentConversionJob
+from .engines import get_engine
+from .segmenting import iter_segments
+from .synthesizer import synthesize_segments
+
+logger = logging.getLogger(__name__)
+
+AUDIO_UPLOAD_DIR = 'tts_jobs/audio'
+
+
+def job_group_name(job_id):
+    return f'document_job_{job_id}'
+
+
+def job_status_payload(job):
+    """The job state sent to the status endpoint and the WebSocket."""
+    is_completed = job.status == DocumentConversionJob.StatusChoices.COMPLETED
+    return {
+        'job_id': str(job.job_id),
+        'status': job.status,
+        'status_display': job.get_status_display(),
+        'progress': job.progress_percent,
+        'progress_indeterminate': job.progress_percent is None,
+        'segments_total': job.segments_total,
+        'segments_done': job.segments_done,
+        'original_filename': os.path.splitext(job.original_filename)[0],
+        'download_url': reverse('AudioXApp:document_conversion_job_download', args=[job.job_id]) if is_completed else None,
+        'error': job.error_message or None,
+    }
+
+
+def notify_job(job):
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    try:
+        async_to_sync(channel_layer.group_send)(
+            job_group_name(job.job_id), {'type': 'job_progress', 'job': job_status_payload(job)}
+        )
+    except Exception as e:
+        # Pushes are best effort; the status endpoint always has the saved state
+        logger.warning(f"Could not push progress of document job {job.job_id}: {e}")
+
+
+def update_job(job, **fields):
+    for name, value in fields.items():
+        setattr(job, name, value)
+    job.save(update_fields=[*fields, 'updated_at'])
+    notify_job(job)
+
+
+class NoDocumentText(Exception):
+    """Nothing could be extracted from the document to synthesize."""
+
+
+def synthesize_job_audio(job, text_chunks, voice_id, engine=None):
+    """
+    Synthesizes the document text arriving in ``text_chunks`` (see
+    ``extraction.iter_document_text``) into the job's MP3, several segments
+    at a time, and marks the job completed. Synthesis starts with the first
+    segment while later pages are still being extracted; the segment count,
+    and with it the progress, is only known once extraction has ended.
+    """
+    segments = iter_segments(text_chunks)
+    first_segment = next(segments, None)
+    if first_segment is None:
+        raise NoDocumentText()
+    update_job(job, status=DocumentConversionJob.StatusChoices.SYNTHESIZING, segments_total=0, segments_done=0)
+
+    relative_name = f'{AUDIO_UPLOAD_DIR}/{job.job_id}.mp3'
+    final_path = default_storage.path(relative_name)
+    os.makedirs(os.path.dirname(final_path), exist_ok=True)
+    temp_path = f'{final_path}.part'
+    try:
+        with open(temp_path, 'wb') as output:
+            asyncio.run(synthesize_segments(
+                engine or get_engine(), itertools.chain([first_segment], segments), voice_id, output,
+                on_progress=sync_to_async(lambda done, total: update_job(job, segments_done=done, segments_total=total or 0)),
+            ))
+        os.replace(temp_path, final_path)
+    finally:
+        segments.close()
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    update_job(job, status=DocumentConversionJob.StatusChoices.COMPLETED, segments_total=job.segments_done,
+               audio_file=relative_name, completed_at=timezone.now())
+    logger.info(f"Document job {job.job_id}: {job.segments_total} segments synthesized to {relative_name}")
@@ -0,0 +1,71 @@
+# AudioXApp/services/tts/engines.py
+
+"""
+Speech synthesis backends for the TTS pipeline.
+
+An engine turns one text segment into MP3 bytes through an async
+``synthesize(text, voice_id)``. ``edge`` calls Microsoft Edge TTS; ``stub``
+builds silent MPEG frames locally, with a length proportional to the text, so
+the pipeline runs offline in tests and benchmarks. ``TTS_ENGINE`` selects the
+engine by name or by dotted path to a class of your own.
+"""
+
+import asyncio
+import logging
+
+import edge_tts
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ENGINE = getattr(settings, 'TTS_ENGINE', 'edge')
+
+# One MPEG-1 Layer III frame (128 kbps, 44.1 kHz, stereo) of silence: a header and an
+# all-zero side info / main data area. 417 bytes, 1152 samples (~26 ms).
+SILENT_MP3_FRAME = b'\xff\xfb\x90\x00' + bytes(413)
+
+
+class TTSEngineError(Exception):
+    """The engine returned no audio for a segment."""
+
+
+class EdgeTTSEngine:
+    name = 'edge'
+
+    async def synthesize(self, text, voice_id):
+        communicate = edge_tts.Communicate(text, voice_id)
+        audio = bytearray()
+        async for chunk in communicate.stream():
+            if chunk['type'] == 'audio':
+                audio += chunk['data']
+        if not audio:
+            raise TTSEngineError(f"Edge TTS returned no audio for voice {voice_id}")
+        return bytes(audio)
+
+
+class StubTTSEngine:
+    """Offline engine: one silent frame per ``chars_per_frame`` characters, after ``latency`` seconds."""
+    name = 'stub'
+
+    def __init__(self, latency=None, chars_per_frame=4):
+        self.latency = getattr(settings, 'TTS_STUB_LATENCY_SECONDS', 0.0) if latency is None else latency
+        self.chars_per_frame = chars_per_frame
+
+    async def synthesize(self, text, voice_id):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return SILENT_MP3_FRAME * (len(text) // self.chars_per_frame + 1)
+
+
+ENGINES = {
+    EdgeTTSEngine.name: EdgeTTSEngine,
+    StubTTSEngine.name: StubTTSEngine,
+}
+
+
+def get_engine(name=None):
+    """An engine instance by registered name or dotted class path (default ``TTS_ENGINE``)."""
+    name = name or DEFAULT_ENGINE
+    engine_class = ENGINES.get(name) or import_string(name)
+    return engine_class()
@@ -0,0 +1,283 @@
+# AudioXApp/services/tts/extraction.py
+
+"""
+Streaming text extraction from uploaded documents.
+
+``iter_document_text`` yields a document's text in reading order, one chunk
+at a time (a PDF page, an image frame, a batch of DOCX paragraphs), so
+synthesis can start on the first page while later ones are still being
+extracted and only a few pages are ever held in memory.
+
+PDF pages are extracted by a process pool: every worker opens the document
+once (from its path, or from the bytes handed over at start-up) and
+extracts the pages it is given, falling back to Tesseract OCR of the
+rendered page only when a page has no text layer. At most
+``WINDOW_FACTOR * workers`` pages are in flight ahead of the consumer.
+Multi-frame images (TIFF scans) are OCR'd frame by frame the same way.
+Short documents are extracted in-process, where a pool would cost more than
+it saves.
+
+Extractors are looked up by MIME type in ``EXTRACTORS``; projects can add or
+replace them with the ``TTS_DOCUMENT_EXTRACTORS`` setting.
+"""
+
+import io
+import logging
+import mimetypes
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing, contextmanager
+
+import fitz
+import pytesseract
+from django.conf import settings
+from django.utils.module_loading import import_string
+from PIL import Image
+
+try:
+    import docx
+except ImportError:
+    docx = None
+
+try:
+    import docx2txt
+    DOCX2TXT_AVAILABLE = True
+except ImportError:
+    DOCX2TXT_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+EXTRACTION_WORKERS = getattr(settings, 'TTS_EXTRACTION_WORKERS', min(os.cpu_count() or 1, 4))
+# Documents with fewer pages than this are extracted in-process
+PARALLEL_MIN_PAGES = getattr(settings, 'TTS_EXTRACTION_PARALLEL_MIN_PAGES', 8)
+OCR_DPI = getattr(settings, 'TTS_OCR_DPI', 300)
+OCR_THRESHOLD = 150
+WINDOW_FACTOR = 2
+DOCX_PARAGRAPHS_PER_CHUNK = 50
+
+PDF_TYPE = 'application/pdf'
+DOCX_TYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+DOC_TYPE = 'application/msword'
+
+
+def ocr_language_for(language):
+    return 'urd' if language == 'Urdu' else 'eng'
+
+
+# ==========================================
+# OCR
+# ==========================================
+
+def ocr_image(image, ocr_language='eng'):
+    """Text of a PIL image by Tesseract (grayscale, thresholded), or '' if nothing readable was found."""
+    image = image.convert('L').point(lambda x: 0 if x < OCR_THRESHOLD else 255, '1')
+    text = pytesseract.image_to_string(image, config=f'--oem 3 --psm 3 -l {ocr_language}').strip()
+    # A few stray characters are noise, not text
+    return text if len(text) >= 5 else ''
+
+
+# ==========================================
+# PAGE WORKERS
+# ==========================================
+
+# Opened once per worker process by ``_open_source`` and reused for every page it extracts
+_worker_document = None
+
+
+def _open_pdf(source):
+    return fitz.open(source) if isinstance(source, str) else fitz.open(stream=source, filetype='pdf')
+
+
+def _open_image(source):
+    return Image.open(source if isinstance(source, str) else io.BytesIO(source))
+
+
+def _open_source(opener, source):
+    global _worker_document
+    _worker_document = opener(source)
+
+
+def _pdf_page_text(document, page_number, ocr_language):
+    page = document.load_page(page_number)
+    text = page.get_text('text').strip()
+    if text:
+        return text
+    # No text layer (a scanned page): OCR the rendered page
+    pixmap = page.get_pixmap(dpi=OCR_DPI)
+    image = Image.frombytes('RGB' if pixmap.n < 4 else 'RGBA', (pixmap.width, pixmap.height), pixmap.samples)
+    return ocr_image(image, ocr_language)
+
+
+def _image_frame_text(image, frame_number, ocr_language):
+    image.seek(frame_number)
+    return ocr_image(image.copy(), ocr_language)
+
+
+def _safe(extract, document, number, ocr_language):
+    try:
+        return extract(document, number, ocr_language)
+    except pytesseract.TesseractNotFoundError:
+        logger.error("Tesseract OCR not found - please install Tesseract")
+    except Exception as e:
+        logger.error(f"Text extraction of page {number + 1} failed: {e}")
+    return ''
+
+
+def _extract_in_worker(extract, number, ocr_language):
+    return _safe(extract, _worker_document, number, ocr_language)
+
+
+def _iter_pages(opener, source, count, extract, ocr_language, workers):
+    """Text of pages ``0 .. count - 1`` in order, extracted in a pool of ``workers`` processes if worth it."""
+    # Daemonic processes (such as some Celery pool workers) may not start children
+    if workers <= 1 or count < PARALLEL_MIN_PAGES or multiprocessing.current_process().daemon:
+        document = opener(source)
+        try:
+            for number in range(count):
+                yield _safe(extract, document, number, ocr_language)
+        finally:
+            document.close()
+        return
+
+    window = workers * WINDOW_FACTOR
+    with ProcessPoolExecutor(max_workers=workers, initializer=_open_source, initargs=(opener, source)) as pool:
+        futures = {}
+        try:
+            for number in range(count):
+                while len(futures) < window and number + len(futures) < count:
+                    ahead = number + len(futures)
+                    futures[ahead] = pool.submit(_extract_in_worker, extract, ahead, ocr_language)
+                yield futures.pop(number).result()
+        finally:
+            for future in futures.values():
+                future.cancel()
+
+
+# ==========================================
+# DOCUMENT TYPES
+# ==========================================
+
+def iter_pdf_pages(source, ocr_language='eng', workers=EXTRACTION_WORKERS):
+    """Text of each page of a PDF (path or bytes); pages without a text layer are OCR'd."""
+    with _open_pdf(source) as document:
+        page_count = document.page_count
+    yield from _iter_pages(_open_pdf, source, page_count, _pdf_page_text, ocr_language, workers)
+
+
+def iter_image_frames(source, ocr_language='eng', workers=EXTRACTION_WORKERS):
+    """OCR text of each frame of an image (path or bytes); most images have a single frame."""
+    with _open_image(source) as image:
+        frame_count = getattr(image, 'n_frames', 1)
+    yield from _iter_pages(_open_image, source, frame_count, _image_frame_text, ocr_language, workers)
+
+
+def iter_docx_paragraphs(source, ocr_language=None, workers=None):
+    if docx is None:
+        logger.error("python-docx library is not installed. Cannot process .docx files.")
+        return
+    document = docx.Document(source if isinstance(source, str) else io.BytesIO(source))
+    paragraphs = [paragraph.text for paragraph in document.paragraphs]
+    for start in range(0, len(paragraphs), DOCX_PARAGRAPHS_PER_CHUNK):
+        yield '\n'.join(paragraphs[start:start + DOCX_PARAGRAPHS_PER_CHUNK])
+    for table in document.tables:
+        yield '\n'.join(' '.join(cell.text for cell in row.cells) for row in table.rows)
+
+
+def iter_doc_text(source, ocr_language=None, workers=None):
+    """Legacy .doc text via docx2txt, which needs a file on disk."""
+    if not DOCX2TXT_AVAILABLE:
+        logger.error("docx2txt not available - cannot process DOC files")
+        return
+    with _as_path(source, '.doc') as path:
+        text = docx2txt.process(path)
+    if text:
+        yield text
+
+
+@contextmanager
+def _as_path(source, suffix):
+    if isinstance(source, str):
+        yield source
+        return
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp_file:
+        tmp_file.write(source)
+    try:
+        yield tmp_file.name
+    finally:
+        os.remove(tmp_file.name)
+
+
+# ==========================================
+# EXTRACTOR REGISTRY
+# ==========================================
+
+# MIME type (or 'type/' prefix) -> extractor(source, ocr_language, workers) yielding text chunks
+EXTRACTORS = {
+    PDF_TYPE: iter_pdf_pages,
+    DOCX_TYPE: iter_docx_paragraphs,
+    'image/': iter_image_frames,
+}
+if DOCX2TXT_AVAILABLE:
+    EXTRACTORS[DOC_TYPE] = iter_doc_text
+# Extra or replacement extractors, as dotted paths
+EXTRACTORS.update({
+    file_type: import_string(path)
+    for file_type, path in getattr(settings, 'TTS_DOCUMENT_EXTRACTORS', {}).items()
+})
+
+EXTENSION_TYPES = {'.pdf': PDF_TYPE, '.docx': DOCX_TYPE, '.doc': DOC_TYPE}
+
+
+def get_extractor(file_type):
+    return EXTRACTORS.get(file_type) or EXTRACTORS.get(f"{file_type.split('/')[0]}/")
+
+
+def is_supported_document_type(file_type):
+    """Whether text can be extracted from a document of MIME type ``file_type``."""
+    return get_extractor(file_type) is not None
+
+
+def document_type_for(filename):
+    """The MIME type extraction should treat ``filename`` as, judged by its extension."""
+    extension = os.path.splitext(filename.lower())[1]
+    return EXTENSION_TYPES.get(extension) or mimetypes.guess_type(filename)[0] or ''
+
+
+def iter_document_text(source, file_type, language='English', workers=EXTRACTION_WORKERS):
+    """
+    Yields the non-empty text chunks of a document (a file path or its bytes)
+    of MIME type ``file_type``, in reading order. ``language`` selects the
+    OCR language for scanned pages and images.
+    """
+    extractor = get_extractor(file_type)
+    if extractor is None:
+        logger.error(f"Unsupported file type: {file_type}")
+        return
+    chunks = extractor(source, ocr_language_for(language), workers)
+    try:
+        for chunk in chunks:
+            chunk = chunk.strip()
+            if chunk:
+                yield chunk
+    finally:
+        chunks.close()
+
+
+def extract_document_text(source, file_type, language='English', workers=EXTRACTION_WORKERS, max_chars=None):
+    """
+    The text of a document, or None if none could be extracted. With
+    ``max_chars``, extraction stops at the first chunk reaching that length
+    and the text is cut there.
+    """
+    chunks = []
+    length = 0
+    with closing(iter_document_text(source, file_type, language, workers)) as text_chunks:
+        for chunk in text_chunks:
+            chunks.append(chunk)
+            length += len(chunk) + 1
+            if max_chars and length >= max_chars:
+                break
+    text = '\n'.join(chunks)
+    return (text[:max_chars] if max_chars else text) or None
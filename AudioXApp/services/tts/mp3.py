@@ -0,0 +1,72 @@
+# AudioXApp/services/tts/mp3.py
+
+"""
+Stream-level MP3 concatenation.
+
+MPEG audio frames are self-delimiting, so segments synthesized separately
+can be joined by appending their frames, without decoding and re-encoding.
+Only per-file metadata has to go: ID3v2 / ID3v1 tags, and the Xing / Info /
+VBRI header frame, whose frame count would otherwise make players report the
+first segment's duration for the whole file.
+"""
+
+# Layer III bitrates (kbps) by bitrate index
+MPEG1_BITRATES = (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320)
+MPEG2_BITRATES = (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160)
+# Sample rates by version bits (00 = MPEG 2.5, 10 = MPEG 2, 11 = MPEG 1) and rate index
+SAMPLE_RATES = {0b00: (11025, 12000, 8000), 0b10: (22050, 24000, 16000), 0b11: (44100, 48000, 32000)}
+
+VBR_HEADER_TAGS = (b'Xing', b'Info', b'VBRI')
+# The VBR tag sits after the header and side info, within the first 40 bytes of the frame
+VBR_HEADER_SEARCH_BYTES = 40
+ID3V1_LENGTH = 128
+
+
+def frame_length(header):
+    """Length in bytes of the Layer III frame starting with ``header`` (4 bytes), or None if it isn't one."""
+    if len(header) < 4 or header[0] != 0xFF or (header[1] & 0xE0) != 0xE0:
+        return None
+    version = (header[1] >> 3) & 0b11
+    layer = (header[1] >> 1) & 0b11
+    bitrate_index = header[2] >> 4
+    rate_index = (header[2] >> 2) & 0b11
+    if version not in SAMPLE_RATES or layer != 0b01 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    padding = (header[2] >> 1) & 1
+    sample_rate = SAMPLE_RATES[version][rate_index]
+    if version == 0b11:
+        return 144000 * MPEG1_BITRATES[bitrate_index] // sample_rate + padding
+    return 72000 * MPEG2_BITRATES[bitrate_index] // sample_rate + padding
+
+
+def _id3v2_length(data):
+    if len(data) < 10 or data[:3] != b'ID3':
+        return 0
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    has_footer = data[5] & 0x10
+    return 10 + size + (10 if has_footer else 0)
+
+
+def audio_frames(data):
+    """The MPEG frames of one MP3 file: tags and any VBR header frame stripped."""
+    view = memoryview(data)
+    start = _id3v2_length(view)
+    end = len(view)
+    if end - start >= ID3V1_LENGTH and bytes(view[end - ID3V1_LENGTH:end - ID3V1_LENGTH + 3]) == b'TAG':
+        end -= ID3V1_LENGTH
+
+    # Skip to the first frame sync
+    while start < end - 1 and not (view[start] == 0xFF and (view[start + 1] & 0xE0) == 0xE0):
+        start += 1
+
+    length = frame_length(view[start:start + 4])
+    if length and start + length <= end:
+        first_frame = bytes(view[start:start + VBR_HEADER_SEARCH_BYTES])
+        if any(tag in first_frame for tag in VBR_HEADER_TAGS):
+            start += length
+    return view[start:end]
+
+
+def write_concatenated(output, segment_audio):
+    """Appends one segment's frames to an open binary file; returns the number of bytes written."""
+    return output.write(audio_frames(segment_audio))
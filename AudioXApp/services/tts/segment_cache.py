@@ -0,0 +1,86 @@
+# AudioXApp/services/tts/segment_cache.py
+
+"""
+Content-addressed cache of synthesized segments.
+
+A segment's audio is stored under the SHA-256 of its engine, voice and
+whitespace-normalized text, so the same paragraph read by the same voice is
+synthesized once no matter which preview, chapter or document it came from.
+Since segments end at paragraph breaks (see ``segmenting``), editing a text
+and previewing it again only re-synthesizes the paragraphs that changed.
+
+Total size is capped at ``MAX_BYTES`` with least-recently-used eviction (see
+``services.disk_cache``); hit / miss counters are reported by
+``get_metrics``.
+"""
+
+import hashlib
+import logging
+import os
+
+from django.conf import settings
+
+from .. import disk_cache
+from .segmenting import WHITESPACE_RE
+
+logger = logging.getLogger(__name__)
+
+ENABLED = getattr(settings, 'TTS_SEGMENT_CACHE_ENABLED', True)
+CACHE_DIR = str(getattr(settings, 'TTS_SEGMENT_CACHE_DIR', os.path.join(settings.BASE_DIR, 'tts_segment_cache')))
+MAX_BYTES = getattr(settings, 'TTS_SEGMENT_CACHE_MAX_BYTES', 1024 ** 3)
+
+METRICS_KEY_PREFIX = 'tts_segment_cache_metrics'
+METRIC_NAMES = ('hits', 'misses', 'bytes_from_cache', 'bytes_synthesized')
+
+SEGMENT_SUFFIX = '.mp3'
+
+
+def segment_key(engine_name, voice_id, text):
+    normalized = WHITESPACE_RE.sub(' ', text).strip()
+    return hashlib.sha256(f'{engine_name}\0{voice_id}\0{normalized}'.encode('utf-8')).hexdigest()
+
+
+def _segment_path(key):
+    return os.path.join(CACHE_DIR, key[:2], f'{key}{SEGMENT_SUFFIX}')
+
+
+def get(key):
+    """The cached audio for ``key``, or None. Counts the lookup and refreshes the LRU position on a hit."""
+    path = _segment_path(key)
+    try:
+        with open(path, 'rb') as f:
+            audio = f.read()
+        os.utime(path)
+    except FileNotFoundError:
+        _counters.record(misses=1)
+        return None
+    _counters.record(hits=1, bytes_from_cache=len(audio))
+    return audio
+
+
+def put(key, audio):
+    if not audio:
+        return
+    try:
+        disk_cache.write_atomic(_segment_path(key), audio)
+    except OSError as e:
+        logger.warning(f"Could not cache TTS segment {key}: {e}")
+        return
+    _counters.record(bytes_synthesized=len(audio))
+    _eviction_trigger.note_written(len(audio))
+
+
+def evict(max_bytes=None):
+    disk_cache.evict(CACHE_DIR, MAX_BYTES if max_bytes is None else max_bytes, suffix=SEGMENT_SUFFIX)
+
+
+_eviction_trigger = disk_cache.EvictionTrigger(MAX_BYTES, evict)
+_counters = disk_cache.Counters(METRICS_KEY_PREFIX, METRIC_NAMES)
+
+
+def get_metrics():
+    metrics = _counters.get()
+    metrics['hit_ratio'] = disk_cache.ratio(metrics['hits'], metrics['hits'] + metrics['misses'])
+    metrics['disk_bytes'] = disk_cache.disk_usage(CACHE_DIR)
+    metrics['max_bytes'] = MAX_BYTES
+    return metrics
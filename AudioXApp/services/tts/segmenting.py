@@ -0,0 +1,96 @@
+# AudioXApp/services/tts/segmenting.py
+
+"""
+Splits document text into segments for synthesis.
+
+Segments are packed from whole sentences up to ``max_chars`` and always end
+at a paragraph break, so a paragraph's segments depend only on that paragraph:
+editing one paragraph leaves the segments of the others, and therefore their
+cached audio (see ``segment_cache``), unchanged. A single sentence longer
+than ``max_chars`` is cut at whitespace.
+
+``iter_segments`` does the same for text that arrives in chunks (pages of a
+document being extracted), holding back only the unfinished sentence at the
+end of each chunk.
+"""
+
+import re
+
+from django.conf import settings
+
+DEFAULT_SEGMENT_CHARS = getattr(settings, 'TTS_SEGMENT_MAX_CHARS', 3000)
+
+PARAGRAPH_BREAK_RE = re.compile(r'\n\s*\n')
+# Latin and Urdu sentence endings
+SENTENCE_END_RE = re.compile(r'(?<=[.!?۔؟])\s+')
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def _split_long(sentence, max_chars):
+    pieces = []
+    current = ''
+    for word in sentence.split(' '):
+        while len(word) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ''
+            pieces.append(word[:max_chars])
+            word = word[max_chars:]
+        if current and len(current) + 1 + len(word) > max_chars:
+            pieces.append(current)
+            current = word
+        else:
+            current = f'{current} {word}' if current else word
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_text(text, max_chars=DEFAULT_SEGMENT_CHARS):
+    """Returns the non-empty segments of ``text``, in order, each at most ``max_chars`` long."""
+    segments = []
+    current = ''
+    for paragraph in PARAGRAPH_BREAK_RE.split(text or ''):
+        for sentence in SENTENCE_END_RE.split(paragraph):
+            sentence = WHITESPACE_RE.sub(' ', sentence).strip()
+            if not sentence:
+                continue
+            for piece in _split_long(sentence, max_chars) if len(sentence) > max_chars else [sentence]:
+                if current and len(current) + 1 + len(piece) > max_chars:
+                    segments.append(current)
+                    current = piece
+                else:
+                    current = f'{current} {piece}' if current else piece
+        if current:
+            segments.append(current)
+            current = ''
+    return segments
+
+
+def _last_boundary(text):
+    """Index just past the last paragraph break or sentence end in ``text`` (0 if there is none)."""
+    boundary = 0
+    for pattern in (PARAGRAPH_BREAK_RE, SENTENCE_END_RE):
+        for match in pattern.finditer(text):
+            boundary = max(boundary, match.end())
+    return boundary
+
+
+def iter_segments(chunks, max_chars=DEFAULT_SEGMENT_CHARS):
+    """
+    Yields the segments of the text formed by the line-joined ``chunks`` as
+    they can be told, so segmenting keeps pace with extraction.
+    """
+    carry = ''
+    for chunk in chunks:
+        text = f'{carry}\n{chunk}' if carry else chunk
+        boundary = _last_boundary(text)
+        if not boundary and len(text) <= max_chars:
+            carry = text
+            continue
+        # A sentence running on for more than a segment is cut where the chunk ends
+        boundary = boundary or len(text)
+        yield from split_text(text[:boundary], max_chars)
+        carry = text[boundary:]
+    if carry:
+        yield from split_text(carry, max_chars)
@@ -0,0 +1,150 @@
+# AudioXApp/services/tts/synthesizer.py
+
+"""
+Segmenting, concurrent speech synthesis.
+
+Text is split into segments (see ``segmenting``) and up to ``concurrency``
+segments are synthesized at once, bounded by a semaphore. Results are written
+strictly in order as soon as every earlier segment is done, by appending MPEG
+frames (see ``mp3``), so the finished file is never re-encoded. At most
+``WINDOW_FACTOR * concurrency`` segments are started ahead of the write
+position, which bounds the audio held in memory when one segment is slow.
+
+Segments already synthesized with the same engine and voice are read from the
+segment cache (see ``segment_cache``) instead of being synthesized again.
+
+A failing segment is retried with exponential backoff; when its retries are
+used up the whole synthesis fails.
+"""
+
+import asyncio
+import logging
+import os
+from collections.abc import Sequence
+
+from django.conf import settings
+
+from . import segment_cache
+from .engines import get_engine
+from .mp3 import write_concatenated
+from .segmenting import split_text
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = getattr(settings, 'TTS_SYNTHESIS_CONCURRENCY', 4)
+DEFAULT_RETRIES = getattr(settings, 'TTS_SEGMENT_RETRIES', 2)
+RETRY_BACKOFF_SECONDS = getattr(settings, 'TTS_SEGMENT_RETRY_BACKOFF_SECONDS', 1.0)
+WINDOW_FACTOR = 2
+
+
+class SegmentSynthesisError(Exception):
+    """A segment still failed after all its retries."""
+
+
+async def synthesize_segment(engine, text, voice_id, retries=DEFAULT_RETRIES, backoff=RETRY_BACKOFF_SECONDS):
+    for attempt in range(retries + 1):
+        try:
+            return await engine.synthesize(text, voice_id)
+        except Exception as e:
+            if attempt == retries:
+                raise SegmentSynthesisError(f"Segment of {len(text)} chars failed after {retries + 1} attempts: {e}") from e
+            delay = backoff * 2 ** attempt
+            logger.warning(f"TTS segment failed (attempt {attempt + 1}/{retries + 1}), retrying in {delay:.1f}s: {e}")
+            await asyncio.sleep(delay)
+
+
+async def cached_synthesize_segment(engine, text, voice_id, retries=DEFAULT_RETRIES, backoff=RETRY_BACKOFF_SECONDS):
+    """``synthesize_segment`` through the segment cache (file I/O runs in a worker thread)."""
+    key = segment_cache.segment_key(getattr(engine, 'name', type(engine).__name__), voice_id, text)
+    audio = await asyncio.to_thread(segment_cache.get, key)
+    if audio is None:
+        audio = await synthesize_segment(engine, text, voice_id, retries, backoff)
+        await asyncio.to_thread(segment_cache.put, key, audio)
+    return audio
+
+
+async def synthesize_segments(engine, segments, voice_id, output, concurrency=DEFAULT_CONCURRENCY,
+                              retries=DEFAULT_RETRIES, backoff=RETRY_BACKOFF_SECONDS, on_progress=None,
+                              use_cache=segment_cache.ENABLED):
+    """
+    Synthesizes ``segments`` concurrently and writes them, in order, to the
+    open binary file ``output``. ``on_progress(done, total)`` is awaited
+    after each segment written. Returns the number of bytes written.
+
+    ``segments`` may also be a lazy iterator (see ``segmenting.iter_segments``);
+    it is advanced in a worker thread, only as far as the window allows, and
+    ``total`` is then None until the iterator is exhausted.
+    """
+    synthesize = cached_synthesize_segment if use_cache else synthesize_segment
+    semaphore = asyncio.Semaphore(concurrency)
+    window = max(concurrency * WINDOW_FACTOR, 1)
+    is_lazy = not isinstance(segments, Sequence)
+    source = iter(segments)
+
+    async def fetch():
+        # Lazy iterators may block on document extraction, so they are advanced off the event loop
+        return await asyncio.to_thread(next, source, None) if is_lazy else next(source, None)
+
+    async def run(index, text):
+        async with semaphore:
+            return index, await synthesize(engine, text, voice_id, retries, backoff)
+
+    pending = {}
+    finished = {}
+    fetching = None
+    exhausted = False
+    next_start = next_write = written = 0
+    try:
+        while not exhausted or next_write < next_start:
+            if fetching is None and not exhausted and next_start < next_write + window:
+                fetching = asyncio.ensure_future(fetch())
+
+            waiting = [*pending.values(), fetching] if fetching else pending.values()
+            done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task is fetching:
+                    fetching = None
+                    text = task.result()
+                    if text is None:
+                        exhausted = True
+                    else:
+                        pending[next_start] = asyncio.create_task(run(next_start, text))
+                        next_start += 1
+                    continue
+                index, audio = task.result()
+                del pending[index]
+                finished[index] = audio
+
+            while next_write in finished:
+                written += write_concatenated(output, finished.pop(next_write))
+                next_write += 1
+                if on_progress is not None:
+                    await on_progress(next_write, (next_start if exhausted else None) if is_lazy else len(segments))
+    finally:
+        tasks = [*pending.values(), fetching] if fetching else list(pending.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+    return written
+
+
+async def synthesize_to_file(text, voice_id, output_path, engine=None, max_chars=None, **options):
+    """
+    Splits ``text``, synthesizes it into ``output_path`` (written to a
+    ``.part`` file and moved into place when complete) and returns the
+    number of segments. ``options`` are passed to ``synthesize_segments``.
+    """
+    segments = split_text(text, max_chars) if max_chars else split_text(text)
+    if not segments:
+        raise ValueError("No text to synthesize.")
+
+    temp_path = f'{output_path}.part'
+    try:
+        with open(temp_path, 'wb') as output:
+            await synthesize_segments(engine or get_engine(), segments, voice_id, output, **options)
+        os.replace(temp_path, output_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return len(segments)
@@ -0,0 +1,62 @@
+# AudioXApp/services/tts/voices.py
+
+"""
+The registry of narration voices, shared by creator chapter TTS and the
+document-to-audio feature.
+
+Voices are listed per audiobook language; ``id`` is what forms and chapters
+store and ``edge_voice_id`` is what the engine is asked for. A request naming
+only a gender (the document feature) gets the first voice of that gender in
+the language's list.
+"""
+
+VOICES_BY_LANGUAGE = {
+    'English': [
+        {'id': 'en-US-AriaNeural', 'name': 'Aria (Female)', 'gender': 'female', 'edge_voice_id': 'en-US-AriaNeural'},
+        {'id': 'en-US-GuyNeural', 'name': 'Guy (Male)', 'gender': 'male', 'edge_voice_id': 'en-US-GuyNeural'},
+        {'id': 'en-GB-LibbyNeural', 'name': 'Libby (Female, UK)', 'gender': 'female', 'edge_voice_id': 'en-GB-LibbyNeural'},
+        {'id': 'en-GB-RyanNeural', 'name': 'Ryan (Male, UK)', 'gender': 'male', 'edge_voice_id': 'en-GB-RyanNeural'},
+        {'id': 'en-AU-NatashaNeural', 'name': 'Natasha (Female, AU)', 'gender': 'female', 'edge_voice_id': 'en-AU-NatashaNeural'},
+        {'id': 'en-IN-NeerjaNeural', 'name': 'Neerja (Female, IN)', 'gender': 'female', 'edge_voice_id': 'en-IN-NeerjaNeural'},
+    ],
+    'Urdu': [
+        {'id': 'ur-PK-UzmaNeural', 'name': 'Uzma (Female)', 'gender': 'female', 'edge_voice_id': 'ur-PK-UzmaNeural'},
+        {'id': 'ur-PK-AsadNeural', 'name': 'Asad (Male)', 'gender': 'male', 'edge_voice_id': 'ur-PK-AsadNeural'},
+    ],
+    'Punjabi': [],
+    'Sindhi': [],
+}
+
+VOICES_BY_ID = {
+    voice['id']: voice
+    for lang_voices in VOICES_BY_LANGUAGE.values()
+    for voice in lang_voices
+}
+
+DEFAULT_GENDER = 'female'
+
+
+def voices_for(language):
+    return VOICES_BY_LANGUAGE.get(language) or []
+
+
+def get_voice(voice_id):
+    return VOICES_BY_ID.get(voice_id)
+
+
+def voice_for_gender(language, gender=None):
+    """The first voice of ``gender`` (female if not given) for ``language``, or None."""
+    gender = gender or DEFAULT_GENDER
+    return next((voice for voice in voices_for(language) if voice['gender'] == gender), None)
+
+
+def resolve_voice(language, voice_id=None):
+    """
+    The voice ``voice_id`` if it is one of ``language``'s voices, else the
+    language's first voice, else None (no TTS for the language).
+    """
+    voices = voices_for(language)
+    voice = get_voice(voice_id)
+    if voice in voices:
+        return voice
+    return voices[0] if voices else None
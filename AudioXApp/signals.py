@@ -25,7 +25,8 @@ from decimal import Decimal
 from django.dispatch import receiver
 from django.urls import reverse
 from django.conf import settings
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
+from django.core.cache import cache
 from django.db import transaction
 from django.db.models import F
 from django.utils import timezone
@@ -33,7 +34,8 @@ from django.utils import timezone
 from allauth.account.signals import user_logged_in
 from allauth.socialaccount.signals import social_account_added
 
-from .models import User, AudiobookViewLog, CreatorEarning, Creator
+from .models import User, Audiobook, AudiobookViewLog, CreatorEarning, Creator, BannedKeyword, ChapterRendition, DocumentConversionJob
+from .services import search_engine
 
 # ============================================================================
 # LOGGING CONFIGURATION
@@ -239,3 +241,72 @@ def create_creator_earning_for_free_audiobook_view(sender, instance, created, **
     except Exception as e:
         logger.error(f"Error creating creator earning for view log {instance.view_id}: {e}", exc_info=True)
 
+# ============================================================================
+# SEARCH INDEX SIGNALS
+# ============================================================================
+
+@receiver(post_save, sender=Audiobook)
+def refresh_audiobook_search_vector(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Keep the stored full-text vector of an audiobook in sync with its text.
+    
+    Saves restricted to unrelated fields (view counters, moderation status)
+    do not touch the vector. Bulk writes refresh vectors themselves.
+    """
+    if update_fields is not None and not search_engine.SEARCH_VECTOR_SOURCE_FIELDS.intersection(update_fields):
+        return
+    
+    try:
+        search_engine.refresh_search_vectors(Audiobook.objects.filter(pk=instance.pk))
+    except Exception as e:
+        logger.error(f"Error refreshing search vector for audiobook {instance.pk}: {e}", exc_info=True)
+
+
+@receiver(post_save, sender=Creator)
+def refresh_creator_audiobook_search_vectors(sender, instance, created, update_fields=None, **kwargs):
+    """Re-index a creator's audiobooks when the creator name may have changed."""
+    if created or (update_fields is not None and 'creator_name' not in update_fields):
+        return
+    
+    try:
+        search_engine.refresh_search_vectors(Audiobook.objects.filter(creator=instance))
+    except Exception as e:
+        logger.error(f"Error refreshing search vectors for creator {instance.pk}: {e}", exc_info=True)
+
+
+# ============================================================================
+# MODERATION SIGNALS
+# ============================================================================
+
+@receiver(post_save, sender=BannedKeyword)
+@receiver(post_delete, sender=BannedKeyword)
+def clear_banned_keywords_cache(sender, instance, **kwargs):
+    """
+    Drop the cached keyword list of the changed language, however the keyword
+    was changed. The next moderation check reloads it, and the new list's
+    rules version makes the keyword matcher recompile.
+    """
+    cache.delete(f'banned_keywords_{instance.language}')
+
+
+# ============================================================================
+# AUDIO RENDITION SIGNALS
+# ============================================================================
+
+@receiver(post_delete, sender=ChapterRendition)
+def delete_chapter_rendition_file(sender, instance, **kwargs):
+    """Remove a rendition's file with it (chapter deleted, audio replaced or re-transcoded)."""
+    if instance.audio_file:
+        instance.audio_file.delete(save=False)
+
+
+# ============================================================================
+# DOCUMENT CONVERSION SIGNALS
+# ============================================================================
+
+@receiver(post_delete, sender=DocumentConversionJob)
+def delete_document_job_files(sender, instance, **kwargs):
+    """Remove a document job's upload and MP3 with it (user deleted or job purged)."""
+    for field_file in (instance.source_file, instance.audio_file):
+        if field_file:
+            field_file.delete(save=False)
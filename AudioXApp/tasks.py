@@ -1,87 +1,201 @@
 # AudioXApp/tasks.py
 
-from celery import shared_task
+from celery import chain, chord, group, shared_task
+from django.conf import settings
+from django.core.files import File
 from django.db import transaction
+from django.utils import timezone
 import logging
+import os
+import tempfile
+import time
+from collections import Counter
+from contextlib import closing
+from datetime import timedelta
+from functools import partial
 
-from .models import Chapter, Audiobook
-from .services import moderation_service 
+from .models import Chapter, ChapterRendition, Audiobook, DocumentConversionJob
+from .services import hls_packaging, moderation_cache, moderation_service, transcoding
 
 logger = logging.getLogger(__name__)
 
-@shared_task(bind=True, max_retries=3, default_retry_delay=60)
-def process_chapter_for_moderation(self, chapter_id):
+def _transcribe_chapter(chapter, timings):
+    """The chapter's transcript, or the moderation fields to write if it cannot be transcribed."""
+    if chapter.is_tts_generated and chapter.text_content:
+        # Synthesized from known text: nothing to transcribe
+        return chapter.text_content, None
+
+    if not chapter.audio_file or not hasattr(chapter.audio_file, 'path') or not chapter.audio_file.path:
+        logger.warning(f"Chapter ID {chapter.chapter_id} has no valid audio file path. Marking for review.")
+        return None, {
+            'moderation_status': Chapter.ModerationStatusChoices.NEEDS_REVIEW,
+            'moderation_notes': "Processing failed: Could not find a valid audio file path for the chapter.",
+        }
+
+    started = time.perf_counter()
+    transcription_result = moderation_service.transcribe_audio(
+        audio_file_path=chapter.audio_file.path,
+        language_name=chapter.audiobook.language
+    )
+    timings['transcription'] = time.perf_counter() - started
+
+    if not transcription_result['success']:
+        logger.error(f"Transcription failed for Chapter ID: {chapter.chapter_id}. Reason: {transcription_result['error']}")
+        return None, {
+            'moderation_status': Chapter.ModerationStatusChoices.NEEDS_REVIEW,
+            'moderation_notes': f"Audio transcription failed: {transcription_result['error']}. Please review manually.",
+        }
+    return transcription_result['transcript'], None
+
+
+def _moderate_chapter(chapter, timings):
     """
-    Celery task to process a single chapter for content moderation.
+    Transcribes and analyzes a chapter without holding any lock, reusing the
+    moderation cache entry of the same content where there is one. Returns
+    the moderation fields to write, recording the time spent in ``timings``.
     """
-    try:
-        with transaction.atomic():
-            chapter = Chapter.objects.select_for_update().get(chapter_id=chapter_id)
-            logger.info(f"Starting moderation for Chapter ID: {chapter.chapter_id} ('{chapter.chapter_name}')")
-
-            if not chapter.audio_file or not hasattr(chapter.audio_file, 'path') or not chapter.audio_file.path:
-                logger.warning(f"Chapter ID {chapter.chapter_id} has no valid audio file path. Marking for review.")
-                chapter.moderation_status = Chapter.ModerationStatusChoices.NEEDS_REVIEW
-                chapter.moderation_notes = "Processing failed: Could not find a valid audio file path for the chapter."
-                chapter.save(update_fields=['moderation_status', 'moderation_notes'])
-                return
+    language = chapter.audiobook.language
+    rules_version = moderation_service.rules_version(language)
+    cache_key = moderation_cache.content_key(chapter)
+    cached = moderation_cache.get(cache_key)
 
-            transcription_result = moderation_service.transcribe_audio(
-                audio_file_path=chapter.audio_file.path,
-                language_name=chapter.audiobook.language
-            )
-            
-            if not transcription_result['success']:
-                logger.error(f"Transcription failed for Chapter ID: {chapter.chapter_id}. Reason: {transcription_result['error']}")
-                chapter.moderation_status = Chapter.ModerationStatusChoices.NEEDS_REVIEW
-                chapter.moderation_notes = f"Audio transcription failed: {transcription_result['error']}. Please review manually."
-                chapter.save(update_fields=['moderation_status', 'moderation_notes'])
-                return
+    if cached and cached['rules_version'] == rules_version:
+        moderation_cache.record('verdict_hits')
+        logger.info(f"Chapter ID {chapter.chapter_id}: reusing the cached moderation verdict of identical content.")
+        return {
+            'transcript': cached['transcript'],
+            'moderation_status': cached['moderation_status'],
+            'moderation_notes': cached['moderation_notes'],
+        }
 
-            transcript = transcription_result['transcript']
-            chapter.transcript = transcript
-            
-            if not transcript:
-                logger.warning(f"Transcription returned empty for Chapter ID: {chapter.chapter_id}.")
-                chapter.moderation_status = Chapter.ModerationStatusChoices.NEEDS_REVIEW
-                chapter.moderation_notes = "Audio was transcribed as empty. Please review manually."
-                chapter.save(update_fields=['transcript', 'moderation_status', 'moderation_notes'])
-                return
+    if cached:
+        moderation_cache.record('transcript_hits')
+        logger.info(f"Chapter ID {chapter.chapter_id}: reusing the cached transcript; moderation rules changed since.")
+        transcript = cached['transcript']
+    else:
+        moderation_cache.record('misses')
+        transcript, failure = _transcribe_chapter(chapter, timings)
+        if failure:
+            return failure
 
-            analysis_result = moderation_service.analyze_text(transcript, chapter.audiobook.language)
+    if not transcript:
+        logger.warning(f"Transcription returned empty for Chapter ID: {chapter.chapter_id}.")
+        return {
+            'transcript': transcript,
+            'moderation_status': Chapter.ModerationStatusChoices.NEEDS_REVIEW,
+            'moderation_notes': "Audio was transcribed as empty. Please review manually.",
+        }
 
-            if analysis_result['is_inappropriate']:
-                chapter.moderation_status = Chapter.ModerationStatusChoices.NEEDS_REVIEW
-                chapter.moderation_notes = analysis_result.get('details', 'Flagged by automated content analysis.')
-                logger.info(f"Chapter ID {chapter.chapter_id} flagged for manual review. Reason: {chapter.moderation_notes}")
-            else:
-                chapter.moderation_status = Chapter.ModerationStatusChoices.APPROVED
-                chapter.moderation_notes = 'Automatically approved by content analysis.'
-                logger.info(f"Chapter ID {chapter.chapter_id} automatically approved.")
+    started = time.perf_counter()
+    analysis_result = moderation_service.analyze_text(transcript, language)
+    timings['analysis'] = time.perf_counter() - started
+
+    if analysis_result['is_inappropriate']:
+        fields = {
+            'transcript': transcript,
+            'moderation_status': Chapter.ModerationStatusChoices.NEEDS_REVIEW,
+            'moderation_notes': analysis_result.get('details', 'Flagged by automated content analysis.'),
+        }
+        logger.info(f"Chapter ID {chapter.chapter_id} flagged for manual review. Reason: {fields['moderation_notes']}")
+    else:
+        fields = {
+            'transcript': transcript,
+            'moderation_status': Chapter.ModerationStatusChoices.APPROVED,
+            'moderation_notes': 'Automatically approved by content analysis.',
+        }
+        logger.info(f"Chapter ID {chapter.chapter_id} automatically approved.")
+
+    moderation_cache.put(cache_key, transcript, rules_version, fields['moderation_status'], fields['moderation_notes'])
+    return fields
 
-            chapter.save()
 
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def process_chapter_for_moderation(self, chapter_id, queued_at=None):
+    """
+    Celery task to process a single chapter for content moderation.
+
+    The external transcription and analysis calls run without any database
+    lock; the verdict is then written in a single update. Runs in the chord
+    built by ``moderate_audiobook``, whose callback decides the audiobook
+    status once every chapter is done. ``queued_at`` (a UNIX timestamp) is
+    when the chord was dispatched, for the queue wait metric.
+    """
+    timings = {}
+    if queued_at and not self.request.retries:
+        timings['queue_wait'] = max(time.time() - queued_at, 0)
+
+    try:
+        chapter = Chapter.objects.select_related('audiobook').get(chapter_id=chapter_id)
     except Chapter.DoesNotExist:
         logger.error(f"Chapter with ID {chapter_id} not found for moderation.")
-        return 
+        return {'chapter_id': chapter_id, 'moderation_status': None, 'timings': timings}
+
+    logger.info(f"Starting moderation for Chapter ID: {chapter.chapter_id} ('{chapter.chapter_name}')")
+    try:
+        fields = _moderate_chapter(chapter, timings)
     except Exception as exc:
         logger.error(f"An unexpected error occurred during moderation of chapter {chapter_id}: {exc}", exc_info=True)
-        try:
-            with transaction.atomic():
-                chapter = Chapter.objects.select_for_update().get(chapter_id=chapter_id)
-                chapter.moderation_status = Chapter.ModerationStatusChoices.NEEDS_REVIEW
-                chapter.moderation_notes = f"Processing failed with an unexpected error. Needs manual review."
-                chapter.save(update_fields=['moderation_status', 'moderation_notes'])
-        except Chapter.DoesNotExist:
-            pass 
-        self.retry(exc=exc)
+        if self.request.retries < self.max_retries:
+            raise self.retry(exc=exc)
+        # Not raised: a failing chapter must not keep the chord callback from deciding the audiobook status
+        fields = {
+            'moderation_status': Chapter.ModerationStatusChoices.NEEDS_REVIEW,
+            'moderation_notes': "Processing failed with an unexpected error. Needs manual review.",
+        }
 
-    finally:
-        try:
-            chapter = Chapter.objects.get(chapter_id=chapter_id)
-            check_and_update_audiobook_status.delay(chapter.audiobook.audiobook_id)
-        except Chapter.DoesNotExist:
-            pass
+    Chapter.objects.filter(chapter_id=chapter_id).update(**fields)
+    moderation_service.record_chapter_timings(**timings)
+    logger.info(
+        f"Moderation of Chapter ID {chapter_id} finished: {fields['moderation_status']} "
+        f"({', '.join(f'{name} {seconds:.2f}s' for name, seconds in timings.items()) or 'no timings'})"
+    )
+    return {'chapter_id': chapter_id, 'moderation_status': str(fields['moderation_status']), 'timings': timings}
+
+
+@shared_task
+def moderate_audiobook(audiobook_id):
+    """
+    Fans the audiobook's chapters that await moderation out to
+    ``process_chapter_for_moderation`` as one chord; its single callback,
+    ``finalize_audiobook_moderation``, decides the audiobook status.
+    """
+    chapter_ids = list(Chapter.objects.filter(
+        audiobook_id=audiobook_id,
+        audio_status=Chapter.AudioStatusChoices.READY,
+        moderation_status=Chapter.ModerationStatusChoices.PENDING_REVIEW,
+    ).values_list('chapter_id', flat=True))
+    if not chapter_ids:
+        check_and_update_audiobook_status(audiobook_id)
+        return
+
+    queued_at = time.time()
+    header = [process_chapter_for_moderation.s(chapter_id, queued_at=queued_at) for chapter_id in chapter_ids]
+    chord(header)(finalize_audiobook_moderation.s(audiobook_id))
+    logger.info(f"Dispatched moderation of {len(chapter_ids)} chapters for Audiobook ID {audiobook_id}")
+
+
+@shared_task
+def finalize_audiobook_moderation(results, audiobook_id):
+    """Chord callback of ``moderate_audiobook``: decides the audiobook status once."""
+    statuses = Counter(result['moderation_status'] for result in results if result)
+    logger.info(f"Moderation of Audiobook ID {audiobook_id} finished for {len(results)} chapters: {dict(statuses)}")
+    check_and_update_audiobook_status(audiobook_id)
+
+    queue_chapter_packaging([
+        result['chapter_id'] for result in results
+        if result and result['moderation_status'] == Chapter.ModerationStatusChoices.APPROVED
+    ])
+
+
+def dispatch_audiobook_moderation(audiobook_id, tts_chapter_ids=()):
+    """
+    Moderates a newly submitted audiobook: its TTS chapters are synthesized
+    first (as a group), then ``moderate_audiobook`` runs once for the book.
+    """
+    if tts_chapter_ids:
+        synthesis = group(generate_chapter_tts_audio.si(chapter_id) for chapter_id in tts_chapter_ids)
+        return chain(synthesis, moderate_audiobook.si(audiobook_id)).delay()
+    return moderate_audiobook.delay(audiobook_id)
 
 
 @shared_task
@@ -141,4 +255,249 @@ def check_and_update_audiobook_status(audiobook_id):
                     logger.error(f"Audiobook ID {audiobook_id} has an unhandled chapter status mix: {chapter_statuses}")
 
     except Audiobook.DoesNotExist:
-        logger.error(f"Audiobook with ID {audiobook_id} not found for status check.")
\ No newline at end of file
+        logger.error(f"Audiobook with ID {audiobook_id} not found for status check.")
+
+@shared_task(bind=True, max_retries=2, default_retry_delay=60)
+def generate_chapter_tts_audio(self, chapter_id):
+    """
+    Synthesizes the audio of a TTS chapter created in the pending-audio state
+    by creator_upload_audiobook; ``dispatch_audiobook_moderation`` moderates
+    the book once all its TTS chapters are done. When the retries are used up
+    the chapter is marked failed and needs review.
+    """
+    # Imported here to keep the TTS stack out of every worker that only runs moderation tasks.
+    from .services.tts.chapter_jobs import set_audio_state, synthesize_chapter_audio
+
+    try:
+        chapter = Chapter.objects.select_related('audiobook').get(chapter_id=chapter_id)
+    except Chapter.DoesNotExist:
+        logger.error(f"Chapter with ID {chapter_id} not found for TTS generation.")
+        return
+    if chapter.audio_status == Chapter.AudioStatusChoices.READY:
+        logger.info(f"Chapter ID {chapter_id} already has its audio; skipping TTS generation.")
+        return
+
+    try:
+        synthesize_chapter_audio(chapter)
+    except Exception as exc:
+        if self.request.retries < self.max_retries:
+            logger.warning(f"TTS generation for Chapter ID {chapter_id} failed, retrying: {exc}")
+            set_audio_state(chapter_id, audio_status=Chapter.AudioStatusChoices.PENDING, audio_progress=0)
+            raise self.retry(exc=exc)
+        logger.error(f"TTS generation for Chapter ID {chapter_id} failed: {exc}", exc_info=True)
+        # Not raised, so the audiobook's moderation still runs; the chapter is left for manual review
+        set_audio_state(
+            chapter_id,
+            audio_status=Chapter.AudioStatusChoices.FAILED,
+            moderation_status=Chapter.ModerationStatusChoices.NEEDS_REVIEW,
+            moderation_notes=f"TTS audio generation failed: {exc}",
+        )
+
+
+@shared_task(bind=True, max_retries=2, default_retry_delay=120)
+def package_chapter_hls(self, chapter_id):
+    """
+    Packages an approved chapter's local audio for HLS and points the chapter
+    at the package, removing the one it replaces. Chapters served from an
+    external URL are left to progressive streaming.
+    """
+    try:
+        chapter = Chapter.objects.get(chapter_id=chapter_id)
+    except Chapter.DoesNotExist:
+        logger.error(f"Chapter with ID {chapter_id} not found for HLS packaging.")
+        return
+    if not chapter.audio_file or chapter.external_audio_url:
+        logger.info(f"Chapter ID {chapter_id} has no local audio; skipping HLS packaging.")
+        return
+    if chapter.moderation_status != Chapter.ModerationStatusChoices.APPROVED:
+        logger.info(f"Chapter ID {chapter_id} is not approved; skipping HLS packaging.")
+        return
+
+    try:
+        package = hls_packaging.package_chapter(chapter)
+    except hls_packaging.PackagingError as exc:
+        # Progressive streaming keeps working without a package
+        logger.error(f"HLS packaging of Chapter ID {chapter_id} failed: {exc}")
+        return
+    except Exception as exc:
+        logger.warning(f"HLS packaging of Chapter ID {chapter_id} failed, retrying: {exc}")
+        raise self.retry(exc=exc)
+
+    # Only if the audio was not replaced while it was being packaged
+    updated = Chapter.objects.filter(chapter_id=chapter_id, audio_file=chapter.audio_file.name).update(hls_package=package)
+    if not updated:
+        hls_packaging.remove_package(package)
+    elif chapter.hls_package and chapter.hls_package != package:
+        hls_packaging.remove_package(chapter.hls_package)
+
+
+@shared_task(bind=True, max_retries=2, default_retry_delay=120)
+def transcode_chapter_audio(self, chapter_id):
+    """
+    Encodes the loudness-normalized renditions of a chapter's uploaded audio
+    and replaces the chapter's previous ones. Routed to the transcoding queue
+    (AUDIO_TRANSCODING_QUEUE), whose worker concurrency caps the ffmpeg load.
+    """
+    try:
+        chapter = Chapter.objects.get(chapter_id=chapter_id)
+    except Chapter.DoesNotExist:
+        logger.error(f"Chapter with ID {chapter_id} not found for transcoding.")
+        return
+    if not chapter.audio_file or chapter.external_audio_url:
+        logger.info(f"Chapter ID {chapter_id} has no uploaded audio; skipping transcoding.")
+        return
+
+    source_name = chapter.audio_file.name
+    try:
+        source_size = os.path.getsize(chapter.audio_file.path)
+    except OSError as exc:
+        # Deleted or replaced before this task ran; a replacement queues its own transcoding
+        logger.error(f"Audio of Chapter ID {chapter_id} is not readable for transcoding: {exc}")
+        return
+    with tempfile.TemporaryDirectory(prefix='audiox_transcode_') as work_dir:
+        try:
+            result = transcoding.transcode(chapter.audio_file.path, work_dir)
+        except transcoding.TranscodingError as exc:
+            # The upload keeps being served as is
+            logger.error(f"Transcoding of Chapter ID {chapter_id} failed: {exc}")
+            return
+        except Exception as exc:
+            logger.warning(f"Transcoding of Chapter ID {chapter_id} failed, retrying: {exc}")
+            raise self.retry(exc=exc)
+
+        with transaction.atomic():
+            chapter = Chapter.objects.select_for_update().select_related('audiobook').get(chapter_id=chapter_id)
+            if chapter.audio_file.name != source_name:
+                logger.info(f"Audio of Chapter ID {chapter_id} was replaced while transcoding; discarding the renditions.")
+                return
+            chapter.renditions.all().delete()
+            for encoded in result['renditions']:
+                rendition = ChapterRendition(
+                    chapter=chapter,
+                    profile=encoded['profile'],
+                    codec=encoded['codec'],
+                    bitrate_kbps=encoded['bitrate_kbps'],
+                    size_bytes=encoded['size_bytes'],
+                    integrated_lufs=result['integrated_lufs'],
+                )
+                name = f"{chapter.audiobook.slug}/ch_{chapter.chapter_order}_{encoded['profile']}{transcoding.EXTENSION}"
+                with open(encoded['path'], 'rb') as f:
+                    rendition.audio_file.save(name, File(f), save=False)
+                rendition.save()
+
+    sizes = {encoded['profile']: encoded['size_bytes'] for encoded in result['renditions']}
+    served_size = sizes.get(transcoding.DEFAULT_PROFILE, source_size)
+    transcoding.record(source_size, served_size, len(sizes))
+    logger.info(
+        f"Transcoded Chapter ID {chapter_id} ({result['integrated_lufs']:.1f} LUFS, {source_size} bytes): "
+        f"{', '.join(f'{profile} {size} bytes' for profile, size in sizes.items()) or 'no rendition smaller than the upload'}; "
+        f"{source_size - served_size} bytes saved per default stream"
+    )
+    return {'chapter_id': chapter_id, 'renditions': sizes, 'bytes_saved': source_size - served_size}
+
+
+def queue_chapter_packaging(chapter_ids):
+    """
+    Queues ``package_chapter_hls`` for chapters that became approved with local
+    audio, once the transaction commits. Called by ``Chapter.save`` and by the
+    paths that approve chapters with a queryset update.
+    """
+    if not hls_packaging.ENABLED:
+        return
+    for chapter_id in chapter_ids:
+        transaction.on_commit(partial(package_chapter_hls.delay, chapter_id))
+
+
+def queue_chapter_transcoding(chapter_ids):
+    """Queues ``transcode_chapter_audio`` for newly stored chapter audio, once the transaction commits."""
+    if not transcoding.ENABLED:
+        return
+    for chapter_id in chapter_ids:
+        transaction.on_commit(partial(transcode_chapter_audio.delay, chapter_id))
+
+
+@shared_task(ignore_result=True)
+def refresh_external_catalog_cache(lock_token=None):
+    """
+    Rebuilds the external (LibriVox / Archive.org) catalog snapshot in the
+    background and releases the single-flight lock taken by the request that
+    noticed the stale or missing snapshot.
+    """
+    # Imported here because content_views imports this module to schedule the task.
+    from .views.content_views import rebuild_audiobooks_cache, finish_catalog_refresh, ingest_catalog_snapshot
+
+    succeeded = False
+    try:
+        data, report = rebuild_audiobooks_cache()
+        succeeded = data is not None
+        logger.info(
+            f"External catalog refresh finished in {report.wall_seconds:.2f}s "
+            f"({'updated' if succeeded else 'no data fetched'})."
+        )
+        if succeeded:
+            ingest_catalog_snapshot(data)
+    except Exception as e:
+        logger.error(f"External catalog refresh failed: {e}", exc_info=True)
+    finally:
+        if lock_token:
+            finish_catalog_refresh(lock_token, succeeded)
+
+
+@shared_task(ignore_result=True)
+def convert_document_to_audio(job_id):
+    """
+    Runs a queued document-to-audio job: extracts the text of the uploaded
+    document page by page, synthesizing it segment by segment as it arrives,
+    and stores the MP3 on the job.
+    Progress is saved on the job and pushed to its WebSocket group.
+    """
+    # Imported here to keep the TTS stack out of every worker that only runs moderation tasks.
+    from .services.tts.document_jobs import NoDocumentText, synthesize_job_audio, update_job
+    from .services.tts.extraction import iter_document_text
+    from .services.tts.voices import voice_for_gender
+
+    try:
+        job = DocumentConversionJob.objects.get(job_id=job_id)
+    except DocumentConversionJob.DoesNotExist:
+        logger.error(f"Document conversion job {job_id} not found.")
+        return
+
+    try:
+        update_job(job, status=DocumentConversionJob.StatusChoices.EXTRACTING)
+        # Pages are extracted as synthesis consumes them, straight from the stored upload
+        with closing(iter_document_text(job.source_file.path, job.content_type, job.language)) as text_chunks:
+            voice = voice_for_gender(job.language, job.narrator_gender)
+            synthesize_job_audio(job, text_chunks, voice['edge_voice_id'])
+    except NoDocumentText:
+        error_message = "Could not extract text from the document. It might be empty or contain only images."
+        if job.language == 'Urdu' and job.content_type.startswith('image/'):
+            error_message += " For Urdu images, ensure the text is clear and readable."
+        update_job(job, status=DocumentConversionJob.StatusChoices.FAILED, error_message=error_message)
+    except Exception as e:
+        logger.error(f"Document conversion job {job_id} failed: {e}", exc_info=True)
+        update_job(
+            job,
+            status=DocumentConversionJob.StatusChoices.FAILED,
+            error_message=f"Could not generate audio for {job.language}. The TTS service may be temporarily unavailable."
+        )
+    finally:
+        # The upload is only needed for extraction; the job keeps its original filename
+        if job.source_file:
+            job.source_file.delete(save=False)
+            job.save(update_fields=['source_file', 'updated_at'])
+
+
+@shared_task(ignore_result=True)
+def purge_expired_document_jobs():
+    """
+    Deletes finished document conversion jobs last updated more than
+    TTS_DOCUMENT_JOB_RETENTION_DAYS ago, with their files (see
+    signals.delete_document_job_files). Scheduled in CELERY_BEAT_SCHEDULE.
+    """
+    retention_days = getattr(settings, 'TTS_DOCUMENT_JOB_RETENTION_DAYS', 7)
+    cutoff = timezone.now() - timedelta(days=retention_days)
+    deleted, _ = DocumentConversionJob.objects.filter(
+        status__in=[DocumentConversionJob.StatusChoices.COMPLETED, DocumentConversionJob.StatusChoices.FAILED],
+        updated_at__lt=cutoff,
+    ).delete()
+    logger.info(f"Purged {deleted} document conversion jobs finished more than {retention_days} days ago.")
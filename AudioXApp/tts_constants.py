@@ -7,28 +7,9 @@ and language/genre mappings to avoid circular imports between view files.
 
 # --- TTS Voice and Language/Genre Constants ---
 
-EDGE_TTS_VOICES_BY_LANGUAGE = {
-    'English': [
-        {'id': 'en-US-AriaNeural', 'name': 'Aria (Female)', 'gender': 'female', 'edge_voice_id': 'en-US-AriaNeural'},
-        {'id': 'en-US-GuyNeural', 'name': 'Guy (Male)', 'gender': 'male', 'edge_voice_id': 'en-US-GuyNeural'},
-        {'id': 'en-GB-LibbyNeural', 'name': 'Libby (Female, UK)', 'gender': 'female', 'edge_voice_id': 'en-GB-LibbyNeural'},
-        {'id': 'en-GB-RyanNeural', 'name': 'Ryan (Male, UK)', 'gender': 'male', 'edge_voice_id': 'en-GB-RyanNeural'},
-        {'id': 'en-AU-NatashaNeural', 'name': 'Natasha (Female, AU)', 'gender': 'female', 'edge_voice_id': 'en-AU-NatashaNeural'},
-        {'id': 'en-IN-NeerjaNeural', 'name': 'Neerja (Female, IN)', 'gender': 'female', 'edge_voice_id': 'en-IN-NeerjaNeural'},
-    ],
-    'Urdu': [
-        {'id': 'ur-PK-UzmaNeural', 'name': 'Uzma (Female)', 'gender': 'female', 'edge_voice_id': 'ur-PK-UzmaNeural'},
-        {'id': 'ur-PK-AsadNeural', 'name': 'Asad (Male)', 'gender': 'male', 'edge_voice_id': 'ur-PK-AsadNeural'},
-    ],
-    'Punjabi': [],
-    'Sindhi': [],
-}
-
-ALL_EDGE_TTS_VOICES_MAP = {
-    voice['id']: voice
-    for lang_voices in EDGE_TTS_VOICES_BY_LANGUAGE.values()
-    for voice in lang_voices
-}
+# Voices live in the shared TTS voice registry; these names are kept for the views and templates using them
+from .services.tts.voices import VOICES_BY_LANGUAGE as EDGE_TTS_VOICES_BY_LANGUAGE
+from .services.tts.voices import VOICES_BY_ID as ALL_EDGE_TTS_VOICES_MAP
 
 LANGUAGE_GENRE_MAPPING = {
     "English": [
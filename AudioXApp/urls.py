@@ -61,12 +61,16 @@ urlpatterns = [
     # ==========================================
     path('', content_views.home, name='home'),
     path('search/', content_views.search_results_view, name='search_results'),
+    path('api/search/', content_views.search_api, name='search_api'),
     path('get-filter-options/', content_views.get_filter_options, name='get_filter_options'),  # NEW: Filter options endpoint
     path("stream_audio/", content_views.stream_audio, name="stream_audio"),
+    path("stream_hls/<str:token>/<str:package>/<path:name>", content_views.stream_hls, name="stream_hls"),
     path("fetch_cover_image/", content_views.fetch_cover_image, name="fetch_cover_image"),
     path('audiobook/<slug:audiobook_slug>/', content_views.audiobook_detail, name='audiobook_detail'),
     path('audiobook/<slug:audiobook_slug>/add_review/', content_views.add_review, name='add_review'),
     path('audiobook/<int:audiobook_id>/report/', content_views.submit_content_report_view, name='submit_content_report'),
+    path('api/external-catalog/status/', content_views.debug_external_audiobooks, name='external_catalog_status'),
+    path('api/external-catalog/refresh/', content_views.refresh_external_audiobooks, name='external_catalog_refresh'),
     
     # ==========================================
     # CHAPTER UNLOCK URLS (NEW)
@@ -121,6 +125,8 @@ urlpatterns = [
     path('creator/generate-audio-from-document/', creator_tts_views.generate_document_tts_preview_audio, name='creator_generate_audio_from_document'),
     path('trending/', content_views.trending_audiobooks_view, name='trending_audiobooks'),
     path('generate-audio/', document_to_audio_feature_views.generate_audio_from_document, name='general_generate_audio_from_document'),
+    path('generate-audio/jobs/<uuid:job_id>/', document_to_audio_feature_views.document_conversion_job_status, name='document_conversion_job_status'),
+    path('generate-audio/jobs/<uuid:job_id>/download/', document_to_audio_feature_views.download_document_conversion_audio, name='document_conversion_job_download'),
     path('audiobook/<int:audiobook_id>/get-ai-summary/', summary_views.get_ai_summary, name='get_ai_summary'),
     path('api/clip/generate/', clip_views.generate_audio_clip, name='generate_audio_clip'),
 
@@ -225,6 +231,7 @@ urlpatterns = [
     path('api/audiobook/log-view/', creator_audiobook_views.log_audiobook_view, name='log_audiobook_view'),
     path('api/creator/generate-tts-preview/', creator_tts_views.generate_tts_preview_audio, name='generate_tts_preview_audio'),
     path('api/creator/generate-document-tts-preview/', creator_tts_views.generate_document_tts_preview_audio, name='generate_document_tts_preview_audio'),
+    path('api/creator/tts-segment-cache/status/', creator_tts_views.tts_segment_cache_status, name='tts_segment_cache_status'),
 
     # ==========================================
     # ADMIN AUTHENTICATION URLS
@@ -251,6 +258,7 @@ urlpatterns = [
 
     # Admin Moderation & Keyword Management
     path('admin/manage-content/moderation-queue/', admin_content_manage_views.admin_moderation_queue_view, name='admin_moderation_queue'),
+    path('admin/manage-content/moderation-queue/metrics/', admin_content_manage_views.admin_moderation_metrics_view, name='admin_moderation_metrics'),
     path('admin/manage-content/audiobook/<int:audiobook_id>/approve/', admin_content_manage_views.admin_approve_audiobook_view, name='admin_approve_audiobook'),
     path('admin/manage-content/audiobook/<int:audiobook_id>/reject/', admin_content_manage_views.admin_reject_audiobook_view, name='admin_reject_audiobook'),
     path('admin/manage-content/keywords/', admin_content_manage_views.admin_manage_keywords_view, name='admin_manage_keywords'),
@@ -1,13 +1,15 @@
 # AudioXApp/views/admin_views/admin_content_manage_views.py
 
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import JsonResponse
 from django.contrib.auth.decorators import login_required # Keep this import for now, as other admin_views files might still use it
 from django.views.decorators.http import require_POST, require_GET
 from django.contrib import messages
 from django.urls import reverse
-from django.core.cache import cache
 from .. import decorators
 from AudioXApp.models import Audiobook, Chapter, Admin, BannedKeyword, ContentReport
+from AudioXApp.services import moderation_cache, moderation_service, transcoding
+from AudioXApp.tasks import queue_chapter_packaging
 import json
 from django.utils.timezone import now, timedelta
 from django.db.models import Q, Prefetch, Count
@@ -356,6 +358,23 @@ def admin_moderation_queue_view(request):
     return render(request, 'admin/manage_content/admin_moderation_queue.html', context)
 
 
+@require_GET
+# REMOVED @login_required
+@decorators.admin_role_required('full_access', 'manage_content')
+def admin_moderation_metrics_view(request):
+    """
+    Returns the automated moderation pipeline's per-chapter timings (queue
+    wait, transcription, analysis), moderation cache hits and the bytes saved
+    by transcoding uploads as JSON.
+    """
+    return JsonResponse({
+        'success': True,
+        'moderation_metrics': moderation_service.get_metrics(),
+        'moderation_cache': moderation_cache.get_metrics(),
+        'transcoding': transcoding.get_metrics(),
+    })
+
+
 @require_POST
 # REMOVED @login_required
 @decorators.admin_role_required('full_access', 'manage_content')
@@ -368,10 +387,15 @@ def admin_approve_audiobook_view(request, audiobook_id):
 
     try:
         with transaction.atomic():
+            newly_approved_ids = list(audiobook.chapters.exclude(
+                moderation_status=Chapter.ModerationStatusChoices.APPROVED
+            ).values_list('chapter_id', flat=True))
             audiobook.chapters.all().update(
                 moderation_status=Chapter.ModerationStatusChoices.APPROVED,
                 moderation_notes=f"Approved by admin '{admin_user.username}' as part of bulk audiobook approval."
             )
+            # A queryset update skips Chapter.save, which queues packaging for single approvals
+            queue_chapter_packaging(newly_approved_ids)
             
             audiobook.moderation_status = Audiobook.ModerationStatusChoices.APPROVED
             audiobook.status = 'PUBLISHED'
@@ -439,10 +463,6 @@ def admin_manage_keywords_view(request):
             try:
                 BannedKeyword.objects.create(keyword=keyword, language=language, added_by=admin_user)
                 messages.success(request, f"Keyword '{keyword}' for '{language}' added successfully.")
-                # --- FIX: Clear the cache for the updated language ---
-                cache_key = f'banned_keywords_{language}'
-                cache.delete(cache_key)
-                # --- END FIX ---
             except IntegrityError:
                 messages.error(request, f"The keyword '{keyword}' already exists.")
             except Exception as e:
@@ -485,12 +505,7 @@ def admin_delete_keyword_view(request, keyword_id):
     try:
         keyword = get_object_or_404(BannedKeyword, id=keyword_id)
         keyword_text = keyword.keyword
-        language_code = keyword.language # Get language before deleting
         keyword.delete()
-        # --- FIX: Clear the cache for the updated language ---
-        cache_key = f'banned_keywords_{language_code}'
-        cache.delete(cache_key)
-        # --- END FIX ---
         messages.success(request, f"Keyword '{keyword_text}' has been deleted.")
     except Exception as e:
         messages.error(request, f"An error occurred while deleting the keyword: {e}")
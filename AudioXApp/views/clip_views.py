@@ -20,6 +20,8 @@ import re
 from pydub import AudioSegment
 from pydub.exceptions import CouldntDecodeError
 from ..models import Chapter, Audiobook, User
+from ..services import audio_chunk_cache
+from .content_views import CACHE_KEY, CATALOG_META_CACHE_KEY, get_external_book
 
 # FFmpeg configuration - Docker and local compatibility
 FFMPEG_PATH = os.getenv('FFMPEG_PATH', '/usr/bin/ffmpeg')  # Docker default
@@ -154,23 +156,10 @@ def generate_audio_clip(request):
                 chapter_parsed_index = int(parts[-1])
                 audiobook_slug = '-'.join(parts[1:-1]) 
                 audiobook_obj_for_perms = get_object_or_404(Audiobook, slug=audiobook_slug)
-                cache_key = 'librivox_archive_audiobooks_data_v7'
-                external_data_cache = cache.get(cache_key)
-                if not external_data_cache:
-                    logger.error(f"External audiobook cache '{cache_key}' is empty.")
+                if cache.get(CATALOG_META_CACHE_KEY) is None:
+                    logger.error(f"External audiobook cache '{CACHE_KEY}' is empty.")
                     return JsonResponse({'status': 'error', 'message': msg_ext_cache_empty}, status=503)
-                found_cached_book = None
-                for source_key in ["librivox_audiobooks", "archive_genre_audiobooks", "archive_language_audiobooks"]:
-                    if source_key == "librivox_audiobooks":
-                        item_list = external_data_cache.get(source_key, [])
-                        for book_dict in item_list:
-                            if book_dict.get('slug') == audiobook_slug: found_cached_book = book_dict; break
-                    else:
-                        for _, book_list_items in external_data_cache.get(source_key, {}).items():
-                            for book_dict in book_list_items:
-                                if book_dict.get('slug') == audiobook_slug: found_cached_book = book_dict; break
-                            if found_cached_book: break
-                    if found_cached_book: break
+                found_cached_book = get_external_book(audiobook_slug)
                 if not found_cached_book:
                     logger.error(f"Audiobook slug '{audiobook_slug}' not found in cache for {chapter_id_from_payload}.")
                     return JsonResponse({'status': 'error', 'message': msg_audiobook_not_found_ext}, status=404)
@@ -211,15 +200,19 @@ def generate_audio_clip(request):
             if target_audio_url_for_processing.startswith('http://') or target_audio_url_for_processing.startswith('https://'):
                 logger.info(f"Downloading external audio: {target_audio_url_for_processing}")
                 try:
-                    with requests.get(target_audio_url_for_processing, stream=True, timeout=60) as r: 
-                        r.raise_for_status()
-                        temp_filename = f"temp_dl_{uuid.uuid4().hex}.mp3" 
-                        temp_downloaded_file_path = os.path.join(TEMP_CLIP_DIR_PATH, temp_filename)
-                        with open(temp_downloaded_file_path, 'wb') as f:
-                            for chunk in r.iter_content(chunk_size=8192): f.write(chunk)
+                    temp_filename = f"temp_dl_{uuid.uuid4().hex}.mp3" 
+                    temp_downloaded_file_path = os.path.join(TEMP_CLIP_DIR_PATH, temp_filename)
+                    if audio_chunk_cache.ENABLED:
+                        # Blocks already cached by the stream proxy are read from disk; the rest are fetched and cached
+                        audio_chunk_cache.download_to_file(target_audio_url_for_processing, temp_downloaded_file_path, timeout=60)
+                    else:
+                        with requests.get(target_audio_url_for_processing, stream=True, timeout=60) as r:
+                            r.raise_for_status()
+                            with open(temp_downloaded_file_path, 'wb') as f:
+                                for chunk in r.iter_content(chunk_size=8192): f.write(chunk)
                     actual_audio_file_path_for_pydub = temp_downloaded_file_path
                     logger.info(f"Successfully downloaded to {actual_audio_file_path_for_pydub}")
-                except requests.exceptions.RequestException as e_req:
+                except (requests.exceptions.RequestException, audio_chunk_cache.StaleEntry) as e_req:
                     logger.error(f"Failed to download external audio {target_audio_url_for_processing}: {e_req}")
                     return JsonResponse({'status': 'error', 'message': msg_external_audio_retrieve_fail}, status=502)
             else: 
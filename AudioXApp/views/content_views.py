@@ -5,35 +5,47 @@ Handles audiobook content display, search, streaming, and related functionality
 
 import random
 import requests
+import httpx
 import feedparser
 import mimetypes
 import json
 import os
-import re
 import time
 import logging
-from urllib.parse import urlparse, quote  # Ensure 'quote' is imported
+import threading
+import uuid
+import contextvars
+import heapq
+from urllib.parse import urlparse, quote, unquote  # Ensure 'quote' is imported
 from decimal import Decimal
 from collections import defaultdict
+from functools import partial
 
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import JsonResponse, HttpResponse, StreamingHttpResponse, Http404, FileResponse
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse, Http404, FileResponse, HttpResponseNotAllowed
 from django.contrib import messages
 from django.core.cache import cache
 from django.urls import reverse # Ensure 'reverse' is imported
 from django.utils.text import slugify
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_http_date_safe
 from django.views.decorators.csrf import csrf_exempt, csrf_protect
 from django.views.decorators.http import require_POST, require_GET
 from django.contrib.auth.decorators import login_required
 from django.db.models import Q, Prefetch, Avg, F, Count
 from django.conf import settings
-from django.core.exceptions import SuspiciousOperation
+from django.core.exceptions import SuspiciousFileOperation, SuspiciousOperation
+from django.core import signing
 from django.utils.timesince import timesince
 from django.db import transaction, IntegrityError
 from django.utils import timezone
+from django.utils._os import safe_join
 from django.middleware.csrf import get_token
 from django.core.paginator import Paginator
+from django.core.signals import request_finished, request_started
+from django.dispatch import receiver
 from django.templatetags.static import static
+from asgiref.sync import sync_to_async
 
 
 from ..models import (
@@ -41,6 +53,10 @@ from ..models import (
     CreatorEarning, Creator, AudiobookViewLog, ContentReport, ListeningHistory,
     ChapterUnlock
 )
+from ..services import audio_chunk_cache, audio_proxy, catalog_index, catalog_text_index, hls_packaging, http_ranges, media_offload, search_engine, stream_tokens, transcoding
+from ..services.catalog_ingest import ingest_external_books, ingest_external_catalog
+from ..services.catalog_harvester import CatalogHarvester, HarvestJob, OUTCOME_SKIPPED
+from ..tasks import refresh_external_catalog_cache
 from .utils import _get_full_context
 
 logger = logging.getLogger(__name__)
@@ -64,9 +80,50 @@ LANGUAGE_GENRE_MAPPING = {
 
 CACHE_KEY = 'librivox_archive_audiobooks_data_v7'
 CACHE_DURATION = 6 * 60 * 60  # 6 hours
+CATALOG_VALIDATORS_CACHE_KEY = f'{CACHE_KEY}_validators'  # ETag/Last-Modified per feed and identifier
+CATALOG_META_CACHE_KEY = f'{CACHE_KEY}_meta'  # snapshot version and soft expiry
+CATALOG_REFRESH_LOCK_KEY = f'{CACHE_KEY}_refresh_lock'
+CATALOG_STATS_KEY_PREFIX = f'{CACHE_KEY}_stats'
+CATALOG_INGESTED_VERSION_KEY = f'{CACHE_KEY}_ingested_version'  # last snapshot version written to the database
+# The snapshot is served stale for this long past CACHE_DURATION while a single worker rebuilds it
+CATALOG_STALE_GRACE = getattr(settings, 'EXTERNAL_CATALOG_STALE_GRACE_SECONDS', 24 * 60 * 60)
+CATALOG_REFRESH_LOCK_TIMEOUT = getattr(settings, 'EXTERNAL_CATALOG_REFRESH_LOCK_SECONDS', 15 * 60)
+CATALOG_REFRESH_FAILURE_COOLDOWN = getattr(settings, 'EXTERNAL_CATALOG_REFRESH_COOLDOWN_SECONDS', 5 * 60)
 FREE_PREVIEW_CHAPTERS = getattr(settings, 'FREE_PREVIEW_CHAPTERS_COUNT', 1)
 DEFAULT_COVER_IMAGE = static('img/default_book_cover.png')
 CHAPTER_UNLOCK_COST = 50 # NEW: Define chapter unlock cost
+SEARCH_PAGE_SIZE = 20
+SEARCH_API_MAX_PAGE_SIZE = 50
+SEARCH_CURSOR_SALT = 'AudioXApp.search_cursor'
+
+# External catalog sources (base URLs are overridable so a local stub can stand in)
+LIBRIVOX_BASE_URL = getattr(settings, 'LIBRIVOX_BASE_URL', 'https://librivox.org')
+ARCHIVE_ORG_BASE_URL = getattr(settings, 'ARCHIVE_ORG_BASE_URL', 'https://archive.org')
+LIBRIVOX_RSS_FEED_IDS = [47, 52, 53, 54, 59, 60, 61, 62]
+ARCHIVE_SEARCH_TERMS = [
+    "Fiction", "Mystery", "Thriller", "Science Fiction", "Fantasy",
+    "Romance", "Biography", "History", "Self-Help", "Business",
+    "Urdu", "Punjabi", "Sindhi"
+]
+ARCHIVE_LANGUAGE_TERMS = ["Urdu", "Punjabi", "Sindhi"]
+ARCHIVE_AUDIO_FORMATS = ["VBR MP3", "MP3", "64Kbps MP3", "128Kbps MP3"]
+MANUAL_LANGUAGE_ITEMS = {
+    "Urdu": [
+        "Saadat-Hasan-Manto-Ke-Behtreen-Afsane-Urdu-Audio-Book",
+        "Urdu-Poetry-Mehfil-e-Mushaira",
+        "Mirza-Ghalib-Ki-Ghazlain-Urdu-Audio-Book"
+    ],
+    "Punjabi": [
+        "Heer-Waris-Shah-Punjabi-Audio-Book",
+        "sultan-bahoo-kalam-punjabi-sufi-poetry",
+        "Shiv-Kumar-Batalvi-Birha-Da-Sultan-Punjabi-Poetry"
+    ],
+    "Sindhi": [
+        "Shah-Jo-Risalo-Audio-Sindhi-Sufi-Poetry",
+        "Shaikh-Ayaz-Sindhi-Poetry-Audio",
+        "sindhi-folk-tales"
+    ]
+}
 
 
 # ==========================================
@@ -155,612 +212,814 @@ def get_chapter_accessibility(chapter, audiobook, user, chapter_index):
     return (False, "unknown")
 
 
-def calculate_relevance_score(book, query):
-    """Calculate relevance score for search results"""
-    if not query:
-        return 1.0
+# ==========================================
+# EXTERNAL DATA FETCHING
+# ==========================================
 
-    score = 0.0
-    query_lower = query.lower()
+def _proxy_cover_image(book_data):
+    """Routes remote cover images through our cover proxy before caching."""
+    if book_data['cover_image'] and (book_data['cover_image'].startswith('http://') or book_data['cover_image'].startswith('https://')):
+        book_data['cover_image'] = reverse('AudioXApp:fetch_cover_image') + f'?url={quote(book_data["cover_image"])}'
+    return book_data
 
-    # Title match (highest weight)
-    if query_lower in book.title.lower():
-        score += 0.4
-        if book.title.lower().startswith(query_lower):
-            score += 0.2
 
-    # Author match
-    if book.author and query_lower in book.author.lower():
-        score += 0.2
+def _first_value(value, default):
+    if isinstance(value, list):
+        return value[0] if value else default
+    return value
 
-    # Genre match
-    if book.genre and query_lower in book.genre.lower():
-        score += 0.1
 
-    # Creator match
-    if hasattr(book, 'creator') and book.creator and book.creator.creator_name:
-        if query_lower in book.creator.creator_name.lower():
-            score += 0.1
+def _extract_archive_chapters(identifier, item_metadata):
+    chapters = []
+    for file_item in item_metadata.get("files", []):
+        if file_item.get("format") in ARCHIVE_AUDIO_FORMATS and "name" in file_item:
+            chapter_title = str(file_item.get("title", file_item.get("name", 'Untitled Chapter'))).replace('"', '').strip()
+            duration = parse_duration_to_seconds(file_item.get('length') or file_item.get('duration'))
 
-    # Description match
-    if book.description and query_lower in book.description.lower():
-        score += 0.1
+            chapters.append({
+                "chapter_title": chapter_title,
+                "audio_url": f"https://archive.org/download/{identifier}/{quote(file_item['name'])}",
+                "duration_seconds": duration
+            })
+    return chapters
 
-    # Boost popular books
-    if book.total_views > 1000:
-        score += 0.1
 
-    return min(score, 1.0)
+def _archive_item_has_cover(item_metadata):
+    return any(f.get("name", "").lower().endswith(('.jpg', '.jpeg', '.png')) for f in item_metadata.get("files", []))
 
 
-def sort_search_results(results, query):
-    """Sort search results by relevance and popularity"""
-    if query:
-        return sorted(
-            results,
-            key=lambda x: (x.get('relevance_score', 0), x.get('total_views', 0)),
-            reverse=True
-        )
-    else:
-        return sorted(
-            results,
-            key=lambda x: (x.get('total_views', 0), x.get('publish_date') or ''),
-            reverse=True
-        )
+def _build_librivox_book(rss_url, feed_content):
+    """Builds a LibriVox book dict from a raw RSS payload, or returns None."""
+    feed = feedparser.parse(feed_content)
 
-# ==========================================
-# EXTERNAL DATA FETCHING
-# ==========================================
+    if feed.bozo:
+        logger.warning(f"Bozo feed detected for {rss_url}: {feed.bozo_exception}")
+    if not feed.entries:
+        logger.info(f"No entries found in RSS feed: {rss_url}")
+        return None
 
-def fetch_audiobooks_data():
-    """Fetch and cache audiobook data from external sources"""
-    cached_data = cache.get(CACHE_KEY)
-    if cached_data:
-        logger.info(f"CACHE HIT: Using cached data for audiobooks (key: {CACHE_KEY})")
-        return cached_data
+    chapters_data = []
+    for entry in feed.entries:
+        audio_url = None
 
-    logger.info(f"CACHE MISS: Fetching fresh data for audiobooks (key: {CACHE_KEY})")
+        # Extract audio URL from enclosures
+        if entry.get('enclosures'):
+            for enc in entry.enclosures:
+                if 'audio' in enc.get('type', '').lower():
+                    audio_url = enc.href
+                    break
 
-    librivox_audiobooks = []
-    archive_genre_audiobooks = {}
-    archive_language_audiobooks = {}
-    fetch_successful = False
+        # Fallback to links
+        if not audio_url and entry.get('links'):
+            for link_entry in entry.links:
+                if ('audio' in link_entry.get('type', '').lower() or
+                        any(link_entry.href.lower().endswith(ext) for ext in ['.mp3', '.ogg', '.m4a', '.wav'])):
+                    audio_url = link_entry.href
+                    break
 
-    # RSS feeds for LibriVox
-    rss_feeds = [
-        "https://librivox.org/rss/47", "https://librivox.org/rss/52",
-        "https://librivox.org/rss/53", "https://librivox.org/rss/54",
-        "https://librivox.org/rss/59", "https://librivox.org/rss/60",
-        "https://librivox.org/rss/61", "https://librivox.org/rss/62"
-    ]
+        if not audio_url:
+            continue
 
-    session = requests.Session()
-    user_agent_host = settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else "AudioXApp.com"
-    headers = {'User-Agent': f'AudioXApp/1.0 (+http://{user_agent_host})'}
+        chapter_title = entry.title.replace('"', '').strip() if entry.get('title') else 'Untitled Chapter'
+        chapter_duration = None
+        if hasattr(entry, 'itunes_duration'):
+            chapter_duration = parse_duration_to_seconds(entry.itunes_duration)
 
-    # Fetch LibriVox data
-    for rss_url in rss_feeds:
-        try:
-            response = session.get(rss_url, timeout=45, headers=headers)
-            response.raise_for_status()
-            feed = feedparser.parse(response.content)
-
-            if feed.bozo:
-                logger.warning(f"Bozo feed detected for {rss_url}: {feed.bozo_exception}")
-            if not feed.entries:
-                logger.info(f"No entries found in RSS feed: {rss_url}")
-                continue
+        chapters_data.append({
+            "chapter_title": chapter_title,
+            "audio_url": audio_url,
+            "duration_seconds": chapter_duration
+        })
 
-            chapters_data = []
-            for entry in feed.entries:
-                audio_url = None
-
-                # Extract audio URL from enclosures
-                if entry.enclosures:
-                    for enc in entry.enclosures:
-                        if 'audio' in enc.get('type', '').lower():
-                            audio_url = enc.href
-                            break
-
-                # Fallback to links
-                if not audio_url and entry.links:
-                    for link_entry in entry.links:
-                        if ('audio' in link_entry.get('type', '').lower() or
-                                any(link_entry.href.lower().endswith(ext) for ext in ['.mp3', '.ogg', '.m4a', '.wav'])):
-                            audio_url = link_entry.href
-                            break
-
-                if not audio_url:
-                    continue
-
-                chapter_title = entry.title.replace('"', '').strip() if entry.title else 'Untitled Chapter'
-                chapter_duration = None
-                if hasattr(entry, 'itunes_duration'):
-                    chapter_duration = parse_duration_to_seconds(entry.itunes_duration)
-
-                chapters_data.append({
-                    "chapter_title": chapter_title,
-                    "audio_url": audio_url,
-                    "duration_seconds": chapter_duration
-                })
+    if not chapters_data:
+        logger.info(f"No chapters with audio found for audiobook in {rss_url}")
+        return None
 
-            if not chapters_data:
-                logger.info(f"No chapters with audio found for audiobook in {rss_url}")
-                continue
+    title = feed.feed.get('title', 'Unknown Title').replace('LibriVox', '').strip()
+    description = feed.feed.get('summary', feed.feed.get('itunes_summary', 'No description available.'))
+    author = feed.feed.get('author', feed.feed.get('itunes_author', 'Various Authors'))
 
-            title = feed.feed.get('title', 'Unknown Title').replace('LibriVox', '').strip()
-            description = feed.feed.get('summary', feed.feed.get('itunes_summary', 'No description available.'))
-            author = feed.feed.get('author', feed.feed.get('itunes_author', 'Various Authors'))
+    cover_image_url = None
+    if hasattr(feed.feed, 'image') and hasattr(feed.feed.image, 'href'):
+        cover_image_url = feed.feed.image.href
 
-            cover_image_url = None
-            if hasattr(feed.feed, 'image') and hasattr(feed.feed.image, 'href'):
-                cover_image_url = feed.feed.image.href
+    # Check for cover image if the audiobook is in English
+    book_language = feed.feed.get('language', 'en')
+    is_english = 'en' in book_language.lower()
+    if is_english and not cover_image_url:
+        logger.info(f"Skipping English LibriVox book '{title}' because it has no cover image.")
+        return None
 
-            # Check for cover image if the audiobook is in English
-            book_language = feed.feed.get('language', 'en')
-            is_english = 'en' in book_language.lower()
-            if is_english and not cover_image_url:
-                logger.info(f"Skipping English LibriVox book '{title}' because it has no cover image.")
-                continue
+    slug = slugify(title) if title and title != 'Unknown Title' else f'librivox-book-{random.randint(1000,9999)}'
+
+    return _proxy_cover_image({
+        "source": "librivox",
+        "title": title,
+        "description": description,
+        "author": author,
+        "cover_image": cover_image_url or DEFAULT_COVER_IMAGE,
+        "chapters": chapters_data,
+        "first_chapter_audio_url": chapters_data[0]["audio_url"],
+        "first_chapter_title": chapters_data[0]["chapter_title"],
+        "slug": slug,
+        "is_creator_book": False,
+        "total_views": 0,
+        "average_rating": None,
+        "is_paid": False,
+        "price": Decimal("0.00"),
+        "language": book_language
+    })
 
-            slug = slugify(title) if title and title != 'Unknown Title' else f'librivox-book-{random.randint(1000,9999)}'
-
-            book_data = { # Create book_data dict here to apply proxy logic before appending
-                "source": "librivox",
-                "title": title,
-                "description": description,
-                "author": author,
-                "cover_image": cover_image_url or DEFAULT_COVER_IMAGE,
-                "chapters": chapters_data,
-                "first_chapter_audio_url": chapters_data[0]["audio_url"] if chapters_data else None,
-                "first_chapter_title": chapters_data[0]["chapter_title"] if chapters_data else None,
-                "slug": slug,
-                "is_creator_book": False,
-                "total_views": 0,
-                "average_rating": None,
-                "is_paid": False,
-                "price": Decimal("0.00"),
-                "language": book_language
-            }
-            # --- START NEW ADDITION (Proxy cover_image for LibriVox before caching) ---
-            if book_data['cover_image'] and (book_data['cover_image'].startswith('http://') or book_data['cover_image'].startswith('https://')):
-                book_data['cover_image'] = reverse('AudioXApp:fetch_cover_image') + f'?url={quote(book_data["cover_image"])}'
-            # --- END NEW ADDITION ---
-            librivox_audiobooks.append(book_data)
-            fetch_successful = True
 
-        except requests.exceptions.Timeout as e:
-            logger.error(f"TIMEOUT error fetching RSS feed {rss_url}: {e}")
-        except requests.exceptions.RequestException as e:
-            logger.error(f"RequestException error fetching RSS feed {rss_url}: {e}")
-        except Exception as e:
-            logger.error(f"Generic error processing RSS feed {rss_url}: {e}", exc_info=True)
-
-    # Fetch Archive.org data
-    base_url = "https://archive.org/advancedsearch.php"
-    search_terms = ["Fiction", "Mystery", "Thriller", "Science Fiction", "Fantasy",
-                    "Romance", "Biography", "History", "Self-Help", "Business",
-                    "Urdu", "Punjabi", "Sindhi"]
-    language_specific_terms = ["Urdu", "Punjabi", "Sindhi"]
-
-    for i, term in enumerate(search_terms):
-        if i > 0:
-            time.sleep(1)  # Rate limiting
-
-        # Build query based on term type
-        if term in language_specific_terms:
-            ## NEW ## Broaden the search for non-English languages by removing the 'collection' filter.
+def _summarize_archive_metadata(identifier, item_metadata):
+    """
+    Reduces an Archive.org metadata document to the parts the catalog needs.
+    This is what the incremental refresh keeps between runs.
+    """
+    metadata = item_metadata.get('metadata', {})
+    return {
+        "has_cover": _archive_item_has_cover(item_metadata),
+        "chapters": _extract_archive_chapters(identifier, item_metadata),
+        "metadata": {key: metadata[key] for key in ('title', 'creator', 'description', 'language', 'subject') if key in metadata},
+    }
+
+
+def _build_archive_search_book(term, doc, item_summary):
+    """Builds a book dict for an advancedsearch hit and its metadata summary."""
+    # Check for cover image if the audiobook is in English
+    language_from_doc = _first_value(doc.get('language', 'English'), 'English')
+    is_english = 'english' in str(language_from_doc).lower() or 'en' in str(language_from_doc).lower()
+    if is_english and not item_summary["has_cover"]:
+        logger.info(f"Skipping English Archive.org book '{doc.get('title', 'Unknown Title')}' because no image file was found.")
+        return None
+
+    doc_title = doc.get('title', 'Unknown Title')
+    creator_data = doc.get('creator', 'Unknown Author')
+    author = ', '.join(creator_data) if isinstance(creator_data, list) else creator_data
+    description_data = doc.get('description', 'No description available.')
+    description = ' '.join(description_data) if isinstance(description_data, list) else description_data
+
+    chapters = item_summary["chapters"]
+    if not chapters:
+        return None
+
+    slug = slugify(doc_title) if doc_title != 'Unknown Title' else f'archive-{term.lower().replace(" ", "-")}-{random.randint(1000,9999)}'
+
+    return _proxy_cover_image({
+        "source": "archive",
+        "title": doc_title,
+        "description": description,
+        "author": author,
+        "cover_image": f"https://archive.org/services/img/{doc['identifier']}",
+        "chapters": chapters,
+        "first_chapter_audio_url": chapters[0]["audio_url"],
+        "first_chapter_title": chapters[0]["chapter_title"],
+        "slug": slug,
+        "is_creator_book": False,
+        "total_views": 0,
+        "average_rating": None,
+        "is_paid": False,
+        "price": Decimal("0.00"),
+        "subjects": doc.get('subject', []),
+        "language": language_from_doc,
+        "genre": term if term not in ARCHIVE_LANGUAGE_TERMS else None
+    })
+
+
+def _build_archive_manual_book(lang_key, item_id, item_summary):
+    """Builds a book dict for one of the hand-picked regional language items."""
+    metadata = item_summary["metadata"]
+    title = metadata.get('title', f"Unknown Title - {item_id}")
+    if title.startswith("Unknown Title -"):
+        return None
+
+    # Check for cover image if the audiobook is in English
+    language = _first_value(metadata.get('language', lang_key), lang_key)
+    is_english = 'english' in str(language).lower() or 'en' in str(language).lower()
+    if is_english and not item_summary["has_cover"]:
+        logger.info(f"Skipping English manual item '{title}' because no image file was found.")
+        return None
+
+    creator_data = metadata.get('creator', 'Unknown Author')
+    author = ', '.join(creator_data) if isinstance(creator_data, list) else creator_data
+    description_data = metadata.get('description', 'No description available.')
+    description = ' '.join(description_data) if isinstance(description_data, list) else description_data
+
+    chapters = item_summary["chapters"]
+    if not chapters:
+        return None
+
+    return _proxy_cover_image({
+        "source": "archive",
+        "title": title,
+        "description": description,
+        "author": author,
+        "cover_image": f"https://archive.org/services/img/{item_id}",
+        "chapters": chapters,
+        "first_chapter_audio_url": chapters[0]["audio_url"],
+        "first_chapter_title": chapters[0]["chapter_title"],
+        "slug": slugify(title),
+        "is_creator_book": False,
+        "total_views": 0,
+        "average_rating": None,
+        "is_paid": False,
+        "price": Decimal("0.00"),
+        "subjects": metadata.get('subject', []),
+        "language": language,
+        "genre": None
+    })
+
+
+def harvest_external_catalog(harvester=None, librivox_base_url=None, archive_base_url=None,
+                             state=None, incremental=False):
+    """
+    Fetches every RSS feed, advancedsearch page and metadata document through a
+    ``CatalogHarvester`` and assembles them, in the original source order, into
+    the ``librivox_audiobooks`` / ``archive_genre_audiobooks`` /
+    ``archive_language_audiobooks`` structure.
+
+    ``state`` maps each request to its validators and parsed payload and is
+    updated in place. With ``incremental`` set, requests are made conditional on
+    that state, unchanged items are taken from it without re-parsing, and items
+    checked within ``EXTERNAL_CATALOG_REVALIDATE_SECONDS`` are not requested.
+
+    Returns ``(combined_data, fetch_successful, report)``.
+    """
+    librivox_base_url = (librivox_base_url or LIBRIVOX_BASE_URL).rstrip('/')
+    archive_base_url = (archive_base_url or ARCHIVE_ORG_BASE_URL).rstrip('/')
+    state = state if state is not None else {}
+    revalidate_after = getattr(settings, 'EXTERNAL_CATALOG_REVALIDATE_SECONDS', 15 * 60)
+    now = time.time()
+
+    if harvester is None:
+        user_agent_host = settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else "AudioXApp.com"
+        harvester = CatalogHarvester(headers={'User-Agent': f'AudioXApp/1.0 (+http://{user_agent_host})'})
+
+    def state_key(url, key):
+        return f"{url}#{key[1]}"
+
+    def make_job(key, source, url, **kwargs):
+        entry = state.get(state_key(url, key)) if incremental else None
+        if entry:
+            kwargs.update(
+                validators=entry['validators'],
+                cached_payload=entry['payload'],
+                skip=now - entry['checked_at'] < revalidate_after,
+            )
+        return HarvestJob(key, source, url, **kwargs)
+
+    def metadata_job(identifier, source):
+        return make_job(('metadata', identifier), source, f"{archive_base_url}/metadata/{identifier}",
+                        transform=lambda item_metadata: _summarize_archive_metadata(identifier, item_metadata))
+
+    def follow_search(job, docs):
+        logger.info(f"For term '{job.key[1]}', Archive.org API returned {len(docs)} documents")
+        return [metadata_job(doc['identifier'], 'archive_metadata') for doc in docs if doc.get('identifier')]
+
+    def rss_job(feed_id):
+        rss_url = f"{librivox_base_url}/rss/{feed_id}"
+        # An empty dict records "no usable book" so unchanged empty feeds are not re-parsed either.
+        return make_job(('rss', feed_id), 'librivox_rss', rss_url, parse='content', timeout=45,
+                        transform=lambda content: _build_librivox_book(rss_url, content) or {})
+
+    jobs = [rss_job(feed_id) for feed_id in LIBRIVOX_RSS_FEED_IDS]
+    for term in ARCHIVE_SEARCH_TERMS:
+        if term in ARCHIVE_LANGUAGE_TERMS:
+            # Broaden the search for non-English languages by removing the 'collection' filter.
             query_string = f'language:"{term}" AND mediatype:audio'
         else:
             query_string = f'subject:"{term}" AND collection:librivoxaudio AND mediatype:audio'
-
-        params = {
+        jobs.append(make_job(('search', term), 'archive_search', f"{archive_base_url}/advancedsearch.php", params={
             "q": query_string,
             "fl[]": ["identifier", "title", "creator", "description", "subject", "language"],
             "rows": 10,
             "output": "json"
+        }, follow=follow_search, transform=lambda data: data.get('response', {}).get('docs', [])))
+    for item_ids in MANUAL_LANGUAGE_ITEMS.values():
+        jobs.extend(metadata_job(item_id, 'archive_manual') for item_id in item_ids)
+
+    results = harvester.run(jobs)
+
+    new_state = {}
+    for result in results.values():
+        if not result.ok:
+            continue
+        previous = state.get(state_key(result.job.url, result.job.key))
+        checked_at = previous['checked_at'] if previous and result.outcome == OUTCOME_SKIPPED else now
+        new_state[state_key(result.job.url, result.job.key)] = {
+            'validators': result.validators,
+            'payload': result.payload,
+            'checked_at': checked_at,
         }
+    state.clear()
+    state.update(new_state)
 
-        try:
-            response = session.get(base_url, params=params, timeout=30, headers=headers)
-            response.raise_for_status()
-            data = response.json()
-            docs = data.get('response', {}).get('docs', [])
-
-            logger.info(f"For term '{term}', Archive.org API returned {len(docs)} documents")
-
-            audiobooks_for_term = []
-            for doc in docs:
-                identifier = doc.get('identifier')
-                if not identifier:
-                    continue
-
-                # Get detailed metadata
-                meta_url = f"https://archive.org/metadata/{identifier}"
-                meta_resp = session.get(meta_url, timeout=30, headers=headers)
-                meta_resp.raise_for_status()
-                item_metadata = meta_resp.json()
-
-                # Check for cover image if the audiobook is in English
-                language_from_doc = doc.get('language', 'English')
-                if isinstance(language_from_doc, list):
-                    language_from_doc = language_from_doc[0] if language_from_doc else 'English'
-                
-                is_english = 'english' in str(language_from_doc).lower() or 'en' in str(language_from_doc).lower()
-                
-                # Check for image files in the file list
-                item_files = item_metadata.get("files", [])
-                has_cover = any(f.get("name", "").lower().endswith(('.jpg', '.jpeg', '.png')) for f in item_files)
-
-                if is_english and not has_cover:
-                    doc_title_for_log = doc.get('title', 'Unknown Title')
-                    logger.info(f"Skipping English Archive.org book '{doc_title_for_log}' because no image file was found.")
-                    continue
-
-                # Extract book information
-                doc_title = doc.get('title', 'Unknown Title')
-                creator_data = doc.get('creator', 'Unknown Author')
-                author = ', '.join(creator_data) if isinstance(creator_data, list) else creator_data
-                description_data = doc.get('description', 'No description available.')
-                description = ' '.join(description_data) if isinstance(description_data, list) else description_data
-                subjects = doc.get('subject', [])
-                language = doc.get('language', 'English')
-                if isinstance(language, list):
-                    language = language[0] if language else 'English'
-
-                # Extract chapters from files
-                files = item_metadata.get("files", [])
-                chapters = []
-                for file_item in files:
-                    if (file_item.get("format") in ["VBR MP3", "MP3", "64Kbps MP3", "128Kbps MP3"]
-                                and "name" in file_item):
-                        chapter_title = str(file_item.get("title", file_item.get("name", 'Untitled Chapter'))).replace('"', '').strip()
-                        duration = parse_duration_to_seconds(file_item.get('length') or file_item.get('duration'))
-
-                        chapters.append({
-                            "chapter_title": chapter_title,
-                            "audio_url": f"https://archive.org/download/{identifier}/{quote(file_item['name'])}",
-                            "duration_seconds": duration
-                        })
-
-                if not chapters:
-                    continue
-
-                slug = slugify(doc_title) if doc_title != 'Unknown Title' else f'archive-{term.lower().replace(" ", "-")}-{random.randint(1000,9999)}'
-
-                book_data = {
-                    "source": "archive",
-                    "title": doc_title,
-                    "description": description,
-                    "author": author,
-                    "cover_image": f"https://archive.org/services/img/{identifier}" or DEFAULT_COVER_IMAGE,
-                    "chapters": chapters,
-                    "first_chapter_audio_url": chapters[0]["audio_url"] if chapters else None,
-                    "first_chapter_title": chapters[0]["chapter_title"] if chapters else None,
-                    "slug": slug,
-                    "is_creator_book": False,
-                    "total_views": 0,
-                    "average_rating": None,
-                    "is_paid": False,
-                    "price": Decimal("0.00"),
-                    "subjects": subjects,
-                    "language": language,
-                    "genre": term if term not in language_specific_terms else None
-                }
-                # --- START NEW ADDITION (Proxy cover_image for Archive.org API before caching) ---
-                if book_data['cover_image'] and (book_data['cover_image'].startswith('http://') or book_data['cover_image'].startswith('https://')):
-                    book_data['cover_image'] = reverse('AudioXApp:fetch_cover_image') + f'?url={quote(book_data["cover_image"])}'
-                # --- END NEW ADDITION ---
-                audiobooks_for_term.append(book_data)
+    def payload_for(key):
+        result = results.get(key)
+        return result.payload if result is not None and result.ok else None
 
-            if audiobooks_for_term:
-                if term in language_specific_terms:
-                    if term not in archive_language_audiobooks:
-                        archive_language_audiobooks[term] = []
-                    archive_language_audiobooks[term].extend(audiobooks_for_term)
-                else:
-                    archive_genre_audiobooks[term] = audiobooks_for_term
-                fetch_successful = True
+    librivox_audiobooks = []
+    archive_genre_audiobooks = {}
+    archive_language_audiobooks = {}
+    fetch_successful = False
 
-        except requests.exceptions.HTTPError as e:
-            logger.error(f"HTTPError for API term '{term}': {e.response.status_code if e.response else 'No response'}")
-        except Exception as e:
-            logger.error(f"Error processing API term '{term}': {e}", exc_info=True)
-
-    ## NEW ## Updated manual items list with poetry and stories for all three languages.
-    manual_language_items = {
-        "Urdu": [
-            "Saadat-Hasan-Manto-Ke-Behtreen-Afsane-Urdu-Audio-Book",
-            "Urdu-Poetry-Mehfil-e-Mushaira",
-            "Mirza-Ghalib-Ki-Ghazlain-Urdu-Audio-Book"
-        ],
-        "Punjabi": [
-            "Heer-Waris-Shah-Punjabi-Audio-Book",
-            "sultan-bahoo-kalam-punjabi-sufi-poetry",
-            "Shiv-Kumar-Batalvi-Birha-Da-Sultan-Punjabi-Poetry"
-        ],
-        "Sindhi": [
-            "Shah-Jo-Risalo-Audio-Sindhi-Sufi-Poetry",
-            "Shaikh-Ayaz-Sindhi-Poetry-Audio",
-            "sindhi-folk-tales"
-        ]
-    }
+    for feed_id in LIBRIVOX_RSS_FEED_IDS:
+        book_data = payload_for(('rss', feed_id))
+        if book_data:
+            librivox_audiobooks.append(book_data)
+            fetch_successful = True
 
-    # Process manual items
-    for lang_key, item_ids in manual_language_items.items():
-        if not item_ids:
+    for term in ARCHIVE_SEARCH_TERMS:
+        docs = payload_for(('search', term))
+        if docs is None:
             continue
+        audiobooks_for_term = []
+        for doc in docs:
+            identifier = doc.get('identifier')
+            item_summary = payload_for(('metadata', identifier)) if identifier else None
+            if item_summary is None:
+                continue
+            try:
+                book_data = _build_archive_search_book(term, doc, item_summary)
+            except Exception as e:
+                logger.error(f"Error processing API term '{term}' item '{identifier}': {e}", exc_info=True)
+                continue
+            if book_data:
+                audiobooks_for_term.append(book_data)
 
-        if lang_key not in archive_language_audiobooks:
-            archive_language_audiobooks[lang_key] = []
+        if audiobooks_for_term:
+            if term in ARCHIVE_LANGUAGE_TERMS:
+                archive_language_audiobooks.setdefault(term, []).extend(audiobooks_for_term)
+            else:
+                archive_genre_audiobooks[term] = audiobooks_for_term
+            fetch_successful = True
 
-        current_slugs = {b.get('slug') for b in archive_language_audiobooks[lang_key]}
+    for lang_key, item_ids in MANUAL_LANGUAGE_ITEMS.items():
+        if not item_ids:
+            continue
+        language_books = archive_language_audiobooks.setdefault(lang_key, [])
+        current_slugs = {b.get('slug') for b in language_books}
 
         for item_id in item_ids:
+            item_summary = payload_for(('metadata', item_id))
+            if item_summary is None:
+                continue
             try:
-                time.sleep(0.5)  # Rate limiting
-
-                meta_url = f"https://archive.org/metadata/{item_id}"
-                meta_resp = session.get(meta_url, timeout=30, headers=headers)
-                meta_resp.raise_for_status()
-                item_metadata = meta_resp.json()
-
-                metadata = item_metadata.get('metadata', item_metadata)
-                title = metadata.get('title', f"Unknown Title - {item_id}")
-
-                if title.startswith("Unknown Title -"):
-                    continue
-                
-                # Check for cover image if the audiobook is in English
-                language_from_meta = metadata.get('language', lang_key)
-                if isinstance(language_from_meta, list):
-                    language_from_meta = language_from_meta[0] if language_from_meta else lang_key
-
-                is_english = 'english' in str(language_from_meta).lower() or 'en' in str(language_from_meta).lower()
-                
-                # Check for image files in the file list
-                item_files = item_metadata.get("files", [])
-                has_cover = any(f.get("name", "").lower().endswith(('.jpg', '.jpeg', '.png')) for f in item_files)
-
-                if is_english and not has_cover:
-                    logger.info(f"Skipping English manual item '{title}' because no image file was found.")
-                    continue
-
-                creator_data = metadata.get('creator', 'Unknown Author')
-                author = ', '.join(creator_data) if isinstance(creator_data, list) else creator_data
-                description_data = metadata.get('description', 'No description available.')
-                description = ' '.join(description_data) if isinstance(description_data, list) else description_data
-                language = metadata.get('language', lang_key)
-                if isinstance(language, list):
-                    language = language[0] if language else lang_key
-                subjects = metadata.get('subject', [])
-
-                # Extract chapters
-                files = item_metadata.get("files", [])
-                chapters = []
-                for file_item in files:
-                    if (file_item.get("format") in ["VBR MP3", "MP3", "64Kbps MP3", "128Kbps MP3"]
-                                and "name" in file_item):
-                        chapter_title = str(file_item.get("title", file_item.get("name", 'Untitled Chapter'))).replace('"', '').strip()
-                        duration = parse_duration_to_seconds(file_item.get('length') or file_item.get('duration'))
-
-                        chapters.append({
-                            "chapter_title": chapter_title,
-                            "audio_url": f"https://archive.org/download/{item_id}/{quote(file_item['name'])}",
-                            "duration_seconds": duration
-                        })
-
-                if not chapters:
-                    continue
-
-                slug = slugify(title) if not title.startswith("Unknown Title") else f'archive-manual-{lang_key.lower()}-{item_id.replace("_", "-")}'
-
-                if slug not in current_slugs:
-                    book_data = {
-                        "source": "archive",
-                        "title": title,
-                        "description": description,
-                        "author": author,
-                        "cover_image": f"https://archive.org/services/img/{item_id}" or DEFAULT_COVER_IMAGE,
-                        "chapters": chapters,
-                        "first_chapter_audio_url": chapters[0]["audio_url"] if chapters else None,
-                        "first_chapter_title": chapters[0]["chapter_title"] if chapters else None,
-                        "slug": slug,
-                        "is_creator_book": False,
-                        "total_views": 0,
-                        "average_rating": None,
-                        "is_paid": False,
-                        "price": Decimal("0.00"),
-                        "subjects": subjects,
-                        "language": language,
-                        "genre": None
-                    }
-                    # --- START NEW ADDITION (Proxy cover_image for Manual Archive.org before caching) ---
-                    if book_data['cover_image'] and (book_data['cover_image'].startswith('http://') or book_data['cover_image'].startswith('https://')):
-                        book_data['cover_image'] = reverse('AudioXApp:fetch_cover_image') + f'?url={quote(book_data["cover_image"])}'
-                    # --- END NEW ADDITION ---
-                    archive_language_audiobooks[lang_key].append(book_data)
-                    current_slugs.add(slug)
-                    fetch_successful = True
-
+                book_data = _build_archive_manual_book(lang_key, item_id, item_summary)
             except Exception as e:
                 logger.error(f"Error processing manual item '{item_id}' for language '{lang_key}': {e}", exc_info=True)
+                continue
+            if book_data and book_data['slug'] not in current_slugs:
+                language_books.append(book_data)
+                current_slugs.add(book_data['slug'])
+                fetch_successful = True
 
-    # Cache the results
     combined_data = {
         "librivox_audiobooks": librivox_audiobooks,
         "archive_genre_audiobooks": archive_genre_audiobooks,
         "archive_language_audiobooks": archive_language_audiobooks
     }
+    return combined_data, fetch_successful, harvester.report
+
+
+def rebuild_audiobooks_cache(harvester=None, incremental=None):
+    """Harvests the external catalog and stores it in the cache if anything was fetched.
+
+    ``incremental`` defaults to ``EXTERNAL_CATALOG_INCREMENTAL_REFRESH``. The
+    per-request validators are kept under their own key without expiry so that
+    they outlive the snapshot they were recorded for.
+
+    Returns ``(data, report)``; ``data`` is None when nothing could be fetched.
+    """
+    if incremental is None:
+        incremental = getattr(settings, 'EXTERNAL_CATALOG_INCREMENTAL_REFRESH', True)
+    state = cache.get(CATALOG_VALIDATORS_CACHE_KEY) or {}
+    combined_data, fetch_successful, report = harvest_external_catalog(
+        harvester=harvester, state=state, incremental=incremental,
+    )
 
     if fetch_successful:
         logger.info(f"CACHE SET: Storing fetched data in cache (key: {CACHE_KEY}, duration: {CACHE_DURATION}s)")
-        cache.set(CACHE_KEY, combined_data, CACHE_DURATION)
-        return combined_data
-    else:
-        logger.warning("FETCH UNSUCCESSFUL: No new data to cache")
-        return combined_data if any([librivox_audiobooks, archive_genre_audiobooks, archive_language_audiobooks]) else None
+        built_at = time.time()
+        version = uuid.uuid4().hex
+        cache.set(CACHE_KEY, combined_data, CACHE_DURATION + CATALOG_STALE_GRACE)
+        # The index is complete before the metadata points readers at its version
+        catalog_index.write_catalog_index(combined_data, version, CACHE_DURATION + CATALOG_STALE_GRACE)
+        cache.set(CATALOG_META_CACHE_KEY, {
+            'version': version,
+            'built_at': built_at,
+            'fresh_until': built_at + CACHE_DURATION,
+        }, CACHE_DURATION + CATALOG_STALE_GRACE)
+        cache.set(CATALOG_VALIDATORS_CACHE_KEY, state, None)
+        return combined_data, report
+
+    logger.warning("FETCH UNSUCCESSFUL: No new data to cache")
+    has_data = any(combined_data.values())
+    return (combined_data if has_data else None), report
+
+
+def ingest_catalog_snapshot(data):
+    """Upserts a freshly built snapshot into the database and records its version as ingested"""
+    meta = cache.get(CATALOG_META_CACHE_KEY)
+    ingest_report = ingest_external_catalog(data)
+    if meta:
+        cache.set(CATALOG_INGESTED_VERSION_KEY, meta['version'], None)
+    return ingest_report
+
 
 # ==========================================
-# SEARCH FUNCTIONALITY - FIXED
+# STALE-WHILE-REVALIDATE CATALOG ACCESS
 # ==========================================
 
-def search_creator_audiobooks(query, language_filter, genre_filter, creator_filter, seen_slugs):
-    """Search creator and admin audiobooks with optimized database queries"""
-    results = []
-
+def _count_catalog_cache_event(event):
+    key = f"{CATALOG_STATS_KEY_PREFIX}_{event}"
     try:
-        # Build query to include ALL published audiobooks (creator + admin)
-        db_query = Q(status='PUBLISHED')
+        cache.add(key, 0, None)
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
 
-        if language_filter:
-            db_query &= Q(language__iexact=language_filter)
 
-        if genre_filter:
-            genre_q = (
-                Q(genre__icontains=genre_filter) |
-                Q(genre__iexact=genre_filter) |
-                Q(genre__istartswith=genre_filter)
-            )
-            db_query &= genre_q
+def get_external_catalog_cache_stats():
+    """Returns the hit/stale/miss counters and the current snapshot metadata."""
+    counters = cache.get_many([f"{CATALOG_STATS_KEY_PREFIX}_{event}" for event in ('hit', 'stale', 'miss', 'refresh')])
+    stats = {event: counters.get(f"{CATALOG_STATS_KEY_PREFIX}_{event}", 0) for event in ('hit', 'stale', 'miss', 'refresh')}
+    stats['snapshot'] = cache.get(CATALOG_META_CACHE_KEY)
+    stats['refresh_in_progress'] = cache.get(CATALOG_REFRESH_LOCK_KEY) is not None
+    return stats
 
-        if creator_filter:
-            # Only apply creator filter to creator books
-            creator_q = (
-                Q(creator__creator_name__icontains=creator_filter) |
-                Q(creator__user__username__icontains=creator_filter) |
-                Q(creator__user__first_name__icontains=creator_filter) |
-                Q(creator__user__last_name__icontains=creator_filter)
-            )
-            db_query &= (Q(is_creator_book=True) & creator_q)
-
-        if query:
-            text_search_q = (
-                Q(title__icontains=query) |
-                Q(description__icontains=query) |
-                Q(author__icontains=query) |
-                Q(genre__icontains=query) |
-                Q(creator__creator_name__icontains=query)
-            )
-            db_query &= text_search_q
-
-        # Execute optimized query
-        audiobooks = (
-            Audiobook.objects.filter(db_query)
-            .select_related('creator', 'creator__user')
-            .prefetch_related('reviews')
-            .annotate(
-                review_count=Count('reviews'),
-                avg_rating=Avg('reviews__rating')
-            )
-            .distinct()
-            .order_by('-publish_date', '-total_views')
-        )
 
-        # Process results
-        for book in audiobooks:
-            if book.slug not in seen_slugs:
-                relevance_score = calculate_relevance_score(book, query)
-
-                # Handle both creator and admin audiobooks
-                creator_name = None
-                source_type = 'platform'  # Default for admin audiobooks
-
-                if book.is_creator_book and book.creator:
-                    creator_name = book.creator.creator_name
-                    source_type = 'creator'
-                elif not book.is_creator_book:
-                    # Admin/platform audiobook
-                    if book.source == 'librivox':
-                        source_type = 'librivox'
-                    elif book.source == 'archive':
-                        source_type = 'archive.org'
-                    else:
-                        source_type = 'platform'
+def finish_catalog_refresh(token, succeeded=True):
+    """
+    Releases the refresh lock held by ``token``. After a failed rebuild the lock
+    is kept for a short cooldown so requests do not retry the upstream sources
+    back to back while they are down.
+    """
+    if cache.get(CATALOG_REFRESH_LOCK_KEY) != token:
+        return
+    if succeeded:
+        cache.delete(CATALOG_REFRESH_LOCK_KEY)
+    else:
+        cache.set(CATALOG_REFRESH_LOCK_KEY, token, CATALOG_REFRESH_FAILURE_COOLDOWN)
 
-                results.append({
-                    'slug': book.slug,
-                    'title': book.title,
-                    'author': book.author,
-                    'cover_image_url': book.cover_image.url if book.cover_image else DEFAULT_COVER_IMAGE,
-                    'creator_name': creator_name,
-                    'average_rating': book.avg_rating or book.average_rating,
-                    'total_views': book.total_views,
-                    'review_count': book.review_count,
-                    'is_creator_book': book.is_creator_book,
-                    'source_type': source_type,
-                    'price': book.price,
-                    'is_paid': book.is_paid,
-                    'genre': book.genre,
-                    'language': book.language,
-                    'publish_date': book.publish_date,
-                    'relevance_score': relevance_score,
-                    'description': book.description[:200] + '...' if len(book.description) > 200 else book.description
-                })
-                seen_slugs.add(book.slug)
 
+def start_catalog_refresh():
+    """
+    Takes the refresh lock and returns its token, or None if a rebuild is
+    already running. ``cache.add`` is an atomic SET NX on Redis, so only one
+    worker wins the lock. Whoever holds it releases it with
+    ``finish_catalog_refresh``.
+    """
+    token = uuid.uuid4().hex
+    return token if cache.add(CATALOG_REFRESH_LOCK_KEY, token, CATALOG_REFRESH_LOCK_TIMEOUT) else None
+
+
+def _schedule_catalog_refresh():
+    """
+    Starts a background rebuild unless one is already running; everyone else
+    keeps serving whatever snapshot is cached.
+    """
+    token = start_catalog_refresh()
+    if token is None:
+        return False
+
+    _count_catalog_cache_event('refresh')
+    try:
+        if getattr(settings, 'CELERY_TASK_ALWAYS_EAGER', False):
+            # Eager Celery would run the rebuild inside this request; use a thread instead.
+            threading.Thread(target=refresh_external_catalog_cache, args=(token,), daemon=True).start()
+        else:
+            refresh_external_catalog_cache.delay(token)
     except Exception as e:
-        logger.error(f"Error searching audiobooks: {str(e)}")
+        logger.error(f"Could not schedule external catalog refresh: {e}", exc_info=True)
+        cache.delete(CATALOG_REFRESH_LOCK_KEY)
+        return False
+    logger.info("Scheduled background refresh of the external audiobook catalog.")
+    return True
 
-    return results
+
+# The snapshot metadata read during the current request, so that a request
+# counts one hit, stale or miss and sees one snapshot version however many
+# catalog lookups it makes. None outside requests (tasks, commands).
+_request_catalog_meta = contextvars.ContextVar('request_catalog_meta', default=None)
+
+
+@receiver(request_started)
+def _open_catalog_meta_scope(sender, **kwargs):
+    _request_catalog_meta.set({})
+
+
+@receiver(request_finished)
+def _close_catalog_meta_scope(sender, **kwargs):
+    _request_catalog_meta.set(None)
+
+
+def _get_catalog_meta():
+    """
+    Returns the current snapshot metadata (version, soft expiry) and records a
+    hit, stale or miss, once per request. Stale and missing snapshots schedule
+    a background rebuild; the caller never waits for it.
+    """
+    request_scope = _request_catalog_meta.get()
+    if request_scope is not None and 'meta' in request_scope:
+        return request_scope['meta']
+
+    meta = cache.get(CATALOG_META_CACHE_KEY)
+    if not meta:
+        _count_catalog_cache_event('miss')
+        _schedule_catalog_refresh()
+    elif meta['fresh_until'] <= time.time():
+        _count_catalog_cache_event('stale')
+        _schedule_catalog_refresh()
+    else:
+        _count_catalog_cache_event('hit')
+
+    if request_scope is not None:
+        request_scope['meta'] = meta
+    return meta or None
+
+
+def get_external_catalog():
+    """
+    Returns the cached external catalog without ever waiting on the upstream
+    sources. Past its soft TTL the snapshot is still served while a single
+    background refresh replaces it; on a cold cache this returns None and
+    schedules the first build.
+    """
+    if not _get_catalog_meta():
+        return None
+    data = cache.get(CACHE_KEY)
+    if not data:
+        _schedule_catalog_refresh()
+    return data
+
+
+def get_external_book(audiobook_slug):
+    """
+    Returns one external book dict by slug from the slug index of the current
+    snapshot version, falling back to scanning the snapshot if the index is
+    unavailable.
+    """
+    meta = _get_catalog_meta()
+    if not meta:
+        return None
+    available, book_dict = catalog_index.lookup_book(meta['version'], audiobook_slug)
+    if available:
+        return book_dict
+
+    logger.warning(f"External catalog index {meta['version']} unavailable; scanning snapshot for '{audiobook_slug}'.")
+    external_data = cache.get(CACHE_KEY)
+    return _find_external_book(external_data, audiobook_slug) if external_data else None
 
 
-def search_external_audiobooks(query, language_filter, genre_filter, creator_filter, seen_slugs):
-    """Search external audiobooks - FIXED VERSION"""
+def find_external_books(language_filter=None, genre_filter=None, limit=None, shuffle=False):
+    """
+    Returns external book dicts (one per slug, snapshot order unless
+    ``shuffle``) narrowed by the language and genre slug sets of the index.
+    Only the selected books are read from the cache.
+    """
+    meta = _get_catalog_meta()
+    if not meta:
+        return []
+    slugs = catalog_index.find_slugs(meta['version'], language=language_filter, genre=genre_filter)
+    if slugs is None:
+        logger.warning(f"External catalog index {meta['version']} unavailable; scanning snapshot.")
+        external_data = cache.get(CACHE_KEY) or {}
+        seen_slugs = set()
+        books = []
+        for book_dict, _ in catalog_index.iter_catalog_books(external_data):
+            slug = book_dict.get('slug')
+            if slug and slug not in seen_slugs and _matches_external_filters(book_dict, None, language_filter, genre_filter):
+                seen_slugs.add(slug)
+                books.append(book_dict)
+        if shuffle:
+            random.shuffle(books)
+        return books[:limit] if limit is not None else books
+
+    if shuffle:
+        slugs = random.sample(slugs, len(slugs))
+    if limit is not None:
+        slugs = slugs[:limit]
+    return catalog_index.get_books(meta['version'], slugs)
+
+# ==========================================
+# SEARCH FUNCTIONALITY - FIXED
+# ==========================================
+
+def _format_db_search_results(books):
+    """Format a page of audiobook rows, reading review counts and ratings for that page only"""
+    review_stats = {
+        row['pk']: row for row in Audiobook.objects.filter(pk__in=[book.pk for book in books]).values('pk').annotate(
+            review_count=Count('reviews'),
+            avg_rating=Avg('reviews__rating')
+        )
+    }
+
     results = []
+    for book in books:
+        stats = review_stats.get(book.pk, {})
+
+        # Handle both creator and admin audiobooks
+        creator_name = None
+        source_type = 'platform'  # Default for admin audiobooks
+
+        if book.is_creator_book and book.creator:
+            creator_name = book.creator.creator_name
+            source_type = 'creator'
+        elif not book.is_creator_book:
+            # Admin/platform audiobook
+            if book.source == 'librivox':
+                source_type = 'librivox'
+            elif book.source == 'archive':
+                source_type = 'archive.org'
+            else:
+                source_type = 'platform'
+
+        avg_rating = stats.get('avg_rating')
+        description = book.description or ''
+        results.append({
+            'slug': book.slug,
+            'title': book.title,
+            'author': book.author,
+            'cover_image_url': book.cover_image.url if book.cover_image else DEFAULT_COVER_IMAGE,
+            'creator_name': creator_name,
+            'average_rating': round(avg_rating, 1) if avg_rating is not None else None,
+            'total_views': book.total_views,
+            'review_count': stats.get('review_count', 0),
+            'is_creator_book': book.is_creator_book,
+            'source_type': source_type,
+            'price': book.price,
+            'is_paid': book.is_paid,
+            'genre': book.genre,
+            'language': book.language,
+            'publish_date': book.publish_date,
+            'relevance_score': book.relevance,
+            'description': description[:200] + '...' if len(description) > 200 else description
+        })
+    return results
+
+
+def search_creator_audiobooks(query, language_filter, genre_filter, creator_filter):
+    """Ranked search over all published database audiobooks (creator, admin and ingested external)"""
+    return search_engine.search_audiobooks(
+        query, language_filter=language_filter, genre_filter=genre_filter, creator_filter=creator_filter
+    ).select_related('creator')
 
+
+def _get_external_text_index():
+    """This worker's inverted index of the current snapshot version, or None"""
+    meta = _get_catalog_meta()
+    if not meta:
+        return None
+    return catalog_text_index.get_text_index(meta['version'], lambda: cache.get(CACHE_KEY))
+
+
+def search_external_audiobooks(query, language_filter, genre_filter, creator_filter):
+    """Matching external book dicts, through the in-process inverted index of the cached catalog"""
     # Skip if creator filter is applied (external books don't have creators)
     if creator_filter:
-        return results
+        return []
 
     try:
-        # Get cached data from your management command
-        cached_data = cache.get(CACHE_KEY)
-        if not cached_data:
+        text_index = _get_external_text_index()
+        if text_index is not None:
+            return text_index.search(query=query, language=language_filter, genre=genre_filter)
+
+        # Language and genre filters are resolved from the index slug sets
+        candidate_books = find_external_books(language_filter=language_filter, genre_filter=genre_filter)
+        if not candidate_books:
             logger.warning(f"No cached external data found for key: {CACHE_KEY}")
-            return results
-
-        logger.info(f"Found cached external data with keys: {list(cached_data.keys())}")
-
-        # Search LibriVox audiobooks
-        librivox_books = cached_data.get('librivox_audiobooks', [])
-        logger.info(f"Searching {len(librivox_books)} LibriVox books")
-
-        librivox_matches = 0
-        for book_dict in librivox_books:
-            if _matches_external_filters(book_dict, query, language_filter, genre_filter):
-                book_slug = book_dict.get('slug')
-                if book_slug and book_slug not in seen_slugs:
-                    # Note: book_dict['cover_image'] should already be proxied from fetch_audiobooks_data
-                    results.append(_format_external_result(book_dict, 'librivox'))
-                    seen_slugs.add(book_slug)
-                    librivox_matches += 1
-
-        logger.info(f"LibriVox matches: {librivox_matches}")
-
-        # Search Archive.org audiobooks
-        archive_matches = 0
-        for source_key in ['archive_genre_audiobooks', 'archive_language_audiobooks']:
-            source_data = cached_data.get(source_key, {})
-            logger.info(f"Searching {source_key} with {len(source_data)} categories")
-
-            for category_name, books_list in source_data.items():
-                for book_dict in books_list:
-                    if _matches_external_filters(book_dict, query, language_filter, genre_filter):
-                        book_slug = book_dict.get('slug')
-                        if book_slug and book_slug not in seen_slugs:
-                            # Note: book_dict['cover_image'] should already be proxied from fetch_audiobooks_data
-                            results.append(_format_external_result(book_dict, 'archive.org'))
-                            seen_slugs.add(book_slug)
-                            archive_matches += 1
-
-        logger.info(f"Archive.org matches: {archive_matches}")
-        logger.info(f"External search completed: {len(results)} total results")
+            return []
+        logger.info(f"Scanning {len(candidate_books)} external books")
+        return [book_dict for book_dict in candidate_books if _matches_external_filters(book_dict, query, None, None)]
 
     except Exception as e:
         logger.error(f"Error searching external audiobooks: {str(e)}", exc_info=True)
+        return []
 
-    return results
+
+def _is_catalog_ingested():
+    """True when the current snapshot version has been written to the database"""
+    meta = _get_catalog_meta()
+    return bool(meta) and cache.get(CATALOG_INGESTED_VERSION_KEY) == meta['version']
+
+
+def _external_relevance(book_dict, query):
+    """
+    Relevance of a matching external book, ordering the external matches
+    among themselves. Not comparable with the database relevance (SearchRank
+    plus trigram similarity on PostgreSQL), so pages merge the two by rank.
+    """
+    if not query:
+        return 1.0
+    query_lower = query.lower()
+    title = book_dict.get('title', '').lower()
+    score = 0.0
+    if query_lower in title:
+        score += 0.4
+        if title.startswith(query_lower):
+            score += 0.2
+    if query_lower in str(book_dict.get('author', '')).lower():
+        score += 0.2
+    if query_lower in str(book_dict.get('genre') or '').lower():
+        score += 0.1
+    # Word matches (any order, subjects) that no substring check above caught
+    return score or 0.1
+
+
+def _top_external_books(matching_books, query, after_key, count):
+    """
+    The ``count`` best matching external books after ``after_key`` that are
+    not ingested into the database yet, as ``(sort_key, book_dict)`` pairs.
+    Only ``count`` candidates are held at a time (``heapq.nsmallest``).
+    """
+    # Ingested books are ranked by the database search instead
+    ingested_slugs = set(Audiobook.objects.filter(
+        slug__in=[book_dict['slug'] for book_dict in matching_books if book_dict.get('slug')]
+    ).values_list('slug', flat=True))
+    return heapq.nsmallest(count, (
+        (key, book_dict) for key, book_dict in (
+            ((-_external_relevance(book_dict, query), -(book_dict.get('total_views') or 0), book_dict['slug']), book_dict)
+            for book_dict in matching_books if book_dict.get('slug') and book_dict['slug'] not in ingested_slugs
+        ) if after_key is None or key > after_key
+    ), key=lambda pair: pair[0])
+
+
+def _encode_search_cursor(position):
+    return signing.dumps(list(position), salt=SEARCH_CURSOR_SALT, compress=True)
+
+
+def _decode_search_cursor(cursor):
+    """The search position after the previous page (see ``search_audiobooks_page``), or None for an invalid cursor"""
+    try:
+        db_key, external_key, db_seen, external_seen = signing.loads(cursor, salt=SEARCH_CURSOR_SALT)
+        if db_key is not None:
+            relevance, total_views, pk = db_key
+            db_key = (float(relevance), int(total_views), int(pk))
+        if external_key is not None:
+            relevance, total_views, slug = external_key
+            external_key = (float(relevance), int(total_views), str(slug))
+        return db_key, external_key, int(db_seen), int(external_seen)
+    except (signing.BadSignature, TypeError, ValueError):
+        return None
+
+
+def search_audiobooks_page(query, language_filter, genre_filter, creator_filter, after=None, limit=SEARCH_PAGE_SIZE):
+    """
+    One keyset page of search results: database matches and not-yet-ingested
+    external matches, each in its own relevance order, merged by rank (the
+    n-th database match next to the n-th external one, database first). The
+    two relevance scores are on different scales, so they are never compared.
+    The database query is limited to ``limit + 1`` rows after the cursor and
+    the external side keeps a bounded top-k, so the work per page does not
+    grow with the match count.
+
+    Once the current snapshot has been ingested its books are all database
+    rows, and the external side is skipped.
+
+    ``after`` is the position decoded from a cursor: the sort keys of the
+    last database and external results shown and how many of each were
+    shown. Returns ``(results, next_cursor)``; ``next_cursor`` is None on the
+    last page.
+    """
+    db_key, external_key, db_seen, external_seen = after or (None, None, 0, 0)
+
+    ranked_audiobooks = search_creator_audiobooks(query, language_filter, genre_filter, creator_filter)
+    if db_key is not None:
+        relevance, total_views, pk = db_key
+        ranked_audiobooks = search_engine.rows_after(ranked_audiobooks, relevance, total_views, pk=pk)
+    db_page = [
+        ((db_seen + index, 0), (book.relevance, book.total_views, book.pk), book)
+        for index, book in enumerate(ranked_audiobooks[:limit + 1])
+    ]
+
+    external_page = []
+    if not _is_catalog_ingested():
+        matching_books = search_external_audiobooks(query, language_filter, genre_filter, creator_filter)
+        if matching_books:
+            external_page = [
+                ((external_seen + index, 1), key, book_dict)
+                for index, (key, book_dict) in enumerate(_top_external_books(matching_books, query, external_key, limit + 1))
+            ]
+
+    merged = list(heapq.merge(db_page, external_page, key=lambda entry: entry[0]))[:limit + 1]
+    page, has_more = merged[:limit], len(merged) > limit
+
+    db_results = iter(_format_db_search_results([item for (_rank, kind), _key, item in page if kind == 0]))
+    results = []
+    for (_rank, kind), key, item in page:
+        if kind == 0:
+            results.append(next(db_results))
+            db_key, db_seen = key, db_seen + 1
+        else:
+            source_type = 'librivox' if item.get('source') == 'librivox' else 'archive.org'
+            result = _format_external_result(item, source_type)
+            result['relevance_score'] = -key[0]
+            results.append(result)
+            external_key, external_seen = key, external_seen + 1
+
+    next_cursor = _encode_search_cursor((db_key, external_key, db_seen, external_seen)) if has_more else None
+    return results, next_cursor
 
 
 def _matches_external_filters(book_dict, query, language_filter, genre_filter):
@@ -807,7 +1066,7 @@ def _format_external_result(book_dict, source_type):
         'slug': book_dict.get('slug'),
         'title': book_dict.get('title', 'Unknown Title'),
         'author': book_dict.get('author', 'Unknown Author'),
-        # Use 'cover_image' directly as it should now be the proxied URL from fetch_audiobooks_data
+        # Use 'cover_image' directly as it should now be the proxied URL from the catalog harvest
         'cover_image_url': book_dict.get('cover_image') or DEFAULT_COVER_IMAGE, 
         'creator_name': None,
         'average_rating': book_dict.get('average_rating'),
@@ -825,66 +1084,9 @@ def _format_external_result(book_dict, source_type):
     }
 
 
-def get_featured_audiobooks(seen_slugs):
+def get_featured_audiobooks():
     """Get featured/trending audiobooks when no search filters are applied"""
-    results = []
-
-    try:
-        # Include all published audiobooks
-        trending_books = (
-            Audiobook.objects.filter(status='PUBLISHED')
-            .select_related('creator')
-            .annotate(
-                review_count=Count('reviews'),
-                avg_rating=Avg('reviews__rating')
-            )
-            .order_by('-total_views', '-publish_date')[:20]
-        )
-
-        for book in trending_books:
-            if book.slug not in seen_slugs:
-                relevance_score = calculate_relevance_score(book, query)
-
-                # Handle both creator and admin audiobooks
-                creator_name = None
-                source_type = 'platform'
-
-                if book.is_creator_book and book.creator:
-                    creator_name = book.creator.creator_name
-                    source_type = 'creator'
-                elif not book.is_creator_book:
-                    if book.source == 'librivox':
-                        source_type = 'librivox'
-                    elif book.source == 'archive':
-                        source_type = 'archive.org'
-                    else:
-                        source_type = 'platform'
-
-                results.append({
-                    'slug': book.slug,
-                    'title': book.title,
-                    'author': book.author,
-                    'cover_image_url': book.cover_image.url if book.cover_image else DEFAULT_COVER_IMAGE,
-                    'creator_name': creator_name,
-                    'average_rating': book.avg_rating or book.average_rating,
-                    'total_views': book.total_views,
-                    'review_count': book.review_count,
-                    'is_creator_book': book.is_creator_book,
-                    'source_type': source_type,
-                    'price': book.price,
-                    'is_paid': book.is_paid,
-                    'genre': book.genre,
-                    'language': book.language,
-                    'publish_date': book.publish_date,
-                    'relevance_score': 1.0,
-                    'description': book.description[:200] + '...' if len(book.description) > 200 else book.description
-                })
-                seen_slugs.add(book.slug)
-
-    except Exception as e:
-        logger.error(f"Error getting featured audiobooks: {str(e)}")
-
-    return results
+    return search_engine.search_audiobooks('').select_related('creator').order_by('-total_views', '-publish_date')[:20]
 
 
 def search_results_view(request):
@@ -894,39 +1096,23 @@ def search_results_view(request):
     language_filter = request.GET.get('language', '').strip()
     genre_filter = request.GET.get('genre', '').strip()
     creator_filter = request.GET.get('creator', '').strip()
-    page_number = request.GET.get('page', 1)
+    cursor = request.GET.get('cursor', '')
 
-    # Initialize results
-    processed_results = []
-    seen_slugs = set()
     common_context = _get_full_context(request)
 
     # Determine if any filters are applied
     has_any_filter = bool(query or language_filter or genre_filter or creator_filter)
+    next_cursor = None
 
     if has_any_filter:
-        # Search all database audiobooks (creator + admin + external)
-        processed_results.extend(
-            search_creator_audiobooks(query, language_filter, genre_filter, creator_filter, seen_slugs)
-        )
-
-        # Search cached external audiobooks
-        processed_results.extend(
-            search_external_audiobooks(query, language_filter, genre_filter, creator_filter, seen_slugs)
+        # One keyset page of database + external matches; further pages follow the cursor
+        after = _decode_search_cursor(cursor) if cursor else None
+        results, next_cursor = search_audiobooks_page(
+            query, language_filter, genre_filter, creator_filter, after=after
         )
     else:
         # Show featured content when no filters applied
-        processed_results.extend(get_featured_audiobooks(seen_slugs))
-
-    # Sort results
-    processed_results = sort_search_results(processed_results, query)
-
-    # Implement pagination
-    paginator = Paginator(processed_results, 20)
-    try:
-        page_obj = paginator.get_page(page_number)
-    except:
-        page_obj = paginator.get_page(1)
+        results = _format_db_search_results(list(get_featured_audiobooks()))
 
     # Generate page title
     if query:
@@ -954,13 +1140,14 @@ def search_results_view(request):
     # Prepare context
     context_data = {
         'query': query,
-        'results': page_obj.object_list,
-        'page_obj': page_obj,
+        'results': results,
+        'next_cursor': next_cursor,
+        'is_first_page': not cursor,
         'page_title': page_title,
         'current_language_filter': language_filter,
         'current_genre_filter': genre_filter,
         'current_creator_filter': creator_filter,
-        'total_results': len(processed_results),
+        'total_results': len(results),
         'has_filters': has_any_filter,
         'search_performed': has_any_filter,
         'filter_summary': filter_summary
@@ -969,6 +1156,42 @@ def search_results_view(request):
     context_data.update(common_context)
     return render(request, 'audiobooks/English/english_search.html', context_data)
 
+
+@require_GET
+def search_api(request):
+    """Keyset-paginated JSON search: ?q=&language=&genre=&creator=&limit=&cursor="""
+    query = request.GET.get('q', '').strip()
+    language_filter = request.GET.get('language', '').strip()
+    genre_filter = request.GET.get('genre', '').strip()
+    creator_filter = request.GET.get('creator', '').strip()
+    cursor = request.GET.get('cursor', '')
+
+    try:
+        limit = min(max(int(request.GET.get('limit', SEARCH_PAGE_SIZE)), 1), SEARCH_API_MAX_PAGE_SIZE)
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Invalid limit'}, status=400)
+
+    after = None
+    if cursor:
+        after = _decode_search_cursor(cursor)
+        if after is None:
+            return JsonResponse({'success': False, 'error': 'Invalid cursor'}, status=400)
+
+    try:
+        results, next_cursor = search_audiobooks_page(
+            query, language_filter, genre_filter, creator_filter, after=after, limit=limit
+        )
+    except Exception as e:
+        logger.error(f"Error in search_api: {e}", exc_info=True)
+        return JsonResponse({'success': False, 'error': 'Search failed'}, status=500)
+
+    return JsonResponse({
+        'success': True,
+        'results': results,
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None,
+    })
+
 # ==========================================
 # FILTER OPTIONS API
 # ==========================================
@@ -1025,28 +1248,11 @@ def get_filter_options(request):
             .exclude(creator__creator_name__exact='')
         )
 
-        # Include external audiobook data
-        cached_data = cache.get(CACHE_KEY)
+        # Include external audiobook genres from the precomputed facet summary
         external_genres = set()
-
-        if cached_data:
-            # Process external data for additional options
-            for source_key in ['librivox_audiobooks', 'archive_genre_audiobooks', 'archive_language_audiobooks']:
-                if source_key == 'librivox_audiobooks':
-                    books = cached_data.get(source_key, [])
-                    for book in books:
-                        if _matches_language_filter(book, language) and book.get('genre'):
-                            external_genres.add(book['genre'])
-                else:
-                    source_data = cached_data.get(source_key, {})
-                    for term_books in source_data.values():
-                        for book in term_books:
-                            if _matches_language_filter(book, language):
-                                if book.get('genre'):
-                                    external_genres.add(book.get('genre'))
-                                for subject in book.get('subjects', []):
-                                    if subject and len(subject) < 50:
-                                        external_genres.add(subject)
+        catalog_meta = _get_catalog_meta()
+        if catalog_meta:
+            external_genres = catalog_index.get_facets(catalog_meta['version'], language) or set()
 
         # Combine genres (only if not using predefined mapping)
         if not (language and language in LANGUAGE_GENRE_MAPPING):
@@ -1094,7 +1300,7 @@ def home(request):
     context = _get_full_context(request)
 
     # Get cached audiobook data
-    audiobook_data = cache.get(CACHE_KEY)
+    audiobook_data = get_external_catalog()
     librivox_audiobooks = []
     archive_genre_audiobooks = defaultdict(list)
     context["error_message"] = None
@@ -1154,7 +1360,7 @@ def home(request):
                     logger.warning(f"Generated fallback slug for LibriVox book in home view: {title_for_slug} -> {slug}")
 
                 # --- FIX STARTS HERE for cover_image in librivox_audiobooks ---
-                # This logic is now redundant here if it's applied in fetch_audiobooks_data,
+                # This logic is now redundant here if it's applied in the catalog harvest,
                 # but adding it as a failsafe if cache wasn't cleared after previous step.
                 current_cover_image_url = book_data.get('cover_image')
                 if current_cover_image_url and (current_cover_image_url.startswith('http://') or current_cover_image_url.startswith('https://')):
@@ -1195,7 +1401,7 @@ def home(request):
                             logger.warning(f"Generated fallback slug for Archive book in home view: {title_for_slug} -> {slug}")
 
                         # --- FIX STARTS HERE for cover_image in archive_genre_audiobooks ---
-                        # This logic is now redundant here if it's applied in fetch_audiobooks_data,
+                        # This logic is now redundant here if it's applied in the catalog harvest,
                         # but adding it as a failsafe if cache wasn't cleared after previous step.
                         current_cover_image_url = book_data.get('cover_image')
                         if current_cover_image_url and (current_cover_image_url.startswith('http://') or current_cover_image_url.startswith('https://')):
@@ -1284,23 +1490,20 @@ def audiobook_detail(request, audiobook_slug):
     try:
         # Get audiobook with optimized queries
         audiobook_obj = Audiobook.objects.prefetch_related(
-            Prefetch('chapters', queryset=Chapter.objects.order_by('chapter_order')),
+            Prefetch('chapters', queryset=Chapter.objects.order_by('chapter_order').prefetch_related('renditions')),
             'reviews__user'
         ).select_related('creator').get(slug=audiobook_slug)
 
-        # Handle external audiobooks
+        # Handle external audiobooks (chapters are kept current by the catalog ingestion)
         if not audiobook_obj.is_creator_book:
-            external_data = cache.get(CACHE_KEY)
-            if external_data:
-                found_external_book_dict = _find_external_book(external_data, audiobook_slug)
-
-                if found_external_book_dict:
-                    _sync_external_chapters(audiobook_obj, found_external_book_dict)
-                    # Refresh audiobook object
-                    audiobook_obj = Audiobook.objects.prefetch_related(
-                        Prefetch('chapters', queryset=Chapter.objects.order_by('chapter_order')),
-                        'reviews__user'
-                    ).select_related('creator').get(slug=audiobook_slug)
+            found_external_book_dict = get_external_book(audiobook_slug)
+            if found_external_book_dict and not audiobook_obj.chapters.all():
+                # Older shell rows were created without chapters; backfill them once
+                ingest_external_books([found_external_book_dict])
+                audiobook_obj = Audiobook.objects.prefetch_related(
+                    Prefetch('chapters', queryset=Chapter.objects.order_by('chapter_order').prefetch_related('renditions')),
+                    'reviews__user'
+                ).select_related('creator').get(slug=audiobook_slug)
 
     except Audiobook.DoesNotExist:
         # Try to create from external data
@@ -1330,6 +1533,8 @@ def audiobook_detail(request, audiobook_slug):
     # Process chapters
     chapters_to_display = []
     audiobook_lock_message = None
+    # Renditions are picked from the client's network hints (data saver, slow connection)
+    rendition_profile = transcoding.select_profile(request)
 
     for i, chapter in enumerate(audiobook_obj.chapters.all()):
         is_accessible, lock_reason = get_chapter_accessibility(chapter, audiobook_obj, request.user, i)
@@ -1338,9 +1543,16 @@ def audiobook_detail(request, audiobook_slug):
             not user_has_purchased and not is_accessible):
             audiobook_lock_message = f"This is a premium audiobook. Purchase for PKR {audiobook_obj.price} to unlock all chapters."
 
+        # Accessible chapters get a signed stream token, so their Range requests skip re-authorization
+        stream_source = chapter.get_streaming_source(rendition_profile) if is_accessible else None
+        stream_token = stream_tokens.mint(chapter.pk, request.user.pk, stream_source) if stream_source else None
+        hls_source = chapter.get_hls_source() if is_accessible else None
+        hls_token = stream_tokens.mint(chapter.pk, request.user.pk, hls_source) if hls_source else None
+
         chapters_to_display.append({
             'chapter_title': chapter.chapter_name,
-            'audio_url_template': chapter.get_streaming_url(),
+            'audio_url_template': chapter.get_streaming_url(stream_token, rendition_profile),
+            'hls_url': chapter.get_hls_url(hls_token),
             'is_accessible': is_accessible,
             'lock_reason': lock_reason,
             'duration_seconds': chapter.duration_seconds,
@@ -1464,7 +1676,11 @@ def audiobook_detail(request, audiobook_slug):
         'is_in_library': is_in_library,
     })
 
-    return render(request, 'audiobook_detail.html', context)
+    response = render(request, 'audiobook_detail.html', context)
+    # Ask browsers for the network hints select_profile reads on later visits
+    response['Accept-CH'] = transcoding.CLIENT_HINTS
+    patch_vary_headers(response, transcoding.CLIENT_HINTS.split(', '))
+    return response
 
 
 def trending_audiobooks_view(request):
@@ -1507,56 +1723,20 @@ def _find_external_book(external_data, audiobook_slug):
     return None
 
 
-def _sync_external_chapters(audiobook_obj, external_book_dict):
-    """Sync external book chapters with database"""
-    with transaction.atomic():
-        for i, ch_info in enumerate(external_book_dict.get('chapters', [])):
-            external_identifier = f"ext-{audiobook_obj.slug}-{i}"
-
-            Chapter.objects.update_or_create(
-                audiobook=audiobook_obj,
-                chapter_order=i,
-                defaults={
-                    'chapter_name': ch_info.get('chapter_title', f"Chapter {i+1}"),
-                    'external_audio_url': ch_info.get('audio_url'),
-                    'duration_seconds': ch_info.get('duration_seconds', 0),
-                    'is_preview_eligible': True,
-                    'external_chapter_identifier': external_identifier
-                }
-            )
-
-
 def _create_from_external_data(audiobook_slug):
-    """Create audiobook from external data if not found in database"""
-    external_data = cache.get(CACHE_KEY)
-    if not external_data:
-        return None
-
-    found_external_book_dict = _find_external_book(external_data, audiobook_slug)
+    """Ingest a single external book that the catalog ingestion has not written yet"""
+    found_external_book_dict = get_external_book(audiobook_slug)
     if not found_external_book_dict:
         return None
 
     try:
-        with transaction.atomic():
-            audiobook_obj = Audiobook.objects.create(
-                slug=audiobook_slug,
-                title=found_external_book_dict.get('title', 'Unknown Title'),
-                author=found_external_book_dict.get('author'),
-                description=found_external_book_dict.get('description', "No description provided."),
-                language=found_external_book_dict.get('language'),
-                genre=found_external_book_dict.get('genre'),
-                source=found_external_book_dict.get('source', 'archive'),
-                is_creator_book=False,
-                creator=None,
-                is_paid=False,
-                price=Decimal('0.00'),
-                status='PUBLISHED'
-            )
-
-            _sync_external_chapters(audiobook_obj, found_external_book_dict)
-
-            logger.info(f"Created new audiobook from external data: {audiobook_slug}")
-            return audiobook_obj
+        ingest_external_books([found_external_book_dict])
+        audiobook_obj = Audiobook.objects.prefetch_related(
+            Prefetch('chapters', queryset=Chapter.objects.order_by('chapter_order').prefetch_related('renditions')),
+            'reviews__user'
+        ).select_related('creator').get(slug=audiobook_slug)
+        logger.info(f"Created new audiobook from external data: {audiobook_slug}")
+        return audiobook_obj
 
     except Exception as e:
         logger.error(f"Error creating audiobook from external data: {e}", exc_info=True)
@@ -1629,55 +1809,25 @@ def _get_recommendations(audiobook_obj, max_count=5):
 
     # Add external recommendations if needed
     if len(recommended_audiobooks) < max_count:
-        external_data = cache.get(CACHE_KEY)
-        if external_data:
-            potential_external_recs = []
-
-            # Get external books from same language
-            for book_dict in external_data.get("librivox_audiobooks", []):
-                if (book_dict.get('slug') != audiobook_obj.slug and
-                    book_dict.get('slug') not in seen_slugs and
-                    _matches_language_filter(book_dict, audiobook_obj.language)):
-                    potential_external_recs.append(book_dict)
-
-            for term_key, term_books in external_data.get("archive_genre_audiobooks", {}).items():
-                for book_dict in term_books:
-                    if (book_dict.get('slug') != audiobook_obj.slug and
-                        book_dict.get('slug') not in seen_slugs and
-                        _matches_language_filter(book_dict, audiobook_obj.language)):
-                        potential_external_recs.append(book_dict)
-
-            for lang_key, lang_books in external_data.get("archive_language_audiobooks", {}).items():
-                for book_dict in lang_books:
-                    if (book_dict.get('slug') != audiobook_obj.slug and
-                        book_dict.get('slug') not in seen_slugs and
-                        audiobook_obj.language and audiobook_obj.language.lower() == lang_key.lower()):
-                        potential_external_recs.append(book_dict)
-
-            # Prioritize by genre match
-            genre_matches = []
-            other_matches = []
-
-            for book_dict in potential_external_recs:
-                book_genre = book_dict.get('genre', '')
-                book_subjects = book_dict.get('subjects', [])
-
-                genre_match = False
-                if audiobook_obj.genre:
-                    if book_genre and audiobook_obj.genre.lower() in book_genre.lower():
-                        genre_match = True
-                    elif any(audiobook_obj.genre.lower() in str(subject).lower() for subject in book_subjects):
-                        genre_match = True
-
-                if genre_match:
-                    genre_matches.append(book_dict)
-                else:
-                    other_matches.append(book_dict)
-
-            # Randomize and combine
-            random.shuffle(genre_matches)
-            random.shuffle(other_matches)
-            sorted_external_recs = genre_matches + other_matches
+        needed = max_count - len(recommended_audiobooks)
+        # Only the handful of books that can actually be recommended are read from the index
+        genre_matches = []
+        if audiobook_obj.genre:
+            genre_matches = find_external_books(
+                language_filter=audiobook_obj.language, genre_filter=audiobook_obj.genre,
+                limit=needed + len(seen_slugs), shuffle=True
+            )
+        other_matches = find_external_books(
+            language_filter=audiobook_obj.language, limit=2 * needed + len(seen_slugs), shuffle=True
+        )
+        sorted_external_recs = genre_matches + other_matches
+        if sorted_external_recs:
+            # Ratings and views of the ingested rows, read in one query
+            ingested_rows = {
+                row.slug: row for row in Audiobook.objects.filter(
+                    slug__in=[b.get('slug') for b in sorted_external_recs if b.get('slug')]
+                ).annotate(calculated_average_rating=Avg('reviews__rating'))
+            }
 
             # Add to recommendations
             for book_dict in sorted_external_recs:
@@ -1686,35 +1836,13 @@ def _get_recommendations(audiobook_obj, max_count=5):
 
                 ext_slug = book_dict.get('slug')
                 if ext_slug and ext_slug not in seen_slugs:
-                    try:
-                        # Create or get shell audiobook
-                        shell_audiobook, _ = Audiobook.objects.get_or_create(
-                            slug=ext_slug,
-                            defaults={
-                                'title': book_dict.get('title', 'Unknown Title'),
-                                'author': book_dict.get('author'),
-                                'description': book_dict.get('description', "No description provided."),
-                                'language': book_dict.get('language'),
-                                'genre': book_dict.get('genre'),
-                                'source': book_dict.get('source', 'archive'),
-                                'is_creator_book': False,
-                                'creator': None,
-                                'is_paid': False,
-                                'price': Decimal('0.00'),
-                                'status': 'PUBLISHED'
-                            }
-                        )
-
-                        # Update book dict with database values
-                        book_dict['average_rating'] = shell_audiobook.average_rating
-                        book_dict['total_views'] = shell_audiobook.total_views
-                        if shell_audiobook.cover_image:
-                            book_dict['cover_image'] = shell_audiobook.cover_image.url
-                        else:
-                            book_dict['cover_image'] = DEFAULT_COVER_IMAGE
-
-                    except Exception as e:
-                        logger.error(f"Error creating recommendation shell: {e}")
+                    ingested_row = ingested_rows.get(ext_slug)
+                    if ingested_row is not None:
+                        avg = ingested_row.calculated_average_rating
+                        book_dict['average_rating'] = round(avg, 1) if avg is not None else None
+                        book_dict['total_views'] = ingested_row.total_views
+                        book_dict['cover_image'] = ingested_row.cover_image.url if ingested_row.cover_image else DEFAULT_COVER_IMAGE
+                    else:
                         book_dict['average_rating'] = None
                         book_dict['total_views'] = 0
                         book_dict['cover_image'] = DEFAULT_COVER_IMAGE
@@ -1749,7 +1877,7 @@ def _render_genre_or_language_page(request, page_type, display_name, template_na
     processed_external_books = []
 
     # Get external audiobook data
-    external_data = cache.get(CACHE_KEY)
+    external_data = get_external_catalog()
     cached_books = []
 
     if external_data:
@@ -1818,7 +1946,7 @@ def _render_genre_or_language_page(request, page_type, display_name, template_na
             book_data.setdefault('total_views', 0)
             book_data.setdefault('average_rating', None)
             # --- FIX STARTS HERE for cover_image in _render_genre_or_language_page ---
-            # This logic is now redundant here if it's applied in fetch_audiobooks_data,
+            # This logic is now redundant here if it's applied in the catalog harvest,
             # but adding it as a failsafe if cache wasn't cleared after previous step.
             current_cover_image_url = book_data.get('cover_image')
             if current_cover_image_url and (current_cover_image_url.startswith('http://') or current_cover_image_url.startswith('https://')):
@@ -2208,13 +2336,8 @@ def unlock_chapter_with_coins(request):
 # STREAMING AND MEDIA VIEWS
 # ==========================================
 
-@require_GET
-def stream_audio(request):
-    """Stream audio with enhanced security and access control"""
-    audio_url_param = request.GET.get("url")
-    if not audio_url_param:
-        return JsonResponse({"error": "No audio URL provided"}, status=400)
-
+def _check_stream_access(request):
+    """Access control for stream_audio; returns an error response, or None when streaming is allowed"""
     # Security check for paid audiobook chapters
     chapter_id = request.GET.get("chapter_id")
     audiobook_slug = request.GET.get("audiobook_slug")
@@ -2272,6 +2395,117 @@ def stream_audio(request):
             logger.error(f"Error checking access permissions in stream_audio: {e}", exc_info=True)
             return JsonResponse({"error": "Access verification failed"}, status=500)
 
+    return None
+
+
+async def _aiter_local_file(file_path, start, length):
+    """Reads a byte range of a local file off the event loop, in adaptively growing chunks"""
+    f = await sync_to_async(open, thread_sensitive=False)(file_path, 'rb')
+    try:
+        await sync_to_async(f.seek, thread_sensitive=False)(start)
+        remaining = length
+        chunk_size = audio_proxy.INITIAL_CHUNK_BYTES
+        while remaining > 0:
+            chunk = await sync_to_async(f.read, thread_sensitive=False)(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+            chunk_size = min(chunk_size * 2, audio_proxy.MAX_CHUNK_BYTES)
+    finally:
+        f.close()
+
+
+def _audio_content_type(content_type, audio_url):
+    """The upstream Content-Type if it is an audio type, else a guess from the URL"""
+    if content_type and content_type.lower().startswith('audio/'):
+        return content_type
+    guessed_type, _ = mimetypes.guess_type(audio_url)
+    return guessed_type if guessed_type and guessed_type.startswith('audio/') else 'audio/mpeg'
+
+
+async def _stream_from_chunk_cache(request, audio_url):
+    """Answers the request from the local chunk cache; None when the origin can't be cached"""
+    entry = await audio_chunk_cache.get_entry(audio_url)
+    if entry is None:
+        return None
+
+    response = http_ranges.build_response(
+        request,
+        entry['size'],
+        _audio_content_type(entry['content_type'], audio_url),
+        partial(audio_chunk_cache.iter_range, entry),
+        etag=entry['etag'] or None,
+        last_modified=parse_http_date_safe(entry['last_modified']) if entry['last_modified'] else None,
+    )
+    logger.info(f"Streaming external audio through chunk cache: {audio_url} (status {response.status_code}, Range: {request.headers.get('Range', 'none')})")
+    return response
+
+
+async def stream_hls(request, token, package, name):
+    """
+    Serve a file of a chapter's HLS package (playlist or segment).
+
+    The stream token minted for the package is part of the path, so the
+    relative URLs in the playlists carry it to every file; it must have been
+    minted for the session's user. Package files never change, so they are cacheable for good.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+
+    claims = stream_tokens.verify(token, hls_packaging.token_source(package))
+    if claims is None or not await sync_to_async(stream_tokens.matches_request)(claims, request):
+        return HttpResponse("Playback token is invalid or has expired.", status=403)
+
+    try:
+        file_path = hls_packaging.resolve(package, name)
+    except SuspiciousFileOperation:
+        logger.warning(f"Rejected HLS path outside package {package}: {name}")
+        return HttpResponse("Invalid HLS path.", status=400)
+    if not os.path.isfile(file_path):
+        return HttpResponse("HLS file not found.", status=404)
+
+    content_type = hls_packaging.content_type(name)
+    response = media_offload.offload_response(file_path, os.path.relpath(file_path, settings.MEDIA_ROOT), content_type)
+    if response is None:
+        file_size, etag, last_modified = http_ranges.file_validators(file_path)
+        response = http_ranges.build_response(
+            request, file_size, content_type,
+            lambda start, end: _aiter_local_file(file_path, start, end - start + 1),
+            etag=etag, last_modified=last_modified,
+        )
+    response['Cache-Control'] = hls_packaging.CACHE_CONTROL
+    return response
+
+
+async def stream_audio(request):
+    """
+    Stream audio with enhanced security and access control.
+
+    Runs asynchronously: external audio is relayed through the pooled httpx
+    client of this worker and local files are read off the event loop, so a
+    listener no longer holds a worker thread for the length of a chapter.
+    """
+    # Async views can't use @require_GET on this Django version
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+
+    audio_url_param = request.GET.get("url")
+    if not audio_url_param:
+        return JsonResponse({"error": "No audio URL provided"}, status=400)
+
+    # A valid stream token minted with the page for this user and chapter authorizes the request
+    # without the access check's queries
+    stream_token = request.GET.get(stream_tokens.QUERY_PARAM)
+    claims = stream_tokens.verify(stream_token, audio_url_param) if stream_token else None
+    token_matches = claims is not None and await sync_to_async(stream_tokens.matches_request)(
+        claims, request, request.GET.get("chapter_id")
+    )
+    if not token_matches:
+        access_error = await sync_to_async(_check_stream_access)(request)
+        if access_error is not None:
+            return access_error
+
     target_audio_url = audio_url_param
     parsed_url = urlparse(target_audio_url)
     is_local_media = False
@@ -2284,55 +2518,32 @@ def stream_audio(request):
     if is_local_media:
         # Handle local media files
         try:
-            relative_path = target_audio_url[len(settings.MEDIA_URL):] if target_audio_url.startswith(settings.MEDIA_URL) else target_audio_url
-            file_path = os.path.join(settings.MEDIA_ROOT, relative_path)
+            relative_path = unquote(target_audio_url[len(settings.MEDIA_URL):])
+            try:
+                file_path = safe_join(settings.MEDIA_ROOT, relative_path)
+            except SuspiciousFileOperation:
+                logger.warning(f"Rejected audio path outside MEDIA_ROOT: {relative_path}")
+                return HttpResponse("Invalid audio path.", status=400)
 
             if not os.path.exists(file_path) or os.path.isdir(file_path):
                 logger.error(f"Local audio file not found: {file_path}")
                 return HttpResponse("Audio file not found.", status=404)
 
-            file_size = os.path.getsize(file_path)
             content_type = mimetypes.guess_type(file_path)[0] or 'audio/mpeg'
 
-            # Handle range requests for seeking
-            range_header = request.headers.get('Range')
-            if range_header:
-                range_match = re.match(r'bytes=(\d+)-(\d*)', range_header)
-                if range_match:
-                    start = int(range_match.group(1))
-                    end = int(range_match.group(2)) if range_match.group(2) else file_size - 1
-
-                    if start >= file_size:
-                        return HttpResponse("Requested range not satisfiable", status=416)
-
-                    end = min(end, file_size - 1)
-                    content_length = end - start + 1
-
-                    def file_iterator():
-                        with open(file_path, 'rb') as f:
-                            f.seek(start)
-                            remaining = content_length
-                            while remaining > 0:
-                                chunk_size = min(8192, remaining)
-                                chunk = f.read(chunk_size)
-                                if not chunk:
-                                    break
-                                remaining -= len(chunk)
-                                yield chunk
-
-                    response = StreamingHttpResponse(file_iterator(), content_type=content_type, status=206)
-                    response['Content-Range'] = f'bytes {start}-{end}/{file_size}'
-                    response['Content-Length'] = str(content_length)
-                    response['Accept-Ranges'] = 'bytes'
-
-                    logger.info(f"Streaming local file with range: {file_path} (bytes {start}-{end})")
-                    return response
-
-            # Stream entire file
-            logger.info(f"Streaming local file: {file_path}")
-            response = FileResponse(open(file_path, 'rb'), content_type=content_type)
-            response['Accept-Ranges'] = 'bytes'
-            response['Content-Length'] = str(file_size)
+            # Access is checked: let the front proxy send the file (and answer ranges) if one is configured
+            offloaded_response = media_offload.offload_response(file_path, os.path.relpath(file_path, settings.MEDIA_ROOT), content_type)
+            if offloaded_response is not None:
+                return offloaded_response
+
+            # Ranges, If-Range and conditional requests, with validators from the file's size and mtime
+            file_size, etag, last_modified = http_ranges.file_validators(file_path)
+            response = http_ranges.build_response(
+                request, file_size, content_type,
+                lambda start, end: _aiter_local_file(file_path, start, end - start + 1),
+                etag=etag, last_modified=last_modified,
+            )
+            logger.info(f"Streaming local file: {file_path} (status {response.status_code}, Range: {request.headers.get('Range', 'none')})")
             return response
 
         except Exception as e:
@@ -2344,47 +2555,43 @@ def stream_audio(request):
         return HttpResponse(f"Invalid audio URL provided: {audio_url_param}", status=400)
 
     else:
-        # Handle external audio URLs
+        # Handle external audio URLs through the shared connection pool
         try:
-            range_header = request.headers.get('Range', None)
-            user_agent_host = settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else "audiox.com"
-            proxy_headers = {'User-Agent': f'AudioXApp Audio Proxy/1.0 (+http://{user_agent_host})'}
-
-            if range_header:
-                proxy_headers['Range'] = range_header
+            # Cacheable origins are answered from the local chunk cache, ranges and validators included
+            if audio_chunk_cache.ENABLED:
+                cached_response = await _stream_from_chunk_cache(request, target_audio_url)
+                if cached_response is not None:
+                    return cached_response
 
             logger.info(f"Proxying external audio from: {target_audio_url}")
-            response_ext = requests.get(target_audio_url, stream=True, headers=proxy_headers, timeout=(10, 60))
-            response_ext.raise_for_status()
+            response_ext = await audio_proxy.open_upstream(target_audio_url, request.headers)
+
+            if response_ext.status_code >= 400:
+                await response_ext.aclose()
+                logger.error(f"HTTPError streaming external audio from {target_audio_url}: {response_ext.status_code}")
+                return HttpResponse(f"Error fetching audio from external source: Status {response_ext.status_code}", status=response_ext.status_code)
 
-            content_type = response_ext.headers.get('Content-Type', 'audio/mpeg')
-            if not content_type.lower().startswith('audio/'):
-                guessed_type, _ = mimetypes.guess_type(target_audio_url)
-                content_type = guessed_type if guessed_type and guessed_type.startswith('audio/') else 'audio/mpeg'
+            content_type = _audio_content_type(response_ext.headers.get('Content-Type'), target_audio_url)
 
             logger.info(f"Streaming external content with type: {content_type}, status: {response_ext.status_code}")
             streaming_response = StreamingHttpResponse(
-                response_ext.iter_content(chunk_size=8192),
+                audio_proxy.iter_upstream(response_ext, target_audio_url),
                 content_type=content_type,
                 status=response_ext.status_code
             )
 
             # Copy relevant headers
-            if 'Content-Range' in response_ext.headers:
-                streaming_response['Content-Range'] = response_ext.headers['Content-Range']
-            if 'Content-Length' in response_ext.headers:
-                streaming_response['Content-Length'] = response_ext.headers['Content-Length']
+            for header in audio_proxy.FORWARDED_RESPONSE_HEADERS:
+                if header in response_ext.headers:
+                    streaming_response[header] = response_ext.headers[header]
 
             streaming_response['Accept-Ranges'] = response_ext.headers.get('Accept-Ranges', 'bytes')
             return streaming_response
 
-        except requests.exceptions.Timeout:
+        except httpx.TimeoutException:
             logger.error(f"Timeout streaming external audio from: {target_audio_url}")
             return HttpResponse("Audio stream timed out from external source.", status=408)
-        except requests.exceptions.HTTPError as e:
-            logger.error(f"HTTPError streaming external audio from {target_audio_url}: {e.response.status_code if e.response else 'No response'}")
-            return HttpResponse(f"Error fetching audio from external source: Status {e.response.status_code if e.response else 'Unknown'}", status=e.response.status_code if e.response else 502)
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"RequestException streaming external audio from {target_audio_url}: {e}")
             return HttpResponse("Error processing audio stream.", status=502)
         except SuspiciousOperation as e:
@@ -2528,6 +2735,8 @@ def debug_external_audiobooks(request):
                 'success': False,
                 'message': 'No cached data found',
                 'cache_key': CACHE_KEY,
+                'cache_stats': get_external_catalog_cache_stats(),
+                'audio_chunk_cache': audio_chunk_cache.get_metrics(),
                 'suggestions': [
                     'Run: python manage.py populate_audiobook_cache',
                     'Check if cache backend is working',
@@ -2570,6 +2779,8 @@ def debug_external_audiobooks(request):
                 'archive_sample': sample_archive
             },
             'cache_duration_hours': CACHE_DURATION / 3600,
+            'cache_stats': get_external_catalog_cache_stats(),
+            'audio_chunk_cache': audio_chunk_cache.get_metrics(),
             'last_updated': 'Available in cache'
         })
 
@@ -2589,17 +2800,23 @@ def refresh_external_audiobooks(request):
     if not request.user.is_staff:
         return JsonResponse({'error': 'Admin access required'}, status=403)
 
-    try:
-        # Clear existing cache
-        cache.delete(CACHE_KEY)
-        logger.info(f"Cleared cache for key: {CACHE_KEY}")
+    lock_token = start_catalog_refresh()
+    if lock_token is None:
+        return JsonResponse({
+            'success': False,
+            'message': 'An external catalog refresh is already running or has just failed; try again shortly'
+        }, status=409)
 
-        # Fetch fresh data
+    succeeded = False
+    try:
+        # Fetch fresh data (replaces the cached snapshot only if something was fetched)
         start_time = time.time()
-        fresh_data = fetch_audiobooks_data() # This call will now store proxied URLs
+        fresh_data, harvest_report = rebuild_audiobooks_cache()
         fetch_duration = time.time() - start_time
+        succeeded = fresh_data is not None
 
         if fresh_data:
+            ingest_report = ingest_catalog_snapshot(fresh_data)
             librivox_count = len(fresh_data.get('librivox_audiobooks', []))
             archive_genres = fresh_data.get('archive_genre_audiobooks', {})
             archive_languages = fresh_data.get('archive_language_audiobooks', {})
@@ -2608,6 +2825,8 @@ def refresh_external_audiobooks(request):
                 'success': True,
                 'message': 'External audiobook cache refreshed successfully',
                 'fetch_duration_seconds': round(fetch_duration, 2),
+                'harvest_report': harvest_report.as_dict(),
+                'ingest_report': ingest_report,
                 'data_summary': {
                     'librivox_audiobooks': librivox_count,
                     'archive_genre_audiobooks': len(archive_genres),
@@ -2628,4 +2847,6 @@ def refresh_external_audiobooks(request):
             'success': False,
             'error': str(e),
             'message': 'Error refreshing cache'
-        }, status=500)
\ No newline at end of file
+        }, status=500)
+    finally:
+        finish_catalog_refresh(lock_token, succeeded)
\ No newline at end of file
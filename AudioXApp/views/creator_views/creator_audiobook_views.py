@@ -7,6 +7,7 @@ from datetime import datetime, timedelta
 import os
 import logging
 import asyncio
+from functools import partial
 from io import BytesIO
 from asgiref.sync import async_to_sync
 
@@ -44,7 +45,7 @@ from ...models import (
 )
 from ..utils import _get_full_context
 from ..decorators import creator_required
-from ...tasks import process_chapter_for_moderation
+from ...tasks import dispatch_audiobook_moderation, queue_chapter_transcoding
 
 
 from ...tts_constants import (
@@ -53,16 +54,16 @@ from ...tts_constants import (
     LANGUAGE_GENRE_MAPPING,
 )
 
-from .creator_tts_views import (
-    generate_audio_edge_tts_async,
-    extract_text_from_pdf,
-    extract_text_from_docx
-)
+from .creator_tts_views import preview_promotions, promote_preview_audio
+from ...services.tts.extraction import document_type_for, extract_document_text
+from ...services.tts.chapter_jobs import chapter_audio_payload
+from ...services.tts.synthesizer import synthesize_to_file
 
 logger = logging.getLogger(__name__)
 
 EARNING_PER_VIEW = Decimal(getattr(settings, 'CREATOR_EARNING_PER_FREE_VIEW', '1.00'))
 GENRE_OTHER_VALUE = '_OTHER_'
+CHAPTER_TEXT_MAX_CHARS = 20000
 
 
 
@@ -314,7 +315,7 @@ def creator_upload_audiobook(request):
                         elif not chapter_text_content_input:
                             current_chapter_errors['text_content'] = "Text content for TTS is required."
                         elif len(chapter_text_content_input) < 10: current_chapter_errors['text_content'] = "Text too short (min 10 chars)."
-                        elif len(chapter_text_content_input) > 20000: current_chapter_errors['text_content'] = "Text too long (max 20k chars)."
+                        elif len(chapter_text_content_input) > CHAPTER_TEXT_MAX_CHARS: current_chapter_errors['text_content'] = "Text too long (max 20k chars)."
                         else:
                             text_content_for_db = chapter_text_content_input
                             is_tts_generated_for_db = True
@@ -349,14 +350,12 @@ def creator_upload_audiobook(request):
                                 try:
                                     doc_content_bytes = doc_file.read()
                                     doc_file.seek(0)
-                                    extracted_doc_text = None
-                                    if doc_extension == '.pdf': extracted_doc_text = extract_text_from_pdf(doc_content_bytes)
-                                    elif doc_extension in ['.docx', '.doc']: extracted_doc_text = extract_text_from_docx(doc_content_bytes)
+                                    extracted_doc_text = extract_document_text(doc_content_bytes, document_type_for(doc_filename_lower), max_chars=CHAPTER_TEXT_MAX_CHARS)
                                     
                                     if not extracted_doc_text or len(extracted_doc_text.strip()) < 10:
                                         current_chapter_errors['document_tts_general'] = "Could not extract sufficient text from the document."
                                     else:
-                                        text_content_for_db = extracted_doc_text.strip()[:20000]
+                                        text_content_for_db = extracted_doc_text.strip()[:CHAPTER_TEXT_MAX_CHARS]
                                         is_tts_generated_for_db = True
                                         actual_edge_tts_voice_id_for_gen = selected_doc_voice_details['edge_voice_id']
                                         tts_option_id_for_model = selected_doc_voice_details['id']
@@ -389,7 +388,8 @@ def creator_upload_audiobook(request):
 
         if not form_errors:
             try:
-                with transaction.atomic():
+                # Previews promoted below are moved back if the transaction rolls back
+                with preview_promotions() as promoted_previews, transaction.atomic():
                     new_audiobook = Audiobook(
                         creator=creator,
                         title=title,
@@ -407,9 +407,12 @@ def creator_upload_audiobook(request):
                     new_audiobook.save()
                     
                     chapters_to_save_data.sort(key=lambda c: c['order'])
+                    tts_chapter_ids = []
+                    uploaded_chapter_ids = []
                     
                     for ch_data_to_save in chapters_to_save_data:
                         final_ch_audio_file_field_val = None
+                        ch_audio_status = Chapter.AudioStatusChoices.READY
                         current_ch_text_content = ch_data_to_save['text_content_for_tts']
                         current_ch_is_tts_generated = ch_data_to_save['is_tts_final']
                         current_ch_tts_voice_id = ch_data_to_save['tts_option_id_for_model']
@@ -426,34 +429,19 @@ def creator_upload_audiobook(request):
                             rel_path_from_media_url = temp_preview_url.replace(settings.MEDIA_URL, '', 1).lstrip('/')
                             if default_storage.exists(rel_path_from_media_url):
                                 try:
-                                    with default_storage.open(rel_path_from_media_url, 'rb') as f_preview:
-                                        perm_ch_filename = f"{perm_ch_filename_base}.mp3"
-                                        perm_ch_path_rel_media_for_save = os.path.join(perm_ch_audio_dir, perm_ch_filename)
-                                        final_ch_audio_file_field_val = ContentFile(f_preview.read(), name=perm_ch_path_rel_media_for_save)
-                                        try:
-                                            default_storage.delete(rel_path_from_media_url)
-                                        except OSError as e_remove:
-                                            logger.warning(f"Could not remove temp preview file {rel_path_from_media_url} from storage: {e_remove}")
+                                    perm_ch_filename = f"{perm_ch_filename_base}.mp3"
+                                    perm_ch_path_rel_media_for_save = os.path.join(perm_ch_audio_dir, perm_ch_filename)
+                                    final_ch_audio_file_field_val = promote_preview_audio(rel_path_from_media_url, perm_ch_path_rel_media_for_save)
+                                    promoted_previews.append((rel_path_from_media_url, final_ch_audio_file_field_val))
                                 except Exception as e_save:
                                     raise ValidationError(f"Error saving preview audio for chapter '{ch_data_to_save['title']}': {e_save}")
                             else:
                                 raise ValidationError(f"Preview audio for chapter '{ch_data_to_save['title']}' was not found.")
                         elif ch_input_type == 'tts' or ch_input_type == 'document_tts':
-                            actual_edge_voice_to_use = ch_data_to_save['actual_edge_tts_voice_id_for_gen']
-                            text_for_generation = ch_data_to_save['text_content_for_tts']
-                            if not text_for_generation or not actual_edge_voice_to_use:
+                            if not current_ch_text_content or not ch_data_to_save['actual_edge_tts_voice_id_for_gen']:
                                 raise ValidationError(f"Internal error: Missing text or voice for new TTS for chapter '{ch_data_to_save['title']}'.")
-                            perm_ch_filename = f"{perm_ch_filename_base}_directgen.mp3"
-                            perm_ch_path_rel_media_for_save = os.path.join(perm_ch_audio_dir, perm_ch_filename)
-                            temp_output_path = default_storage.path(perm_ch_path_rel_media_for_save) if hasattr(default_storage, 'path') else os.path.join(settings.MEDIA_ROOT, perm_ch_path_rel_media_for_save)
-                            os.makedirs(os.path.dirname(temp_output_path), exist_ok=True)
-                            try:
-                                async_to_sync(generate_audio_edge_tts_async)(text_for_generation, actual_edge_voice_to_use, temp_output_path)
-                                with open(temp_output_path, 'rb') as f_upload:
-                                    final_ch_audio_file_field_val = ContentFile(f_upload.read(), name=perm_ch_path_rel_media_for_save)
-                                os.remove(temp_output_path)
-                            except Exception as e_gen_final_ch:
-                                raise ValidationError(f"TTS generation failed for chapter '{ch_data_to_save['title']}'. Error: {e_gen_final_ch}")
+                            # Synthesized by a background task once the upload is committed
+                            ch_audio_status = Chapter.AudioStatusChoices.PENDING
                         else:
                             raise ValidationError(f"Unknown chapter input type during save: {ch_input_type}")
 
@@ -465,14 +453,24 @@ def creator_upload_audiobook(request):
                             text_content=current_ch_text_content,
                             is_tts_generated=current_ch_is_tts_generated,
                             tts_voice_id=current_ch_tts_voice_id,
-                            source_document_filename=current_ch_source_document_filename
+                            source_document_filename=current_ch_source_document_filename,
+                            audio_status=ch_audio_status
                         )
                         logger.info(f"Chapter '{new_chapter.chapter_name}' created for Audiobook '{new_audiobook.title}'.")
-                        
-                        process_chapter_for_moderation.delay(new_chapter.chapter_id)
-                        logger.info(f"Dispatched moderation task for Chapter ID: {new_chapter.chapter_id}")
-                        
-                    messages.success(request, f"Audiobook '{new_audiobook.title}' has been submitted for review. You will be notified once it's published.")
+                        if ch_audio_status == Chapter.AudioStatusChoices.PENDING:
+                            tts_chapter_ids.append(new_chapter.chapter_id)
+                        elif ch_input_type == 'file':
+                            uploaded_chapter_ids.append(new_chapter.chapter_id)
+
+                    # Queued on commit so workers see the chapters; TTS chapters are synthesized before the book is moderated
+                    transaction.on_commit(partial(dispatch_audiobook_moderation, new_audiobook.audiobook_id, tts_chapter_ids))
+                    queue_chapter_transcoding(uploaded_chapter_ids)
+                    logger.info(f"Queued moderation of Audiobook ID {new_audiobook.audiobook_id} ({len(tts_chapter_ids)} TTS chapters to synthesize first)")
+
+                    if any(ch['input_type_final'] in ('tts', 'document_tts') for ch in chapters_to_save_data):
+                        messages.success(request, f"Audiobook '{new_audiobook.title}' has been submitted. Audio for its text-to-speech chapters is being generated; the book goes to review once it is ready.")
+                    else:
+                        messages.success(request, f"Audiobook '{new_audiobook.title}' has been submitted for review. You will be notified once it's published.")
                     return redirect('AudioXApp:creator_my_audiobooks')
 
             except ValidationError as e:
@@ -832,7 +830,7 @@ def creator_manage_upload_detail_view(request, audiobook_slug):
                             elif not text_content:
                                 errors['new_chapter_text_content'] = "Text content for TTS is required."
                             elif len(text_content) < 10: errors['new_chapter_text_content'] = "Text too short (min 10 chars)."
-                            elif len(text_content) > 20000: errors['new_chapter_text_content'] = "Text too long (max 20k chars)."
+                            elif len(text_content) > CHAPTER_TEXT_MAX_CHARS: errors['new_chapter_text_content'] = "Text too long (max 20k chars)."
                             else:
                                 is_tts = True
                                 actual_edge_tts_voice_id_for_gen = selected_voice_details['edge_voice_id']
@@ -866,14 +864,12 @@ def creator_manage_upload_detail_view(request, audiobook_slug):
                                     try:
                                         doc_content_bytes = doc_file.read()
                                         doc_file.seek(0)
-                                        extracted_doc_text = None
-                                        if doc_extension == '.pdf': extracted_doc_text = extract_text_from_pdf(doc_content_bytes)
-                                        elif doc_extension in ['.docx', '.doc']: extracted_doc_text = extract_text_from_docx(doc_content_bytes)
+                                        extracted_doc_text = extract_document_text(doc_content_bytes, document_type_for(doc_filename_lower), max_chars=CHAPTER_TEXT_MAX_CHARS)
                                         
                                         if not extracted_doc_text or len(extracted_doc_text.strip()) < 10:
                                             errors['document_tts_general'] = "Could not extract sufficient text from the document."
                                         else:
-                                            text_content = extracted_doc_text.strip()[:20000]
+                                            text_content = extracted_doc_text.strip()[:CHAPTER_TEXT_MAX_CHARS]
                                             is_tts = True
                                             actual_edge_tts_voice_id_for_gen = selected_doc_voice_details['edge_voice_id']
                                             tts_voice_id = selected_doc_voice_details['id']
@@ -923,7 +919,7 @@ def creator_manage_upload_detail_view(request, audiobook_slug):
                             actual_edge_voice_to_use = ALL_EDGE_TTS_VOICES_MAP.get(tts_voice_id, {}).get('edge_voice_id')
                             if not actual_edge_voice_to_use:
                                 raise ValueError(f"Edge TTS voice ID not found for {tts_voice_id}")
-                            async_to_sync(generate_audio_edge_tts_async)(text_content, actual_edge_voice_to_use, temp_output_path_for_gen)
+                            async_to_sync(synthesize_to_file)(text_content, actual_edge_voice_to_use, temp_output_path_for_gen)
                             
                             with open(temp_output_path_for_gen, 'rb') as f_upload:
                                 final_audio_file_field_val = ContentFile(f_upload.read(), name=full_path_for_gen)
@@ -948,6 +944,8 @@ def creator_manage_upload_detail_view(request, audiobook_slug):
                     
                     chapter.full_clean()
                     chapter.save()
+                    if input_type == 'file':
+                        queue_chapter_transcoding([chapter.chapter_id])
                     messages.success(request, f"Chapter '{title}' added successfully.")
                     return redirect('AudioXApp:creator_manage_upload_detail', audiobook_slug=audiobook_locked.slug)
 
@@ -1041,7 +1039,7 @@ def creator_manage_upload_detail_view(request, audiobook_slug):
                             elif not new_text_content_input:
                                 edit_errors['text'] = "Text content for TTS is required."
                             elif len(new_text_content_input) < 10: edit_errors['text'] = "Text too short (min 10 chars)."
-                            elif len(new_text_content_input) > 20000: edit_errors['text'] = "Text too long (max 20k chars)."
+                            elif len(new_text_content_input) > CHAPTER_TEXT_MAX_CHARS: edit_errors['text'] = "Text too long (max 20k chars)."
                             else:
                                 final_text_content = new_text_content_input
                                 final_is_tts_generated = True
@@ -1081,14 +1079,12 @@ def creator_manage_upload_detail_view(request, audiobook_slug):
                                     try:
                                         doc_content_bytes = doc_file.read()
                                         doc_file.seek(0)
-                                        extracted_doc_text = None
-                                        if doc_extension == '.pdf': extracted_doc_text = extract_text_from_pdf(doc_content_bytes)
-                                        elif doc_extension in ['.docx', '.doc']: extracted_doc_text = extract_text_from_docx(doc_content_bytes)
+                                        extracted_doc_text = extract_document_text(doc_content_bytes, document_type_for(doc_filename_lower), max_chars=CHAPTER_TEXT_MAX_CHARS)
                                         
                                         if not extracted_doc_text or len(extracted_doc_text.strip()) < 10:
                                             edit_errors['document_tts_general'] = "Could not extract sufficient text from the document."
                                         else:
-                                            final_text_content = extracted_doc_text.strip()[:20000]
+                                            final_text_content = extracted_doc_text.strip()[:CHAPTER_TEXT_MAX_CHARS]
                                             final_is_tts_generated = True
                                             final_tts_voice_id = new_doc_tts_voice_option_id
                                             final_source_document_filename = doc_file.name
@@ -1117,7 +1113,7 @@ def creator_manage_upload_detail_view(request, audiobook_slug):
                             actual_edge_voice_to_use = ALL_EDGE_TTS_VOICES_MAP.get(final_tts_voice_id, {}).get('edge_voice_id')
                             if not actual_edge_voice_to_use:
                                 raise ValueError(f"Edge TTS voice ID not found for {final_tts_voice_id}")
-                            async_to_sync(generate_audio_edge_tts_async)(final_text_content, actual_edge_voice_to_use, temp_output_path_for_gen)
+                            async_to_sync(synthesize_to_file)(final_text_content, actual_edge_voice_to_use, temp_output_path_for_gen)
                             
                             with open(temp_output_path_for_gen, 'rb') as f_generated:
                                 final_audio_file_for_save = ContentFile(f_generated.read(), name=os.path.basename(full_path_for_gen))
@@ -1174,6 +1170,8 @@ def creator_manage_upload_detail_view(request, audiobook_slug):
                         chapter_locked.audio_file = final_audio_file_for_save
 
                     chapter_locked.save()
+                    if final_audio_file_for_save and edit_input_type == 'file':
+                        queue_chapter_transcoding([chapter_locked.chapter_id])
                     messages.success(request, f"Chapter '{new_chapter_title}' updated successfully.")
                     return redirect('AudioXApp:creator_manage_upload_detail', audiobook_slug=audiobook_locked.slug)
 
@@ -1283,7 +1281,9 @@ def creator_my_audiobooks_view(request):
             if not book.is_paid:
                 view_earnings_aggregation = CreatorEarning.objects.filter(creator=creator, audiobook=book, earning_type='view').aggregate(total_earnings=Sum('amount_earned'))
                 earnings_from_views = view_earnings_aggregation['total_earnings'] or Decimal('0.00')
-            audiobooks_data_list.append({'book': book, 'earnings_from_views': earnings_from_views})
+            # TTS chapters still being synthesized in the background (progress is polled on the page)
+            audio_pending_chapters = [ch for ch in book.chapters.all() if ch.audio_status != Chapter.AudioStatusChoices.READY]
+            audiobooks_data_list.append({'book': book, 'earnings_from_views': earnings_from_views, 'audio_pending_chapters': audio_pending_chapters})
         context = _get_full_context(request)
         context.update({'creator': creator, 'audiobooks_data': audiobooks_data_list, 'audiobooks_count': len(audiobooks_data_list), 'available_balance': creator.available_balance})
         return render(request, 'creator/creator_my_audiobooks.html', context)
@@ -1322,7 +1322,8 @@ def get_audiobook_chapters_json(request, audiobook_slug):
                 'order': chapter.chapter_order,
                 'audio_filename': audio_filename,
                 'file_size': file_size,
-                'duration_seconds': chapter.duration_seconds # Added duration_seconds here
+                'duration_seconds': chapter.duration_seconds, # Added duration_seconds here
+                **chapter_audio_payload(chapter),
             }
             chapters_list.append(chapter_data)
         return JsonResponse({'chapters': chapters_list}, status=200)
@@ -5,28 +5,15 @@ import datetime
 import mimetypes
 import logging
 import asyncio
-import io
+import shutil
+from contextlib import contextmanager
 from datetime import timedelta
-from typing import Optional
-import fitz
-
-try:
-    import docx
-except ImportError:
-    docx = None
-
-try:
-    from pydub import AudioSegment
-    PYDUB_AVAILABLE = True
-except ImportError:
-    PYDUB_AVAILABLE = False
-    AudioSegment = None
 
 from django.shortcuts import render, redirect, get_object_or_404
 from django.http import JsonResponse, HttpResponse
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_POST, require_GET
 from django.views.decorators.csrf import csrf_protect
 from django.utils import timezone
 from django.conf import settings
@@ -36,56 +23,50 @@ from django.template.defaultfilters import filesizeformat
 from ...models import User, Creator
 from ..decorators import creator_required
 from ...forms import DocumentUploadForm
-import edge_tts
-from ...tts_constants import EDGE_TTS_VOICES_BY_LANGUAGE, ALL_EDGE_TTS_VOICES_MAP
+from ...services.tts import segment_cache
+from ...services.tts.extraction import document_type_for, extract_document_text
+from ...services.tts.synthesizer import synthesize_to_file
+from ...services.tts.voices import resolve_voice, voice_for_gender
 
 logger = logging.getLogger(__name__)
 
-def extract_text_from_docx(file_content_bytes: bytes) -> Optional[str]:
-    if docx is None:
-        logger.error("python-docx library is not installed. Cannot process .docx files.")
-        return None
-    try:
-        doc_stream = io.BytesIO(file_content_bytes)
-        document = docx.Document(doc_stream)
-        full_text = [para.text for para in document.paragraphs]
-        text = "\n".join(full_text).strip()
-        logger.info(f"DOCX Extraction: Extracted {len(text)} characters.")
-        return text if text else None
-    except Exception as e:
-        logger.error(f"Error extracting text from DOCX: {e}", exc_info=True)
-        return None
+PREVIEW_MAX_CHARS = 5000
 
-def extract_text_from_pdf(pdf_content_bytes: bytes) -> Optional[str]:
-    text = ""
+def _move_stored_file(source_name, dest_name):
     try:
-        doc = fitz.open(stream=pdf_content_bytes, filetype="pdf")
-        for page_num in range(doc.page_count):
-            page = doc.load_page(page_num)
-            page_text = page.get_text("text")
-            text += page_text + "\n"
-        doc.close()
-        stripped_text = text.strip()
-        logger.info(f"PDF Extraction: Extracted {len(stripped_text)} characters.")
-        return stripped_text if stripped_text else None
-    except Exception as e:
-        logger.error(f"Error extracting text from PDF: {e}", exc_info=True)
-        return None
-
-async def generate_audio_edge_tts_async(text: str, voice_id: str, output_path: str):
-    communicate = edge_tts.Communicate(text, voice_id)
-    await communicate.save(output_path)
-    logger.info(f"Edge TTS audio initially saved to {output_path}")
-
-    if PYDUB_AVAILABLE and AudioSegment is not None:
-        try:
-            audio = AudioSegment.from_file(output_path, format="mp3")
-            audio.export(output_path, format="mp3")
-            logger.info(f"Successfully laundered TTS audio file at {output_path}")
-        except Exception as e:
-            logger.error(f"Could not launder TTS audio file at {output_path}. Error: {e}", exc_info=True)
-    else:
-        logger.warning("Pydub is not available. Skipping audio laundering for TTS file. Duration calculation might be inaccurate.")
+        source_path = default_storage.path(source_name)
+        dest_path = default_storage.path(dest_name)
+    except NotImplementedError:
+        with default_storage.open(source_name, 'rb') as f_source:
+            saved_name = default_storage.save(dest_name, f_source)
+        default_storage.delete(source_name)
+        return saved_name
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    shutil.move(source_path, dest_path)
+    return dest_name
+
+def promote_preview_audio(preview_name, dest_name):
+    """Makes a preview chapter audio by renaming the file (names relative to MEDIA_ROOT), not by copying its bytes."""
+    return _move_stored_file(preview_name, dest_name)
+
+@contextmanager
+def preview_promotions():
+    """
+    Yields a list for the ``(preview_name, saved_name)`` pairs promoted in the
+    block. If the block fails (its transaction rolled back), the files are
+    moved back to their previews, so no chapter audio is left without a
+    chapter and the form can be resubmitted with the same previews.
+    """
+    promoted = []
+    try:
+        yield promoted
+    except BaseException:
+        for preview_name, saved_name in reversed(promoted):
+            try:
+                _move_stored_file(saved_name, preview_name)
+            except Exception as e:
+                logger.error(f"Could not move promoted audio {saved_name} back to {preview_name}: {e}")
+        raise
 
 @creator_required
 @require_POST
@@ -100,34 +81,23 @@ def generate_tts_preview_audio(request):
             return JsonResponse({'status': 'error', 'message': 'Text content is required.'}, status=400)
         if len(text_content) < 10:
             return JsonResponse({'status': 'error', 'message': 'Text content too short (min 10 characters).'}, status=400)
-        if len(text_content) > 5000:
+        if len(text_content) > PREVIEW_MAX_CHARS:
             return JsonResponse({'status': 'error', 'message': 'Text content too long (max 5000 chars for preview).'}, status=400)
         if not audiobook_language_selected:
             return JsonResponse({'status': 'error', 'message': 'Audiobook language selection is missing.'}, status=400)
-        voices_for_lang = EDGE_TTS_VOICES_BY_LANGUAGE.get(audiobook_language_selected)
-        if not voices_for_lang:
+        selected_voice_details = resolve_voice(audiobook_language_selected, tts_voice_option_id)
+        if not selected_voice_details:
             return JsonResponse({'status': 'error', 'message': f"TTS is not currently available for {audiobook_language_selected}."}, status=400)
-        selected_voice_details = ALL_EDGE_TTS_VOICES_MAP.get(tts_voice_option_id)
-        actual_edge_tts_voice_id_to_use = None
-        final_tts_voice_id_for_response = tts_voice_option_id
-        if not selected_voice_details or selected_voice_details.get('edge_voice_id') not in [v.get('edge_voice_id') for v in voices_for_lang]:
-            logger.warning(f"[TTS PREVIEW AJAX] Invalid voice '{tts_voice_option_id}' for lang '{audiobook_language_selected}'. Trying default if available.")
-            if voices_for_lang:
-                selected_voice_details = voices_for_lang[0]
-                actual_edge_tts_voice_id_to_use = selected_voice_details['edge_voice_id']
-                final_tts_voice_id_for_response = selected_voice_details['id']
-            else:
-                return JsonResponse({'status': 'error', 'message': f'No voices configured for {audiobook_language_selected}.'}, status=400)
-        else:
-            actual_edge_tts_voice_id_to_use = selected_voice_details['edge_voice_id']
-        if not actual_edge_tts_voice_id_to_use:
-            return JsonResponse({'status': 'error', 'message': 'Could not determine a valid TTS voice.'}, status=400)
+        if selected_voice_details['id'] != tts_voice_option_id:
+            logger.warning(f"[TTS PREVIEW AJAX] Invalid voice '{tts_voice_option_id}' for lang '{audiobook_language_selected}'. Using default '{selected_voice_details['id']}'.")
+        actual_edge_tts_voice_id_to_use = selected_voice_details['edge_voice_id']
+        final_tts_voice_id_for_response = selected_voice_details['id']
         temp_tts_dir_name = getattr(settings, 'TEMP_TTS_PREVIEWS_DIR_NAME', 'temp_tts_previews')
         temp_tts_full_dir_path = os.path.join(settings.MEDIA_ROOT, temp_tts_dir_name)
         os.makedirs(temp_tts_full_dir_path, exist_ok=True)
         temp_audio_filename = f"preview_{request.user.user_id}_{uuid.uuid4().hex[:8]}.mp3"
         temp_audio_filepath_local = os.path.join(temp_tts_full_dir_path, temp_audio_filename)
-        asyncio.run(generate_audio_edge_tts_async(text_content, actual_edge_tts_voice_id_to_use, temp_audio_filepath_local))
+        asyncio.run(synthesize_to_file(text_content, actual_edge_tts_voice_id_to_use, temp_audio_filepath_local))
         temp_audio_url = os.path.join(settings.MEDIA_URL, temp_tts_dir_name, temp_audio_filename)
         temp_audio_url = temp_audio_url.replace(os.sep, '/')
         if not temp_audio_url.startswith('/'): temp_audio_url = '/' + temp_audio_url
@@ -181,40 +151,27 @@ def generate_document_tts_preview_audio(request):
         document_file = form.cleaned_data['document_file']
         language = form.cleaned_data['language']
 
-        voices_for_lang = EDGE_TTS_VOICES_BY_LANGUAGE.get(language, [])
-        selected_voice_details = None
-
         if language in ['English', 'Urdu']:
             if not narrator_gender:
                 return JsonResponse({'status': 'error', 'errors': {'narrator_gender': [{'message': 'Narrator gender is required for the selected language.'}]}}, status=400)
             
-            for voice in voices_for_lang:
-                if voice.get('gender') == narrator_gender:
-                    selected_voice_details = voice
-                    break
-            
+            selected_voice_details = voice_for_gender(language, narrator_gender)
             if not selected_voice_details:
                 logger.error(f"[DOC_TTS] No voice found for Lang: {language}, Gender: {narrator_gender}")
                 return JsonResponse({'status': 'error', 'message': 'Internal configuration error: No voice found for the selected language and gender.'}, status=500)
         
         else:
-            if voices_for_lang:
-                selected_voice_details = voices_for_lang[0]
-            else:
+            selected_voice_details = resolve_voice(language)
+            if not selected_voice_details:
                 return JsonResponse({'status': 'error', 'message': f"TTS is not available for the language: {language}."}, status=400)
 
-        doc_content_bytes = document_file.read()
-        doc_extension = os.path.splitext(document_file.name.lower())[1]
-        extracted_text = None
-        if doc_extension == '.pdf':
-            extracted_text = extract_text_from_pdf(doc_content_bytes)
-        elif doc_extension in ['.docx', '.doc']:
-            extracted_text = extract_text_from_docx(doc_content_bytes)
+        # Only the pages needed for the preview are extracted
+        extracted_text = extract_document_text(document_file.read(), document_type_for(document_file.name), language, max_chars=PREVIEW_MAX_CHARS)
 
         if not extracted_text or len(extracted_text.strip()) < 10:
             return JsonResponse({'status': 'error', 'errors': {'document_file': [{'message': 'Could not extract sufficient text. The document might be empty, password-protected, or purely image-based.'}]}}, status=400)
 
-        text_for_preview = extracted_text.strip()[:5000]
+        text_for_preview = extracted_text.strip()[:PREVIEW_MAX_CHARS]
         actual_edge_tts_voice_id = selected_voice_details['edge_voice_id']
 
         temp_tts_dir_name = getattr(settings, 'TEMP_DOC_TTS_PREVIEWS_DIR_NAME', 'temp_doc_tts_previews')
@@ -225,7 +182,7 @@ def generate_document_tts_preview_audio(request):
         temp_audio_filename = f"doc_preview_{user_id_part}_{uuid.uuid4().hex[:8]}.mp3"
         temp_audio_filepath_local = os.path.join(temp_tts_full_dir_path, temp_audio_filename)
 
-        asyncio.run(generate_audio_edge_tts_async(text_for_preview, actual_edge_tts_voice_id, temp_audio_filepath_local))
+        asyncio.run(synthesize_to_file(text_for_preview, actual_edge_tts_voice_id, temp_audio_filepath_local))
 
         if not os.path.exists(temp_audio_filepath_local):
             logger.error(f"[DOC_TTS] Generated audio file not found at {temp_audio_filepath_local} after generation attempt.")
@@ -261,4 +218,10 @@ def generate_document_tts_preview_audio(request):
 
     except Exception as e:
         logger.error(f"[DOC_TTS] General Error for User: {request.user.username if request.user.is_authenticated else 'UnknownUser'}. Error: {e}", exc_info=True)
-        return JsonResponse({'status': 'error', 'message': f'An unexpected server error occurred. Please check the server logs.'}, status=500)
\ No newline at end of file
+        return JsonResponse({'status': 'error', 'message': f'An unexpected server error occurred. Please check the server logs.'}, status=500)
+
+@require_GET
+def tts_segment_cache_status(request):
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'Admin access required'}, status=403)
+    return JsonResponse({'success': True, 'tts_segment_cache': segment_cache.get_metrics()})
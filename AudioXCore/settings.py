@@ -63,6 +63,7 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'django.contrib.sites',
     'django.contrib.humanize',
+    'django.contrib.postgres',
 
     # Custom Application
     'AudioXApp.apps.AudioxappConfig', # Use AppConfig for signal registration
@@ -281,6 +282,13 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
+# Synced into the database scheduler when beat starts
+CELERY_BEAT_SCHEDULE = {
+    'purge-expired-document-jobs': {
+        'task': 'AudioXApp.tasks.purge_expired_document_jobs',
+        'schedule': 24 * 60 * 60,
+    },
+}
 
 # Additional Celery optimizations for Docker
 CELERY_TASK_TRACK_STARTED = True
@@ -379,6 +387,101 @@ COIN_PACK_PRICES = {
     '1000': os.getenv('COIN_PACK_1000_PRICE', '1000.00'),
 }
 
+# External catalog (LibriVox / Archive.org) harvester
+LIBRIVOX_BASE_URL = os.getenv('LIBRIVOX_BASE_URL', 'https://librivox.org')
+ARCHIVE_ORG_BASE_URL = os.getenv('ARCHIVE_ORG_BASE_URL', 'https://archive.org')
+EXTERNAL_CATALOG_MAX_WORKERS = int(os.getenv('EXTERNAL_CATALOG_MAX_WORKERS', 8))
+EXTERNAL_CATALOG_MAX_RETRIES = int(os.getenv('EXTERNAL_CATALOG_MAX_RETRIES', 3))
+EXTERNAL_CATALOG_BACKOFF_SECONDS = float(os.getenv('EXTERNAL_CATALOG_BACKOFF_SECONDS', 0.5))
+EXTERNAL_CATALOG_TIMEOUT_SECONDS = int(os.getenv('EXTERNAL_CATALOG_TIMEOUT_SECONDS', 30))
+EXTERNAL_CATALOG_INCREMENTAL_REFRESH = os.getenv('EXTERNAL_CATALOG_INCREMENTAL_REFRESH', 'True') == 'True'
+EXTERNAL_CATALOG_REVALIDATE_SECONDS = int(os.getenv('EXTERNAL_CATALOG_REVALIDATE_SECONDS', 15 * 60))
+EXTERNAL_CATALOG_STALE_GRACE_SECONDS = int(os.getenv('EXTERNAL_CATALOG_STALE_GRACE_SECONDS', 24 * 60 * 60))
+EXTERNAL_CATALOG_REFRESH_LOCK_SECONDS = int(os.getenv('EXTERNAL_CATALOG_REFRESH_LOCK_SECONDS', 15 * 60))
+EXTERNAL_CATALOG_REFRESH_COOLDOWN_SECONDS = int(os.getenv('EXTERNAL_CATALOG_REFRESH_COOLDOWN_SECONDS', 5 * 60))
+# (requests per second, burst) per upstream host; '*' applies to any other host.
+EXTERNAL_CATALOG_HOST_RATE_LIMITS = {
+    'archive.org': (float(os.getenv('ARCHIVE_ORG_RATE_LIMIT', 4)), 4),
+    'librivox.org': (float(os.getenv('LIBRIVOX_RATE_LIMIT', 2)), 2),
+    '*': (5.0, 5),
+}
+
+# Audiobook search (PostgreSQL full-text + trigram; other databases use icontains matching)
+AUDIOBOOK_FULL_TEXT_SEARCH = os.getenv('AUDIOBOOK_FULL_TEXT_SEARCH', 'True') == 'True'
+AUDIOBOOK_SEARCH_CONFIG = os.getenv('AUDIOBOOK_SEARCH_CONFIG', 'simple')
+
+# Async audio streaming proxy (one pooled httpx client per worker)
+AUDIO_PROXY_MAX_CONNECTIONS = int(os.getenv('AUDIO_PROXY_MAX_CONNECTIONS', 500))
+AUDIO_PROXY_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('AUDIO_PROXY_MAX_KEEPALIVE_CONNECTIONS', 100))
+AUDIO_PROXY_KEEPALIVE_EXPIRY_SECONDS = int(os.getenv('AUDIO_PROXY_KEEPALIVE_EXPIRY_SECONDS', 60))
+AUDIO_PROXY_INITIAL_CHUNK_BYTES = int(os.getenv('AUDIO_PROXY_INITIAL_CHUNK_BYTES', 64 * 1024))
+AUDIO_PROXY_MAX_CHUNK_BYTES = int(os.getenv('AUDIO_PROXY_MAX_CHUNK_BYTES', 1024 * 1024))
+
+# Local chapter audio sent by the front proxy after the view authorizes it
+# ('x-accel-redirect' for nginx, 'x-sendfile' for Apache/lighttpd, '' to stream from Django)
+MEDIA_OFFLOAD_MODE = os.getenv('MEDIA_OFFLOAD_MODE', '')
+MEDIA_OFFLOAD_INTERNAL_PREFIX = os.getenv('MEDIA_OFFLOAD_INTERNAL_PREFIX', '/protected-media/')
+
+# Lifetime of the signed playback tokens minted for accessible chapters
+STREAM_TOKEN_TTL_SECONDS = int(os.getenv('STREAM_TOKEN_TTL_SECONDS', 6 * 3600))
+
+# On-disk LRU cache of proxied external audio, in aligned blocks (shared by streaming and clip generation)
+AUDIO_CHUNK_CACHE_ENABLED = os.getenv('AUDIO_CHUNK_CACHE_ENABLED', 'True') == 'True'
+AUDIO_CHUNK_CACHE_DIR = os.getenv('AUDIO_CHUNK_CACHE_DIR', str(BASE_DIR / 'audio_chunk_cache'))
+AUDIO_CHUNK_CACHE_BLOCK_BYTES = int(os.getenv('AUDIO_CHUNK_CACHE_BLOCK_BYTES', 1024 * 1024))
+AUDIO_CHUNK_CACHE_MAX_BYTES = int(os.getenv('AUDIO_CHUNK_CACHE_MAX_BYTES', 2 * 1024 ** 3))
+
+# Text-to-speech pipeline ('edge' for Microsoft Edge TTS, 'stub' for offline silent audio, or a dotted class path)
+TTS_ENGINE = os.getenv('TTS_ENGINE', 'edge')
+TTS_SEGMENT_MAX_CHARS = int(os.getenv('TTS_SEGMENT_MAX_CHARS', 3000))
+TTS_STUB_LATENCY_SECONDS = float(os.getenv('TTS_STUB_LATENCY_SECONDS', 0))
+TTS_SYNTHESIS_CONCURRENCY = int(os.getenv('TTS_SYNTHESIS_CONCURRENCY', 4))
+TTS_SEGMENT_RETRIES = int(os.getenv('TTS_SEGMENT_RETRIES', 2))
+TTS_SEGMENT_CACHE_ENABLED = os.getenv('TTS_SEGMENT_CACHE_ENABLED', 'True') == 'True'
+TTS_SEGMENT_CACHE_DIR = os.getenv('TTS_SEGMENT_CACHE_DIR', str(BASE_DIR / 'tts_segment_cache'))
+TTS_SEGMENT_CACHE_MAX_BYTES = int(os.getenv('TTS_SEGMENT_CACHE_MAX_BYTES', 1024 ** 3))
+TTS_EXTRACTION_WORKERS = int(os.getenv('TTS_EXTRACTION_WORKERS', min(os.cpu_count() or 1, 4)))
+TTS_OCR_DPI = int(os.getenv('TTS_OCR_DPI', 300))
+# Finished document conversion jobs, with their upload and MP3, are deleted after this many days
+TTS_DOCUMENT_JOB_RETENTION_DAYS = int(os.getenv('TTS_DOCUMENT_JOB_RETENTION_DAYS', 7))
+
+# Chunked speech-to-text for moderation ('google' for Google Cloud Speech-to-Text, 'stub' for offline, or a dotted class path)
+TRANSCRIPTION_BACKEND = os.getenv('TRANSCRIPTION_BACKEND', 'google')
+TRANSCRIPTION_WINDOW_SECONDS = float(os.getenv('TRANSCRIPTION_WINDOW_SECONDS', 55))
+TRANSCRIPTION_OVERLAP_SECONDS = float(os.getenv('TRANSCRIPTION_OVERLAP_SECONDS', 5))
+TRANSCRIPTION_CONCURRENCY = int(os.getenv('TRANSCRIPTION_CONCURRENCY', 4))
+TRANSCRIPTION_WINDOW_RETRIES = int(os.getenv('TRANSCRIPTION_WINDOW_RETRIES', 2))
+TRANSCRIPTION_FFMPEG_PATH = os.getenv('TRANSCRIPTION_FFMPEG_PATH', 'ffmpeg')
+
+# Moderation verdicts and transcripts cached by audio / source text hash
+MODERATION_CACHE_ENABLED = os.getenv('MODERATION_CACHE_ENABLED', 'True') == 'True'
+MODERATION_CACHE_TIMEOUT = int(os.getenv('MODERATION_CACHE_TIMEOUT', 30 * 24 * 3600))
+
+# HLS packaging of approved local chapters (AAC renditions cut into fixed-length segments, served by stream_hls)
+HLS_PACKAGING_ENABLED = os.getenv('HLS_PACKAGING_ENABLED', 'True') == 'True'
+HLS_SEGMENT_SECONDS = int(os.getenv('HLS_SEGMENT_SECONDS', 6))
+HLS_BITRATES_KBPS = [int(b) for b in os.getenv('HLS_BITRATES_KBPS', '48,96').split(',') if b.strip()]
+HLS_FFMPEG_PATH = os.getenv('HLS_FFMPEG_PATH', 'ffmpeg')
+HLS_CACHE_CONTROL = os.getenv('HLS_CACHE_CONTROL', 'private, max-age=31536000, immutable')
+
+# Loudness-normalized AAC renditions of uploaded chapter audio, transcoded on their own Celery queue
+# (run a worker with -Q transcoding; its concurrency caps the ffmpeg processes running at once)
+AUDIO_TRANSCODING_ENABLED = os.getenv('AUDIO_TRANSCODING_ENABLED', 'True') == 'True'
+AUDIO_TRANSCODING_QUEUE = os.getenv('AUDIO_TRANSCODING_QUEUE', 'transcoding')
+AUDIO_TRANSCODING_FFMPEG_PATH = os.getenv('AUDIO_TRANSCODING_FFMPEG_PATH', 'ffmpeg')
+AUDIO_TRANSCODING_FFMPEG_THREADS = int(os.getenv('AUDIO_TRANSCODING_FFMPEG_THREADS', 1))
+AUDIO_RENDITION_PROFILES = {
+    'low': int(os.getenv('AUDIO_RENDITION_LOW_KBPS', 48)),
+    'medium': int(os.getenv('AUDIO_RENDITION_MEDIUM_KBPS', 96)),
+}
+AUDIO_RENDITION_DEFAULT_PROFILE = os.getenv('AUDIO_RENDITION_DEFAULT_PROFILE', 'medium')
+AUDIO_LOUDNESS_TARGET_LUFS = float(os.getenv('AUDIO_LOUDNESS_TARGET_LUFS', -18))
+AUDIO_LOUDNESS_TRUE_PEAK_DB = float(os.getenv('AUDIO_LOUDNESS_TRUE_PEAK_DB', -1.5))
+AUDIO_LOUDNESS_RANGE = float(os.getenv('AUDIO_LOUDNESS_RANGE', 11))
+CELERY_TASK_ROUTES = {
+    'AudioXApp.tasks.transcode_chapter_audio': {'queue': AUDIO_TRANSCODING_QUEUE},
+}
+
 # =============================================================================
 #  LOGGING CONFIGURATION
 # =============================================================================
@@ -18,6 +18,9 @@ const placeholderCoverSrc = "https://placehold.co/80x80/09065E/FFFFFF?text=N/A&f
 const chapterItems = document.querySelectorAll(".chapter-item")
 let currentChapterIndex = -1
 let currentlyPlayingListItemButton = null
+// Chapters packaged for HLS play their adaptive playlist (natively on Safari/iOS, through hls.js elsewhere)
+let hlsPlayer = null
+let currentSourceUrl = null
 
 const playbackSpeeds = [1, 1.5, 2, 0.75]
 let currentSpeedIndex = 0
@@ -688,6 +691,38 @@ function updatePlayerInfo(chapterIndexValue) {
   if (playerNextButton) playerNextButton.disabled = chapterIndexValue >= totalEpisodes - 1
 }
 
+function releaseHlsPlayer() {
+  if (hlsPlayer) {
+    hlsPlayer.destroy()
+    hlsPlayer = null
+  }
+}
+
+function loadChapterSource(audioUrl, hlsUrl) {
+  releaseHlsPlayer()
+  currentSourceUrl = audioUrl
+  if (hlsUrl && audioPlayer.canPlayType("application/vnd.apple.mpegurl")) {
+    audioPlayer.src = hlsUrl
+  } else if (hlsUrl && window.Hls && window.Hls.isSupported()) {
+    hlsPlayer = new window.Hls()
+    hlsPlayer.on(window.Hls.Events.ERROR, (event, data) => {
+      if (data.fatal) {
+        // Fall back to the progressive stream
+        console.warn("[DEBUG] HLS playback failed, falling back to progressive stream:", data.details)
+        releaseHlsPlayer()
+        audioPlayer.src = audioUrl
+        audioPlayer.load()
+      }
+    })
+    hlsPlayer.loadSource(hlsUrl)
+    hlsPlayer.attachMedia(audioPlayer)
+    return
+  } else {
+    audioPlayer.src = audioUrl
+  }
+  audioPlayer.load()
+}
+
 window.playChapter = (buttonElement) => {
   const chapterItem = buttonElement.closest(".chapter-item")
   if (!chapterItem) {
@@ -696,6 +731,7 @@ window.playChapter = (buttonElement) => {
   }
 
   const audioUrlTemplate = chapterItem.dataset.audioUrlTemplate
+  const hlsUrl = chapterItem.dataset.hlsUrl
   const chapterTitle = chapterItem.dataset.chapterTitle || "Episode"
   const chapterIndexFromData = Number.parseInt(chapterItem.dataset.chapterIndex ?? "-1", 10)
   const isAccessible = chapterItem.dataset.isAccessible === "true"
@@ -799,7 +835,7 @@ window.playChapter = (buttonElement) => {
 
   // Rest of the playback logic remains the same...
   const isPlayingThisChapter = currentlyPlayingListItemButton === buttonElement && !audioPlayer.paused
-  const isDifferentChapter = audioPlayer.src !== audioUrl
+  const isDifferentChapter = audioPlayer.src !== audioUrl && currentSourceUrl !== audioUrl
 
   if (isPlayingThisChapter && !isDifferentChapter) {
     audioPlayer.pause()
@@ -845,8 +881,7 @@ window.playChapter = (buttonElement) => {
 
     // Load and play audio
     if (isDifferentChapter || audioPlayer.paused) {
-      audioPlayer.src = audioUrl
-      audioPlayer.load()
+      loadChapterSource(audioUrl, hlsUrl)
 
       if (shouldAutoResume) {
         console.log(`[DEBUG] Auto-resuming to ${resumeTime}s`)
@@ -1004,6 +1039,8 @@ window.playPreviousChapter = () => {
 
 window.closePlayer = () => {
   audioPlayer.pause()
+  releaseHlsPlayer()
+  currentSourceUrl = null
   audioPlayer.src = ""
   hidePlayerBar()
   if (currentlyPlayingListItemButton) updateListItemButtonState(currentlyPlayingListItemButton, "paused")
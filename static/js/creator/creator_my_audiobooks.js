@@ -0,0 +1,49 @@
+/**
+ * AudioX Creator My Audiobooks - Chapter Audio Progress
+ *
+ * Text-to-speech chapters are synthesized in the background after an upload.
+ * Every book card listing such chapters polls the book's chapters endpoint and
+ * updates each chapter's progress bar until all of them are ready or failed.
+ */
+
+const CHAPTER_AUDIO_POLL_INTERVAL_MS = 3000
+
+function updateChapterAudioRow(row, chapter) {
+  const statusLabel = row.querySelector("[data-audio-status]")
+  const bar = row.querySelector("[data-audio-bar]")
+  if (statusLabel) statusLabel.textContent = chapter.audio_status_display
+  if (bar) {
+    bar.style.width = `${chapter.audio_progress}%`
+    bar.classList.toggle("bg-red-600", chapter.audio_status === "failed")
+    bar.classList.toggle("bg-[#091e65]", chapter.audio_status !== "failed")
+  }
+}
+
+function trackChapterAudio(container) {
+  const url = container.dataset.url
+
+  async function poll() {
+    let unfinished = 0
+    try {
+      const response = await fetch(url, { headers: { "X-Requested-With": "XMLHttpRequest" } })
+      if (!response.ok) throw new Error(`HTTP ${response.status}`)
+      const data = await response.json()
+      data.chapters.forEach((chapter) => {
+        const row = container.querySelector(`[data-chapter-id="${chapter.id}"]`)
+        if (!row) return
+        updateChapterAudioRow(row, chapter)
+        if (chapter.audio_status === "pending" || chapter.audio_status === "generating") unfinished += 1
+      })
+    } catch (error) {
+      console.error("Could not refresh chapter audio progress:", error)
+      unfinished = 1
+    }
+    if (unfinished > 0) setTimeout(poll, CHAPTER_AUDIO_POLL_INTERVAL_MS)
+  }
+
+  poll()
+}
+
+document.addEventListener("DOMContentLoaded", () => {
+  document.querySelectorAll("[data-chapter-audio-progress]").forEach(trackChapterAudio)
+})
@@ -57,8 +57,10 @@ document.addEventListener("DOMContentLoaded", () => {
   // APPLICATION STATE
   // ============================================================================
 
-  let currentAudioData = null
+  let currentAudioUrl = null
   let originalFilename = ""
+  let activeJobSocket = null
+  let activeJobPollTimer = null
 
   // Configuration constants
   const LANGUAGES_REQUIRING_GENDER = ["English", "Urdu"]
@@ -72,6 +74,7 @@ document.addEventListener("DOMContentLoaded", () => {
     "image/png",
   ]
   const ALLOWED_EXTENSIONS = [".pdf", ".doc", ".docx", ".jpg", ".jpeg", ".png"]
+  const JOB_POLL_INTERVAL_MS = 2000
 
   // ============================================================================
   // UTILITY FUNCTIONS
@@ -90,24 +93,6 @@ document.addEventListener("DOMContentLoaded", () => {
     return Number.parseFloat((bytes / Math.pow(k, i)).toFixed(2)) + " " + sizes[i]
   }
 
-  /**
-   * Converts base64 string to Blob object
-   * @param {string} base64 - Base64 encoded data
-   * @param {string} mimeType - MIME type for the blob
-   * @returns {Blob} Blob object
-   */
-  function base64ToBlob(base64, mimeType) {
-    const byteCharacters = atob(base64)
-    const byteNumbers = new Array(byteCharacters.length)
-
-    for (let i = 0; i < byteCharacters.length; i++) {
-      byteNumbers[i] = byteCharacters.charCodeAt(i)
-    }
-
-    const byteArray = new Uint8Array(byteNumbers)
-    return new Blob([byteArray], { type: mimeType })
-  }
-
   /**
    * Validates uploaded file type and size
    * @param {File} file - File object to validate
@@ -234,18 +219,14 @@ document.addEventListener("DOMContentLoaded", () => {
 
   /**
    * Shows audio preview section with generated audio
-   * @param {string} audioData - Base64 encoded audio data
+   * @param {string} audioUrl - URL of the generated MP3
    * @param {string} filename - Original filename for default naming
    */
-  function showAudioPreview(audioData, filename) {
-    currentAudioData = audioData
+  function showAudioPreview(audioUrl, filename) {
+    currentAudioUrl = audioUrl
     originalFilename = filename
 
-    // Convert base64 to blob and create URL
-    const audioBlob = base64ToBlob(audioData, "audio/mpeg")
-    const audioUrl = URL.createObjectURL(audioBlob)
-
-    // Set audio source
+    // The player streams the MP3 straight from the server
     if (audioPlayer) {
       audioPlayer.src = audioUrl
     }
@@ -273,13 +254,11 @@ document.addEventListener("DOMContentLoaded", () => {
     }
 
     if (audioPlayer) {
-      if (audioPlayer.src) {
-        URL.revokeObjectURL(audioPlayer.src)
-      }
-      audioPlayer.src = ""
+      audioPlayer.removeAttribute("src")
+      audioPlayer.load()
     }
 
-    currentAudioData = null
+    currentAudioUrl = null
     originalFilename = ""
 
     console.log("🔄 Audio preview hidden and resources cleaned")
@@ -289,7 +268,7 @@ document.addEventListener("DOMContentLoaded", () => {
    * Updates button loading state
    * @param {boolean} isLoading - Whether button should show loading state
    */
-  function updateButtonLoadingState(isLoading) {
+  function updateButtonLoadingState(isLoading, progressText) {
     if (!convertButton) return
 
     const buttonText = convertButton.querySelector(".button-text")
@@ -297,7 +276,7 @@ document.addEventListener("DOMContentLoaded", () => {
     const buttonLoader = convertButton.querySelector(".button-loader")
 
     if (isLoading) {
-      if (buttonText) buttonText.textContent = "Generating Premium Audio..."
+      if (buttonText) buttonText.textContent = progressText || "Generating Premium Audio..."
       if (buttonIcon) buttonIcon.classList.add("hidden")
       if (buttonLoader) buttonLoader.classList.remove("hidden")
       convertButton.disabled = true
@@ -313,26 +292,21 @@ document.addEventListener("DOMContentLoaded", () => {
    * Downloads the generated audio file
    */
   function downloadAudio() {
-    if (!currentAudioData) {
+    if (!currentAudioUrl) {
       showError("No audio data available for download.")
       return
     }
 
     const filename = customFilename.value.trim() || originalFilename
-    const audioBlob = base64ToBlob(currentAudioData, "audio/mpeg")
-    const url = URL.createObjectURL(audioBlob)
 
-    // Create temporary download link
+    // Create temporary download link (same origin, so the download name applies)
     const downloadLink = document.createElement("a")
-    downloadLink.href = url
+    downloadLink.href = currentAudioUrl
     downloadLink.download = `${filename}.mp3`
     document.body.appendChild(downloadLink)
     downloadLink.click()
     document.body.removeChild(downloadLink)
 
-    // Cleanup
-    URL.revokeObjectURL(url)
-
     console.log(`📥 Audio downloaded: ${filename}.mp3`)
   }
 
@@ -344,6 +318,7 @@ document.addEventListener("DOMContentLoaded", () => {
       uploadForm.reset()
     }
 
+    stopTrackingJob()
     hideFileSelection()
     hideAudioPreview()
     hideError()
@@ -353,6 +328,98 @@ document.addEventListener("DOMContentLoaded", () => {
     console.log("🔄 Form reset to initial state")
   }
 
+  // ============================================================================
+  // CONVERSION JOB TRACKING
+  // ============================================================================
+
+  /**
+   * Stops listening for progress of the current conversion job
+   */
+  function stopTrackingJob() {
+    if (activeJobSocket) {
+      activeJobSocket.onclose = null
+      activeJobSocket.close()
+      activeJobSocket = null
+    }
+    if (activeJobPollTimer) {
+      clearTimeout(activeJobPollTimer)
+      activeJobPollTimer = null
+    }
+  }
+
+  /**
+   * Applies a job status update from the WebSocket or the status endpoint
+   * @param {Object} job - Job state (status, progress, download_url, error)
+   * @returns {boolean} True once the job has finished
+   */
+  function handleJobUpdate(job) {
+    if (job.status === "completed") {
+      stopTrackingJob()
+      updateButtonLoadingState(false)
+      console.log("✅ Audio generation successful")
+      showAudioPreview(job.download_url, job.original_filename)
+      return true
+    }
+    if (job.status === "failed") {
+      stopTrackingJob()
+      updateButtonLoadingState(false)
+      console.error("❌ Audio generation failed:", job.error)
+      showError(job.error || "An error occurred while generating audio.")
+      return true
+    }
+
+    const progressText = job.status === "synthesizing" ? `Generating Premium Audio... ${job.progress}%` : `${job.status_display}...`
+    updateButtonLoadingState(true, progressText)
+    return false
+  }
+
+  /**
+   * Polls the job status endpoint until the job finishes
+   * @param {string} statusUrl - Job status endpoint
+   */
+  function pollJobStatus(statusUrl) {
+    fetch(statusUrl, { headers: { "X-Requested-With": "XMLHttpRequest" } })
+      .then((response) => response.json())
+      .then((data) => {
+        if (data.success && handleJobUpdate(data.job)) return
+        activeJobPollTimer = setTimeout(() => pollJobStatus(statusUrl), JOB_POLL_INTERVAL_MS)
+      })
+      .catch((error) => {
+        console.error("🌐 Network error while polling job:", error)
+        activeJobPollTimer = setTimeout(() => pollJobStatus(statusUrl), JOB_POLL_INTERVAL_MS)
+      })
+  }
+
+  /**
+   * Follows a queued conversion job: WebSocket pushes, polling as fallback
+   * @param {Object} data - Submit response (job_id, status_url, websocket_path)
+   */
+  function trackConversionJob(data) {
+    stopTrackingJob()
+
+    if (!window.WebSocket) {
+      pollJobStatus(data.status_url)
+      return
+    }
+
+    const protocol = window.location.protocol === "https:" ? "wss" : "ws"
+    const socket = new WebSocket(`${protocol}://${window.location.host}${data.websocket_path}`)
+    activeJobSocket = socket
+
+    socket.onmessage = (event) => {
+      const message = JSON.parse(event.data)
+      if (message.type === "job_progress") handleJobUpdate(message.job)
+    }
+
+    // Fall back to polling if the socket can't be opened or drops before the job finishes
+    socket.onclose = () => {
+      if (activeJobSocket !== socket) return
+      activeJobSocket = null
+      console.warn("🔌 Job WebSocket closed, polling for progress instead")
+      pollJobStatus(data.status_url)
+    }
+  }
+
   // ============================================================================
   // FORM VALIDATION FUNCTIONS
   // ============================================================================
@@ -459,18 +526,19 @@ document.addEventListener("DOMContentLoaded", () => {
       .then((response) => response.json())
       .then((data) => {
         if (data.success) {
-          console.log("✅ Audio generation successful")
-          showAudioPreview(data.audio_data, data.original_filename)
+          // The conversion runs in the background; progress arrives over the WebSocket or by polling
+          console.log(`📋 Conversion job queued: ${data.job_id}`)
+          updateButtonLoadingState(true, "Queued...")
+          trackConversionJob(data)
         } else {
           console.error("❌ Audio generation failed:", data.error)
           showError(data.error || "An error occurred while generating audio.")
+          updateButtonLoadingState(false)
         }
       })
       .catch((error) => {
         console.error("🌐 Network error:", error)
         showError("Network error occurred. Please check your connection and try again.")
-      })
-      .finally(() => {
         updateButtonLoadingState(false)
       })
 